@@ -0,0 +1,38 @@
+# 地域検索 (AreaIndex.search) の 1 キー入力あたりの応答時間
+# 全階層の地域名・よみを 1 文字ずつ入力したときの検索時間を計測する
+#
+#   python benchmarks/bench_area_search.py
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jma_common.area_index import LEVELS, load_bundled_index
+
+
+def main():
+    index = load_bundled_index()
+    started = time.perf_counter()
+    index.search("あ")
+    print(f"検索用配列の作成 (初回のみ): {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    words = [a.kana or a.name for level in LEVELS for a in index.all(level)]
+    timings = []
+    for word in words:
+        for end in range(1, len(word) + 1):
+            started = time.perf_counter()
+            index.search(word[:end], limit=50)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    print(
+        f"{len(timings)} 回のキー入力: 平均 {statistics.mean(timings) * 1e6:.1f} µs, "
+        f"p50 {p50:.1f} µs, p99 {p99:.1f} µs, 最大 {timings[-1] * 1e6:.1f} µs"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# 単項演算の一括適用 (calculator/calc_batch.py) とスカラーのループ (CalculatorEngine と同じ計算) の比較 (要 numpy)
+# 0・負数・巨大な値・inf・nan を混ぜた入力に各演算を適用し、値とエラーの位置が一致することを確かめて時間を比べる
+#
+#   python benchmarks/bench_calc_batch.py --size 10000000
+#   python benchmarks/bench_calc_batch.py --size 10000000 --scalar-size 1000000   # スカラー側は一部だけ計る
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "calculator"))
+
+from calc_batch import OPERATIONS, apply
+from calc_engine import SCIENTIFIC
+
+# スカラー版 (CalculatorEngine の科学計算と % と同じ)
+SCALAR = dict(SCIENTIFIC, **{"%": lambda value: value / 100})
+
+
+def scalar_loop(op, values):
+    function = SCALAR[op]
+    results = []
+    for value in values:
+        try:
+            results.append(function(value))
+        except Exception:
+            results.append("Error")
+    return results
+
+
+# 大半は -1000〜1000 の一様乱数で、残りをエラーや桁あふれの起きやすい値にする
+def make_inputs(size, rng):
+    x = rng.uniform(-1000, 1000, size)
+    special = rng.integers(0, 100, size)
+    for kind, values in (
+        (0, lambda n: np.zeros(n)),
+        (1, lambda n: np.zeros(n)),
+        (2, lambda n: rng.uniform(-1e200, 1e200, n)),
+        (3, lambda n: rng.choice([np.inf, -np.inf], n)),
+        (4, lambda n: np.full(n, np.nan)),
+        (5, lambda n: rng.uniform(-1e-300, 1e-300, n)),
+    ):
+        mask = special == kind
+        x[mask] = values(int(mask.sum()))
+    return x
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10_000_000)
+    parser.add_argument("--scalar-size", type=int, default=None, help="スカラーのループで処理する件数 (既定は --size と同じ)")
+    parser.add_argument("--ops", nargs="+", default=list(OPERATIONS))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    x = make_inputs(args.size, rng)
+    scalar_size = min(args.scalar_size or args.size, args.size)
+    scalar_inputs = x[:scalar_size].tolist()
+    out = np.empty_like(x)
+    failed = False
+
+    print(f"入力 {args.size:,} 件 (スカラーは {scalar_size:,} 件)")
+    for op in args.ops:
+        started = time.perf_counter()
+        result, error = apply(op, x, out=out)
+        batch = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = scalar_loop(op, scalar_inputs)
+        scalar = (time.perf_counter() - started) * args.size / scalar_size
+
+        expected_error = np.array([v == "Error" for v in expected])
+        expected_values = np.array([np.nan if v == "Error" else v for v in expected], dtype=np.float64)
+        same_errors = np.array_equal(error[:scalar_size], expected_error)
+        same_values = np.allclose(result[:scalar_size], expected_values, rtol=1e-12, atol=0, equal_nan=True)
+        failed |= not (same_errors and same_values)
+        print(
+            f"{op:>5}  一括 {batch * 1000:8.1f} ms  スカラー {scalar * 1000:10.1f} ms  "
+            f"{scalar / batch:6.1f} 倍  エラー {int(error.sum()):>9,} 件  "
+            f"{'一致' if same_errors and same_values else '不一致'}"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# 電卓エンジン (calculator/calc_engine.py) のスループットと、分離前の UI の動作との一致確認
+# ランダムなキー列を CalculatorEngine と分離前の button_clicked の処理 (下の LegacyCalculator) に
+# 同じ順で入力し、1 キーごとの表示がすべて一致することを確かめてから、キー処理の速度を計る
+#
+#   python benchmarks/bench_calc_engine.py --sequences 200000
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "calculator"))
+
+from calc_engine import DIGIT_KEYS, KEYS, OPERATOR_KEYS, SCIENTIFIC_KEYS, CalculatorEngine
+
+
+# 分離前の CalculatorApp.button_clicked / calculate / format_number / reset (self.result.value を self.value に置き換えたもの)
+# Flet はイベント処理中の例外を握りつぶして表示を更新しないので、例外時は状態を変えずに続ける
+class LegacyCalculator:
+    def __init__(self):
+        self.value = "0"
+        self.reset()
+
+    def press(self, data):
+        try:
+            self.button_clicked(data)
+        except Exception:
+            pass
+        return str(self.value)
+
+    def button_clicked(self, data):
+        if self.value == "Error" or data == "AC":
+            self.value = "0"
+            self.reset()
+        elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
+            if self.value == "0" or self.new_operand:
+                self.value = data
+                self.new_operand = False
+            else:
+                self.value += data
+        elif data in ("+", "-", "*", "/"):
+            self.value = self.calculate(self.operand1, float(self.value), self.operator)
+            self.operator = data
+            if self.value == "Error":
+                self.operand1 = "0"
+            else:
+                self.operand1 = float(self.value)
+            self.new_operand = True
+        elif data == "=":
+            self.value = self.calculate(self.operand1, float(self.value), self.operator)
+            self.reset()
+        elif data == "%":
+            self.value = float(self.value) / 100
+            self.reset()
+        elif data == "+/-":
+            if float(self.value) > 0:
+                self.value = "-" + str(self.value)
+            elif float(self.value) < 0:
+                self.value = str(self.format_number(abs(float(self.value))))
+        elif data in ("sin", "cos", "tan", "ln", "e^x", "π", "x^2", "x^3", "1/x", "10^x"):
+            try:
+                value = float(self.value)
+                if data == "sin":
+                    self.value = self.format_number(math.sin(math.radians(value)))
+                elif data == "cos":
+                    self.value = self.format_number(math.cos(math.radians(value)))
+                elif data == "tan":
+                    self.value = self.format_number(math.tan(math.radians(value)))
+                elif data == "ln":
+                    self.value = "Error" if value <= 0 else self.format_number(math.log(value))
+                elif data == "e^x":
+                    self.value = self.format_number(math.exp(value))
+                elif data == "π":
+                    self.value = self.format_number(math.pi)
+                elif data == "x^2":
+                    self.value = self.format_number(math.pow(value, 2))
+                elif data == "x^3":
+                    self.value = self.format_number(math.pow(value, 3))
+                elif data == "1/x":
+                    self.value = "Error" if value == 0 else self.format_number(1 / value)
+                elif data == "10^x":
+                    self.value = self.format_number(math.pow(10, value))
+            except:
+                self.value = "Error"
+
+    def format_number(self, num):
+        return int(num) if num % 1 == 0 else num
+
+    def calculate(self, operand1, operand2, operator):
+        if operator == "+":
+            return self.format_number(operand1 + operand2)
+        elif operator == "-":
+            return self.format_number(operand1 - operand2)
+        elif operator == "*":
+            return self.format_number(operand1 * operand2)
+        elif operator == "/":
+            return "Error" if operand2 == 0 else self.format_number(operand1 / operand2)
+
+    def reset(self):
+        self.operator = "+"
+        self.operand1 = 0
+        self.new_operand = True
+
+
+# 数字を多めにしたランダムなキー列 (最後は "=")
+def random_sequence(rng, length):
+    keys = []
+    for _ in range(length):
+        r = rng.random()
+        if r < 0.55:
+            keys.append(rng.choice(DIGIT_KEYS))
+        elif r < 0.8:
+            keys.append(rng.choice(OPERATOR_KEYS))
+        elif r < 0.92:
+            keys.append(rng.choice(SCIENTIFIC_KEYS))
+        else:
+            keys.append(rng.choice(KEYS))
+    keys.append("=")
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sequences", type=int, default=200_000)
+    parser.add_argument("--length", type=int, default=12, help="1 シーケンスのキー数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sequences = [random_sequence(rng, args.length) for _ in range(args.sequences)]
+    keys = sum(len(s) for s in sequences)
+
+    # 分離前の動作との一致 (1 キーごとの表示を比較)
+    engine, legacy = CalculatorEngine(), LegacyCalculator()
+    mismatches = 0
+    for sequence in sequences:
+        for key in sequence:
+            expected = legacy.press(key)
+            actual = engine.press(key)
+            if actual != expected:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"不一致: {' '.join(sequence)} ({key!r}) -> {actual!r}, 分離前 {expected!r}")
+                engine.value, legacy.value = "0", "0"
+                engine.reset()
+                legacy.reset()
+    print(f"一致確認: {keys:,} キー, 不一致 {mismatches} 件")
+
+    for label, calculator in (("CalculatorEngine", CalculatorEngine()), ("分離前の処理", LegacyCalculator())):
+        press = calculator.press
+        started = time.perf_counter()
+        for sequence in sequences:
+            for key in sequence:
+                press(key)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<18} {keys / elapsed / 1e6:6.2f} M キー/秒  {args.sequences / elapsed:12,.0f} シーケンス/秒")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# 式入力モード (calculator/calc_expression.py) の評価速度とコンパイル済みの式のキャッシュの効果
+# ランダムな四則演算の式を Python の eval と突き合わせて優先順位・括弧の扱いを確かめた後、
+# 毎回解析する場合・キャッシュを使う場合・コンパイル済みの式を直接評価する場合の 1 式あたりの時間を比べる
+#
+#   python benchmarks/bench_calc_expression.py --expressions 1000 --repeat 20
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "calculator"))
+
+from calc_expression import compile_expression, evaluate
+
+
+def random_expression(rng, depth=0):
+    if depth > 3 or rng.random() < 0.3:
+        return str(rng.randint(1, 99))
+    left, right = random_expression(rng, depth + 1), random_expression(rng, depth + 1)
+    text = f"{left}{rng.choice('+-*/')}{right}"
+    return f"({text})" if rng.random() < 0.3 else text
+
+
+def timed(label, run, count):
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed / count * 1e6:8.2f} µs/式")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--expressions", type=int, default=1000, help="異なる式の数 (キャッシュの大きさは 1024)")
+    parser.add_argument("--repeat", type=int, default=20, help="同じ式を評価し直す回数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sources = [random_expression(rng) for _ in range(args.expressions)]
+
+    # Python の eval (同じ優先順位) と比較
+    mismatches = 0
+    for source in sources:
+        try:
+            expected = eval(source)
+        except ZeroDivisionError:
+            expected = "Error"
+        actual = evaluate(source)
+        if expected == "Error" or actual == "Error":
+            ok = expected == actual
+        else:
+            ok = math.isclose(actual, expected, rel_tol=1e-12, abs_tol=1e-12)
+        if not ok:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"不一致: {source} -> {actual}, eval {expected}")
+    print(f"一致確認: {len(sources)} 式, 不一致 {mismatches} 件")
+
+    count = len(sources) * args.repeat
+    parse = compile_expression.__wrapped__
+    timed("毎回解析・コンパイル", lambda: [parse(s).evaluate() for _ in range(args.repeat) for s in sources], count)
+    compile_expression.cache_clear()
+    timed("キャッシュ経由 (evaluate)", lambda: [evaluate(s) for _ in range(args.repeat) for s in sources], count)
+    compiled = [compile_expression(s) for s in sources]
+    timed("コンパイル済みを評価", lambda: [c.evaluate(i) for i in range(args.repeat) for c in compiled], count)
+    print(f"キャッシュ: {compile_expression.cache_info()}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
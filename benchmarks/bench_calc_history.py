@@ -0,0 +1,101 @@
+# 電卓の計算履歴 (calculator/calc_history.py) の性能計測
+#   1. キー 1 回あたりの記録の時間: 従来の print / 履歴のみ / JSON ログ (別スレッド) / バイナリログ
+#   2. バイナリログ (--records 件、--sessions セッション) の読み出し: セッション一覧・全件・1 セッション・再生
+#
+#   python benchmarks/bench_calc_history.py --records 1000000 --sessions 1000
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "calculator"))
+
+from calc_engine import KEYS, CalculatorEngine
+from calc_history import ActionLog, CalculationHistory, HistoryLog, replay, scan, sessions
+
+
+def timed(label, run, count, unit):
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed * 1000:9.1f} ms  {elapsed / count * 1e6:8.3f} µs/{unit}")
+    return result
+
+
+def record_keys(history, keys, values):
+    for key, value in zip(keys, values):
+        history.record(key, value)
+
+
+def print_keys(keys, values):
+    for key, value in zip(keys, values):
+        print(f"Button clicked with data = {key}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--clicks", type=int, default=200_000, help="記録の時間を計るキーの数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    engine = CalculatorEngine()
+    keys = [rng.choice(KEYS) for _ in range(args.clicks)]
+    values = [engine.press(key) for key in keys]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calc_history.bin")
+        print(f"キー {args.clicks:,} 回の記録")
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                started = time.perf_counter()
+                print_keys(keys, values)
+                elapsed = time.perf_counter() - started
+            print(f"{'print (/dev/null)':<32} {elapsed * 1000:9.1f} ms  {elapsed / args.clicks * 1e6:8.3f} µs/キー")
+            timed("履歴のみ", lambda: record_keys(CalculationHistory(log=False, action_log=False), keys, values),
+                  args.clicks, "キー")
+            action_log = ActionLog(devnull)
+            timed("JSON ログ (キューに入れるまで)",
+                  lambda: record_keys(CalculationHistory(log=False, action_log=action_log), keys, values),
+                  args.clicks, "キー")
+            timed("JSON ログ (書き終わるまで)", action_log.close, args.clicks, "キー")
+        log = HistoryLog(path)
+        timed("バイナリログ", lambda: record_keys(CalculationHistory(log=log, action_log=False), keys, values),
+              args.clicks, "キー")
+        log.close()
+        os.remove(path)
+
+        # 多数のセッションが交互にキーを押したログを作る
+        histories = [CalculationHistory(log=HistoryLog(path), action_log=False) for _ in range(args.sessions)]
+        engines = [CalculatorEngine() for _ in range(args.sessions)]
+        for _ in range(args.records):
+            i = rng.randrange(args.sessions)
+            key = rng.choice(KEYS)
+            histories[i].record(key, engines[i].press(key))
+        for history in histories:
+            history.log.close()
+        size = os.path.getsize(path)
+        print(f"\nバイナリログ {args.records:,} 件 / {args.sessions:,} セッション ({size / 1e6:.1f} MB)")
+
+        summary = timed("セッション一覧 (sessions)", lambda: sessions(path), args.records, "件")
+        timed("全件 (scan)", lambda: sum(1 for _ in scan(path)), args.records, "件")
+        target = histories[0].session
+        entries = timed("1 セッション (scan session=)", lambda: list(scan(path, target)), args.records, "件")
+        mismatches = timed("1 セッションの再生 (replay)", lambda: replay(entries), max(len(entries), 1), "件")
+        print(f"セッション数 {len(summary):,}, 1 セッション {len(entries):,} 件, 再生の不一致 {len(mismatches)} 件")
+
+        # 書き込み途中で途切れた末尾は読み飛ばす
+        with open(path, "ab") as f:
+            f.write(b"\x00" * 5)
+        torn = sum(1 for _ in scan(path))
+        print(f"末尾が途切れたログ: {torn:,} 件 ({'正常' if torn == args.records else '異常'})")
+        sys.exit(1 if mismatches or torn != args.records else 0)
+
+
+if __name__ == "__main__":
+    main()
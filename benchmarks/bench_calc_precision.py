@@ -0,0 +1,66 @@
+# 電卓の精度モード (calculator/calc_precision.py) ごとの 1 操作あたりの時間
+# float / decimal / fraction の電卓に同じキー列を押し、四則演算・% ・科学計算の 1 回あたりの時間を比べる。
+# 最初に 0.1+0.2 などの例で各モードの表示を確かめる
+#
+#   python benchmarks/bench_calc_precision.py --repeat 20000
+#   python benchmarks/bench_calc_precision.py --digits 50   # decimal の桁数 / fraction の分母の桁数
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "calculator"))
+
+from calc_precision import MODES, make_engine
+
+# 各操作のキー列 (AC から始めて 1 回ずつ計算する)
+OPERATIONS = {
+    "+": ["AC", "0", ".", "1", "+", "0", ".", "2", "="],
+    "-": ["AC", "1", ".", "1", "-", "0", ".", "3", "="],
+    "*": ["AC", "1", ".", "1", "*", "1", ".", "1", "="],
+    "/": ["AC", "1", "/", "3", "="],
+    "%": ["AC", "1", "2", ".", "5", "%"],
+    "sin": ["AC", "3", "0", "sin"],
+    "ln": ["AC", "2", "ln"],
+    "x^2": ["AC", "1", ".", "5", "x^2"],
+    "1/x": ["AC", "7", "1/x"],
+    "10^x": ["AC", "2", "10^x"],
+}
+
+# 各モードの表示を確かめる例
+EXAMPLES = [
+    ["0", ".", "1", "+", "0", ".", "2", "="],
+    ["1", "/", "3", "=", "*", "3", "="],
+    ["3", "0", "sin"],
+    ["2", "ln"],
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--digits", type=int, default=None)
+    args = parser.parse_args()
+
+    for keys in EXAMPLES:
+        results = [make_engine(mode, args.digits).feed(keys) for mode in MODES]
+        print(f"{''.join(keys):<14} " + "  ".join(f"{mode}: {result}" for mode, result in zip(MODES, results)))
+    print()
+
+    # 数字の入力も含めた、キー列 1 回 (= 1 回の計算) あたりの時間
+    print(f"{'':<6}" + "".join(f"{mode:>12}" for mode in MODES) + "   (µs/操作)")
+    times = {}
+    for mode in MODES:
+        engine = make_engine(mode, args.digits)
+        for op, keys in OPERATIONS.items():
+            keys = keys * args.repeat
+            started = time.perf_counter()
+            for key in keys:
+                engine.press(key)
+            times[mode, op] = (time.perf_counter() - started) / args.repeat
+    for op in OPERATIONS:
+        print(f"{op:<6}" + "".join(f"{times[mode, op] * 1e6:12.2f}" for mode in MODES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# 電卓アプリ (calculator/serve.py) のワーカー数ごとの同時セッション性能 (要 flet)
+# ワーカー数を変えて serve.py を起動し、ブラウザの代わりに WebSocket で Flet のプロトコルを話す
+# クライアントを N 個同時に接続して、ボタンを押してから画面の更新が返るまでの時間を計る
+#
+#   python benchmarks/bench_calc_workers.py --workers 1 2 4 --sessions 100 --clicks 40
+import argparse
+import asyncio
+import json
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import websockets
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from jma_common.metrics import LatencyHistogram
+
+SERVE = ROOT / "calculator" / "serve.py"
+
+# 1 セッションで押すボタン (この順に繰り返す)
+KEYS = ("1", "2", "+", "3", "4", "*", "5", "=", "AC")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def register_message():
+    return json.dumps({"action": "registerWebClient", "payload": {
+        "pageName": "", "pageRoute": "/", "pageWidth": "1280", "pageHeight": "800",
+        "windowWidth": "1280", "windowHeight": "800", "windowTop": "0", "windowLeft": "0",
+        "isPWA": "false", "isWeb": "true", "isDebug": "false", "platform": "linux",
+        "platformBrightness": "light", "media": "{}", "sessionId": None,
+    }})
+
+
+# 受け取ったメッセージから追加されたコントロールを取り出す
+def added_controls(message):
+    if message["action"] == "addPageControls":
+        return message["payload"]["controls"]
+    if message["action"] == "pageControlsBatch":
+        return [c for m in message["payload"] for c in added_controls(m)]
+    return []
+
+
+async def session(port, clicks, histogram, rng):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws", max_size=None) as ws:
+        await ws.send(register_message())
+        buttons = {}
+        while len(buttons) < len(KEYS):
+            message = json.loads(await ws.recv())
+            for control in added_controls(message):
+                if control.get("t") == "elevatedbutton" and control.get("text") in KEYS:
+                    buttons[control["text"]] = control["i"]
+        await asyncio.sleep(rng.uniform(0, 0.5))
+        for i in range(clicks):
+            key = KEYS[i % len(KEYS)]
+            started = time.perf_counter()
+            await ws.send(json.dumps({"action": "pageEventFromWeb", "payload": {
+                "eventTarget": buttons[key], "eventName": "click", "eventData": ""}}))
+            while json.loads(await ws.recv())["action"] not in ("updateControlProps", "pageControlsBatch"):
+                pass
+            histogram.observe(time.perf_counter() - started)
+
+
+async def wait_listening(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("serve.py が終了しました")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.2)
+            continue
+        writer.close()
+        return
+    raise RuntimeError("serve.py が起動しませんでした")
+
+
+async def run(workers, sessions, clicks):
+    port, base_port = free_port(), free_port()
+    process = subprocess.Popen([
+        sys.executable, str(SERVE), "--workers", str(workers), "--host", "127.0.0.1",
+        "--port", str(port), "--base-port", str(base_port),
+    ], stdout=subprocess.DEVNULL)
+    try:
+        await wait_listening(port, process)
+        histogram = LatencyHistogram(f"workers={workers}")
+        rng = random.Random(0)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(session(port, clicks, histogram, random.Random(rng.random())) for _ in range(sessions)),
+            return_exceptions=True,
+        )
+        elapsed = time.perf_counter() - started
+        failed = sum(isinstance(r, Exception) for r in results)
+    finally:
+        stop_started = time.perf_counter()
+        process.send_signal(signal.SIGINT)
+        process.wait()
+        stopped = time.perf_counter() - stop_started
+
+    s = histogram.snapshot()
+    print(f"{workers:>3} ワーカー  {sessions} セッション (失敗 {failed})  "
+          f"{s['count'] / elapsed:8.1f} クリック/秒  p50 {s['p50_ms']:6.1f} ms  p95 {s['p95_ms']:6.1f} ms  "
+          f"p99 {s['p99_ms']:6.1f} ms  停止 {stopped:.1f} 秒")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--clicks", type=int, default=40, help="1 セッションあたりのクリック数")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        asyncio.run(run(workers, args.sessions, args.clicks))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# 求人クローラ (crawler) の巡回速度 (ページ/秒)
+# ローカルの求人サイトのスタブサーバ (crawler.fixture_server) を巡回して、ノートブックと同じ 1 ページずつの
+# requests.get と、同時取得数・1 ホストあたりの同時接続数を変えた crawler.pipeline を比べる。
+# 書き込んだ求人の件数がスタブの件数と一致すること、スタブが見た同時接続数が上限を超えないことも確かめる
+#
+#   python benchmarks/bench_crawler.py --pages 500 --latency 0.02 --fail-every 20
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crawler.fetch import Fetcher
+from crawler.fixture_server import run_fixture_server
+from crawler.listing_page import parse_listing_page
+from crawler.pipeline import Crawler
+from jobs import storage
+
+# (同時取得数, 1 ホストあたりの同時接続数)
+SETTINGS = ((1, 1), (4, 4), (16, 4), (16, 16))
+
+
+def count_listings(db):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute("SELECT count(*) FROM job_listings").fetchone()[0]
+    finally:
+        conn.close()
+
+
+# ノートブックと同じく 1 ページずつ requests.get して解析し、1 ページごとに書き込む
+def sequential(start_url, db):
+    storage.init_db(db)
+    queue, seen, pages = [start_url], {start_url}, 0
+    while queue:
+        url = queue.pop(0)
+        response = requests.get(url)
+        if response.status_code != 200:
+            queue.append(url)
+            continue
+        rows, links = parse_listing_page(url, response.text)
+        storage.insert_listings(rows, db_name=db)
+        pages += 1
+        for link in links:
+            if link not in seen:
+                seen.add(link)
+                queue.append(link)
+    storage.close_connections()
+    return pages
+
+
+def report(label, pages, elapsed, server, before, db, extra=""):
+    stats = server.stats()
+    listings = count_listings(db)
+    ok = listings == server.listings
+    print(f"{label:<22} {pages:>6} {elapsed:>8.2f} {pages / elapsed:>10.1f} "
+          f"{stats['requests'] - before['requests']:>6} {stats['max_active']:>6} {listings:>8} "
+          f"{'一致' if ok else '不一致'} {extra}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="スタブ側の応答遅延 (秒)")
+    parser.add_argument("--fail-every", type=int, default=20, help="n 回目ごとのリクエストを 503 にする (0 で無効)")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="crawler_bench_")
+    ok = True
+    print(f"{'方式':<22} {'ページ':>6} {'秒':>8} {'ページ/秒':>10} {'要求':>6} {'最大同時':>6} {'求人':>8}")
+    for settings in (None,) + SETTINGS:
+        with run_fixture_server(args.pages, args.per_page, args.latency, args.fail_every) as server:
+            start_url = f"{server.base_url}/jobs/1.html"
+            db = os.path.join(work, f"crawl_{len(os.listdir(work))}.db")
+            before = server.stats()
+            if settings is None:
+                started = time.perf_counter()
+                pages = sequential(start_url, db)
+                ok &= report("requests.get (逐次)", pages, time.perf_counter() - started, server, before, db)
+                continue
+            concurrency, per_host = settings
+            # スタブのサーバは同じホストなので、レート制限はかけずに同時接続数だけを変える
+            fetcher = Fetcher(concurrency, per_host, rate=0, backoff=0.01, seed=1)
+            crawler = Crawler(fetcher, db_name=db, workers=concurrency)
+            result = asyncio.run(crawler.run([start_url]))
+            fetcher.close()
+            stats = fetcher.stats()
+            ok &= not result.failed and server.stats()["max_active"] <= per_host
+            ok &= report(f"crawler {concurrency:>2} 並行/{per_host:>2} 接続", result.pages, result.duration,
+                         server, before, db, f"(やり直し {stats['retried']} 回)")
+    for name in os.listdir(work):
+        os.remove(os.path.join(work, name))
+    os.rmdir(work)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# 求人一覧ページの解析速度 (要 beautifulsoup4, lxml, selectolax)
+# 保存済みの一覧ページ (--corpus のディレクトリの *.html。省略時は crawler.fixture_server と同じページを作る) を
+# ノートブックと同じ BeautifulSoup(html, "html.parser") + item.find("span", class_=...) で解析する場合と、
+# crawler.listing_page (html.parser を直接使う) と crawler.extract (lxml / selectolax、スキーマから作った式) を比べる。
+# どれも同じ求人とリンクを返すことも確かめる
+#
+#   python benchmarks/bench_extract.py --pages 200 --repeat 3
+#   python benchmarks/bench_extract.py --corpus saved_pages/
+import argparse
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crawler.extract import make_extractor
+from crawler.fixture_server import build_pages
+from crawler.listing_page import parse_listing_page, parse_wages
+from jobs.storage import LISTING_COLUMNS
+
+
+# ノートブックと同じ書き方 (求人ごと・項目ごとに find で木をたどる)
+def soup_parser(features):
+    def parse(url, html):
+        soup = BeautifulSoup(html, features)
+        rows = []
+        for item in soup.find_all("div", class_="job"):
+            values = []
+            for name in LISTING_COLUMNS:
+                element = item.find("span", class_=name)
+                text = element.text.strip() if element is not None else None
+                values.append(parse_wages(text) if name == "wages" and text is not None else text)
+            rows.append(tuple(values))
+        links = [urljoin(url, a["href"]) for a in soup.find_all("a", class_="page") if a.get("href")]
+        return rows, links
+
+    return parse
+
+
+def load_corpus(directory, pages):
+    if directory:
+        paths = sorted(Path(directory).glob("*.html"))
+        return [(path.as_uri(), path.read_text(encoding="utf-8")) for path in paths]
+    return [(f"http://127.0.0.1/jobs/{number}.html", body.decode("utf-8"))
+            for number, body in build_pages(pages).items()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=None, help="保存済みの一覧ページ (*.html) のディレクトリ")
+    parser.add_argument("--pages", type=int, default=200, help="--corpus を省略したときに作るページ数")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.pages)
+    size = sum(len(html.encode("utf-8")) for _, html in corpus)
+    print(f"{len(corpus)} ページ ({size / 2**20:.1f} MB)\n")
+
+    parsers = [
+        ("BeautifulSoup html.parser", soup_parser("html.parser")),
+        ("BeautifulSoup lxml", soup_parser("lxml")),
+        ("listing_page (html.parser)", parse_listing_page),
+        ("extract lxml", make_extractor(backend="lxml").parse),
+        ("extract selectolax", make_extractor(backend="selectolax").parse),
+    ]
+    expected = None
+    same = True
+    print(f"{'解析':<28} {'ms/ページ':>10} {'ページ/秒':>10} {'求人':>8}")
+    for label, parse in parsers:
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results = [parse(url, html) for url, html in corpus]
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results = [([tuple(row) for row in rows], links) for rows, links in results]
+        if expected is None:
+            expected = results
+        same &= results == expected
+        listings = sum(len(rows) for rows, _ in results)
+        print(f"{label:<28} {best * 1000 / len(corpus):>10.2f} {len(corpus) / best:>10.0f} {listings:>8}")
+    print(f"\n結果: {'一致' if same else '不一致'}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# 予報履歴クエリ (jma_common.history) の性能計測
+# 数年分・約 1000 万行の合成 DB を作り、代表的な 3 種類の検索にかかる時間と実行計画を表示する
+#
+#   python benchmarks/bench_history.py --rows 10000000 --db /tmp/history.db
+#   (--db のファイルが既にあれば作り直さずに使う)
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jma_common import history, storage
+from jma_common.area_index import get_area_index
+from jma_common.forecast_cache import JST, PUBLISH_HOURS
+from jma_common.stub_server import WEATHERS, WINDS
+
+START = datetime(2015, 1, 1, tzinfo=JST)
+BATCH = 200_000
+
+
+def build(db, target_rows):
+    index = get_area_index()
+    offices = [(office.code, [a.code for a in index.children("offices", office.code)] or [office.code])
+               for office in index.all("offices")]
+    storage.init_db(db)
+    conn = storage.get_connection(db)
+    with conn:
+        conn.executemany("INSERT INTO offices (code, name) VALUES (?, ?)",
+                         [(o.code, o.name) for o in index.all("offices")])
+        conn.executemany("INSERT INTO forecast_areas (code, office_code, name) VALUES (?, ?, ?)",
+                         [(code, office, code) for office, codes in offices for code in codes])
+        conn.executemany("INSERT INTO weather_texts (id, text) VALUES (?, ?)",
+                         [(i + 1, text) for i, (_, text) in enumerate(WEATHERS)])
+        conn.executemany("INSERT INTO wind_texts (id, text) VALUES (?, ?)",
+                         [(i + 1, text) for i, text in enumerate(WINDS)])
+
+    rows = []
+    written = 0
+    report_id = 0
+    day = 0
+    while written < target_rows:
+        base = START + timedelta(days=day)
+        for hour in PUBLISH_HOURS:
+            report_time = int(base.replace(hour=hour).timestamp())
+            midnight = int(base.timestamp())
+            for office, codes in offices:
+                # daily: 細分区域ごとに 3 時点、weekly: 気象台の代表区域に 7 日分
+                for kind, times, areas in (
+                    ("daily", [report_time, midnight + 86400, midnight + 2 * 86400], codes),
+                    ("weekly", [midnight + d * 86400 for d in range(1, 8)], codes[:1]),
+                ):
+                    report_id += 1
+                    conn.execute("INSERT INTO reports (id, office_code, kind, report_time) VALUES (?, ?, ?, ?)",
+                                 (report_id, office, kind, report_time))
+                    for a, code in enumerate(areas):
+                        for t, forecast_time in enumerate(times):
+                            w = (day + hour + a + t) % len(WEATHERS)
+                            rows.append((code, forecast_time, report_id, int(WEATHERS[w][0]),
+                                         None if kind == "weekly" else w + 1,
+                                         None if kind == "weekly" else (w + t) % len(WINDS) + 1))
+        if len(rows) >= BATCH:
+            written += _flush(conn, rows)
+        day += 1
+        if day % 365 == 0:
+            print(f"  {day // 365} 年分 / {written:,} 行", flush=True)
+    written += _flush(conn, rows)
+    conn.commit()
+    conn.execute("ANALYZE")
+    return written, day
+
+
+def _flush(conn, rows):
+    conn.executemany(
+        "INSERT INTO weather_series (area_code, forecast_time, report_id, weather_code, weather_id, wind_id) "
+        "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    count = len(rows)
+    rows.clear()
+    return count
+
+
+def timed(label, run):
+    started = time.perf_counter()
+    count = sum(1 for _ in run())
+    print(f"{label:<32} {count:>8} 行  {(time.perf_counter() - started) * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "jma_history_bench.db"))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        started = time.perf_counter()
+        written, days = build(args.db, args.rows)
+        print(f"合成 DB: {written:,} 行 / {days} 日分 ({time.perf_counter() - started:.1f} 秒)")
+    conn = storage.get_connection(args.db)
+    total = conn.execute("SELECT COUNT(*) FROM weather_series").fetchone()[0]
+    last = conn.execute("SELECT MAX(report_time) FROM reports").fetchone()[0]
+    print(f"weather_series: {total:,} 行, {os.path.getsize(args.db) / 2**20:.0f} MiB")
+
+    end = datetime.fromtimestamp(last, JST).replace(hour=0)
+    start = end - timedelta(days=30)
+    target = int((end - timedelta(days=10)).timestamp())
+
+    timed("range (130000, 30 日)", lambda: history.forecasts_between("130000", start, end, conn=conn))
+    timed("latest_reports", lambda: history.latest_reports(conn))
+    timed("forecast_revisions (130010)", lambda: history.forecast_revisions("130010", target, conn))
+
+    for label, sql, params in (
+        ("range", "SELECT * FROM weather_series s JOIN forecast_areas a ON s.area_code = a.code "
+                  "WHERE a.office_code = ? AND s.forecast_time >= ? AND s.forecast_time < ?",
+         ("130000", 0, 1)),
+        ("latest", "SELECT id FROM reports WHERE office_code = ? AND kind = ? ORDER BY report_time DESC LIMIT 1",
+         ("130000", "daily")),
+        ("revisions", "SELECT * FROM weather_series WHERE area_code = ? AND forecast_time = ?", ("130010", 0)),
+    ):
+        plan = "; ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        print(f"  plan[{label}]: {plan}")
+    storage.close_connections()
+
+
+if __name__ == "__main__":
+    main()
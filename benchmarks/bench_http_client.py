@@ -0,0 +1,59 @@
+# 素の requests.get と共有 JmaClient (keep-alive + gzip + 条件付き GET) の比較
+# ローカルのスタブサーバに対して実行するのでネットワークは不要
+#
+#   python benchmarks/bench_http_client.py --rounds 5 --latency 0.005
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jma_common.area_index import get_area_index
+from jma_common.http_client import JmaClient
+from jma_common.stub_server import run_stub_server
+
+
+def bare_get(url):
+    response = requests.get(url, headers={"Accept-Encoding": "identity"})
+    response.raise_for_status()
+    return response.json()
+
+
+def run(label, fetch, urls, rounds, server):
+    before = server.stats()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for url in urls:
+            fetch(url)
+    elapsed = time.perf_counter() - started
+    after = server.stats()
+    count = rounds * len(urls)
+    print(
+        f"{label:<10} {count:>5} req  {elapsed * 1000 / count:7.2f} ms/req  "
+        f"{(after['bytes_sent'] - before['bytes_sent']) / 1024:9.1f} KiB  "
+        f"{after['connections'] - before['connections']:>5} conn  "
+        f"{after['not_modified'] - before['not_modified']:>5} 304"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="スタブ側の応答遅延 (秒)")
+    args = parser.parse_args()
+
+    offices = get_area_index().office_codes()
+    with run_stub_server(latency=args.latency) as server:
+        urls = [f"{server.base_url}/bosai/forecast/data/forecast/{code}.json" for code in offices]
+        urls.append(f"{server.base_url}/bosai/common/const/area.json")
+        run("requests", bare_get, urls, args.rounds, server)
+        client = JmaClient()
+        run("JmaClient", client.get_json, urls, args.rounds, server)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
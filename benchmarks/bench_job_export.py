@@ -0,0 +1,133 @@
+# 求人の Arrow / Parquet への書き出し (jobs.export) の性能計測 (要 pyarrow)
+# bench_job_search.py と同じ合成 DB (既定 100 万件) を書き出し、読み込みの時間と最大 RSS を
+# SQLite から全行を読む場合と比べる。読み込みは方式ごとに別プロセスで行い、読み込んだ後に
+# 雇用形態ごとの件数と賃金の平均を計算する (読み込んだだけで使わない場合との差も見る)。
+# 最後に求人を追加して、増えた分だけの書き出し (追記) の時間を計る
+#
+#   python benchmarks/bench_job_export.py --rows 1000000 --db /tmp/job_search.db --insert 10000
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_job_search import build
+from jobs import export, storage
+
+# このプロセスの最大 RSS (MB)。ru_maxrss は fork 元の値を引き継ぐことがあるので /proc から読む (Linux のみ)
+def max_rss_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+# SQLite から全行をタプルのリストとして読み、Python で集計する
+def load_sqlite(db):
+    conn = storage.get_connection(db)
+    rows = conn.execute("SELECT id, work_name, wages, office_name, office_place, employment_type FROM job_listings").fetchall()
+    loaded = time.perf_counter()
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(row[5], [0, 0, 0.0])
+        group[0] += 1
+        if row[2] is not None:
+            group[1] += 1
+            group[2] += row[2]
+    return len(rows), loaded, {key: (n, total / count if count else None) for key, (n, count, total) in groups.items()}
+
+
+# 書き出した part を読み、pyarrow で集計する
+def load_export(directory):
+    table = export.load(directory)
+    loaded = time.perf_counter()
+    grouped = table.group_by("employment_type").aggregate([("id", "count"), ("wages", "mean")])
+    result = {key: (n, mean) for key, n, mean in zip(*(grouped.column(name).to_pylist() for name in
+                                                         ("employment_type", "id_count", "wages_mean")))}
+    return table.num_rows, loaded, result
+
+
+# 子プロセスで 1 つの方式を計る
+def child(loader, source):
+    before = max_rss_mb()
+    started = time.perf_counter()
+    rows, loaded, result = load_sqlite(source) if loader == "sqlite" else load_export(source)
+    finished = time.perf_counter()
+    checksum = sum(n for n, _ in result.values())
+    print(f"{loader} {rows} {(loaded - started) * 1000:.1f} {(finished - started) * 1000:.1f} "
+          f"{max_rss_mb() - before:.1f} {checksum}")
+
+
+def measure(loader, source):
+    output = subprocess.run([sys.executable, __file__, "--child", loader, source],
+                            capture_output=True, text=True, check=True).stdout.split()
+    _, rows, load_ms, total_ms, rss, checksum = output
+    print(f"{loader:<8} {int(rows):>10,} {float(load_ms):>10.1f} {float(total_ms):>10.1f} {float(rss):>10.1f}")
+    return int(checksum)
+
+
+def timed(label, run):
+    started = time.perf_counter()
+    result = run()
+    print(f"{label:<36} {(time.perf_counter() - started) * 1000:9.1f} ms")
+    return result
+
+
+def size_mb(directory, extension):
+    return sum(os.path.getsize(path) for _, _, path in export.parts(directory) if path.endswith(extension)) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "job_search_bench.db"))
+    parser.add_argument("--insert", type=int, default=10_000, help="追記を計るために追加する求人の数")
+    parser.add_argument("--child", nargs=2, metavar=("LOADER", "SOURCE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    if not os.path.exists(args.db):
+        timed(f"合成 DB ({args.rows:,} 件)", lambda: build(args.db, args.rows))
+    conn = storage.get_connection(args.db)
+    print(f"job_listings: {conn.execute('SELECT count(*) FROM job_listings').fetchone()[0]:,} 件")
+    print(f"SQLite ファイル: {os.path.getsize(args.db) / 2**20:.1f} MB (索引を含む)")
+
+    work = tempfile.mkdtemp(prefix="job_export_")
+    arrow_dir, parquet_dir = os.path.join(work, "arrow"), os.path.join(work, "parquet")
+    try:
+        timed("Arrow IPC への書き出し", lambda: export.export(arrow_dir, "arrow", conn=conn))
+        timed("Parquet への書き出し", lambda: export.export(parquet_dir, "parquet", conn=conn))
+        print(f"Arrow IPC: {size_mb(arrow_dir, '.arrow'):.1f} MB, Parquet: {size_mb(parquet_dir, '.parquet'):.1f} MB\n")
+
+        print(f"{'方式':<8} {'行数':>10} {'読込 ms':>10} {'集計込 ms':>10} {'RSS 増 MB':>10}")
+        checksums = {measure("sqlite", args.db), measure("arrow", arrow_dir), measure("parquet", parquet_dir)}
+        print(f"集計結果の件数: {'一致' if len(checksums) == 1 else '不一致'}\n")
+
+        # 求人を追加し、増えた分だけを書き出す
+        rng = random.Random(1)
+        rows = conn.execute(
+            f"SELECT {', '.join(storage.LISTING_COLUMNS)} FROM job_listings ORDER BY id LIMIT 50000").fetchall()
+        last_id = conn.execute("SELECT max(id) FROM job_listings").fetchone()[0]
+        storage.insert_listings(rng.sample(rows, args.insert), conn=conn)
+        path, added = timed(f"{args.insert:,} 件の追記 (Arrow IPC)", lambda: export.export(arrow_dir, "arrow", conn=conn))
+        table = export.load(arrow_dir)
+        same = added == args.insert and table.num_rows == conn.execute("SELECT count(*) FROM job_listings").fetchone()[0]
+        print(f"{os.path.basename(path)}: {added:,} 件, 合計 {table.num_rows:,} 件 ({'一致' if same else '不一致'})")
+        with conn:
+            conn.execute("DELETE FROM job_listings WHERE id > ?", (last_id,))
+    finally:
+        shutil.rmtree(work)
+        storage.close_connections()
+    sys.exit(0 if same and len(checksums) == 1 else 1)
+
+
+if __name__ == "__main__":
+    main()
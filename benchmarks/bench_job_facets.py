@@ -0,0 +1,95 @@
+# 都道府県・雇用形態ごとの求人の集計 (jobs.facets) の性能計測
+# bench_job_search.py と同じ合成 DB (既定 100 万件) で、集計表と索引を作る時間、全件を読み直して集計する場合と
+# 集計表から読む場合の時間、求人を追加した後の refresh() (変わった組だけの計算し直し) の時間を比べる。
+# 集計表の値が全件から計算した値と一致することも確かめる
+#
+#   python benchmarks/bench_job_facets.py --rows 1000000 --db /tmp/job_search.db --insert 1000
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_job_search import build
+from jobs import facets, storage
+
+
+def timed(label, run):
+    started = time.perf_counter()
+    result = run()
+    print(f"{label:<36} {(time.perf_counter() - started) * 1000:9.1f} ms")
+    return result
+
+
+# 全件を読み直して集計する (集計表を使わない場合)
+def full_scan(conn):
+    groups = {}
+    for place, employment_type, wages in conn.execute("SELECT office_place, employment_type, wages FROM job_listings"):
+        key = ((place or "")[:3], (employment_type or "").strip(" 　"))
+        groups.setdefault(key, []).append(wages)
+    result = {}
+    for key, values in groups.items():
+        wages = [w for w in values if w is not None]
+        result[key] = (len(values), len(wages), min(wages, default=None), max(wages, default=None),
+                       statistics.median(wages) if wages else None)
+    return result
+
+
+def from_facets(conn):
+    return {(facets.place_of(f.prefecture), f.employment_type): tuple(f[2:]) for f in facets.facets(conn=conn)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "job_search_bench.db"))
+    parser.add_argument("--insert", type=int, default=1000, help="追加する求人の数")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        timed(f"合成 DB ({args.rows:,} 件)", lambda: build(args.db, args.rows))
+    conn = storage.get_connection(args.db)
+    total = conn.execute("SELECT count(*) FROM job_listings").fetchone()[0]
+    print(f"job_listings: {total:,} 件")
+    if conn.execute("PRAGMA user_version").fetchone()[0] < storage.SCHEMA_VERSION:
+        timed("索引・集計表の作成 (init_db)", lambda: storage.init_db(args.db))
+        timed("最初の refresh()", lambda: facets.refresh(conn=conn))
+
+    expected = timed("全件を読み直して集計", lambda: full_scan(conn))
+    actual = timed("集計表から読む (facets)", lambda: from_facets(conn))
+    same = expected == actual
+    print(f"{len(actual)} 組, {'一致' if same else '不一致'}\n")
+
+    # 求人を追加し、変わった組だけを計算し直す
+    rng = random.Random(1)
+    rows = conn.execute(
+        f"SELECT {', '.join(storage.LISTING_COLUMNS)} FROM job_listings ORDER BY id LIMIT 50000").fetchall()
+    added = [list(row) for row in rng.sample(rows, args.insert)]
+    for row in added:
+        if row[1] is not None:
+            row[1] += rng.randrange(-5000, 5000)
+    last_id = conn.execute("SELECT max(id) FROM job_listings").fetchone()[0]
+    timed(f"{args.insert:,} 件の追加 (トリガー込み)", lambda: storage.insert_listings(added, conn=conn))
+    dirty = conn.execute("SELECT count(*) FROM job_facets WHERE dirty").fetchone()[0]
+    timed(f"refresh() ({dirty} 組)", lambda: facets.refresh(conn=conn))
+    timed("集計表から読む (facets)", lambda: facets.facets(conn=conn))
+    same &= full_scan(conn) == from_facets(conn)
+
+    # 追加した行を消して元に戻す (削除の後の refresh())
+    with conn:
+        conn.execute("DELETE FROM job_listings WHERE id > ?", (last_id,))
+    dirty = conn.execute("SELECT count(*) FROM job_facets WHERE dirty").fetchone()[0]
+    timed(f"削除後の refresh() ({dirty} 組)", lambda: facets.refresh(conn=conn))
+    same &= full_scan(conn) == from_facets(conn)
+    print(f"追加・削除の後も {'一致' if same else '不一致'}")
+    storage.close_connections()
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# 求人の全文検索 (jobs.search) と LIKE '%…%' の全件走査の比較
+# job_listings.db の行を元に約 100 万件の合成 DB を作り、trigram 索引の作成時間・大きさと、
+# 代表的な検索語での 1 ページ目 (件数を含む) の応答時間を比べる。両者の結果の id が一致することも確かめる
+#
+#   python benchmarks/bench_job_search.py --rows 1000000 --db /tmp/job_search.db
+#   (--db のファイルが既にあれば作り直さずに使う)
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jobs import search, storage
+
+SOURCE_DB = Path(__file__).resolve().parent.parent / "job_listings.db"
+
+# 3 文字以上の語、2 文字の語 (LIKE で絞り込む)、両方の組み合わせ、ほとんど当たらない語
+QUERIES = ["自衛官募集", "介護職員", "株式会社", "営業事務 未経験", "介護", "看護 正社員", "ドライバー 大型", "該当なし語句"]
+
+BATCH = 100_000
+
+
+# 元の行の職種名・事業所名に番号を付けて rows 件に増やす
+def build(db, rows):
+    source = sqlite3.connect(SOURCE_DB)
+    originals = source.execute(f"SELECT {', '.join(storage.LISTING_COLUMNS)} FROM job_listings").fetchall()
+    source.close()
+    conn = storage.get_connection(db)
+    conn.executescript(storage.SCHEMA)
+    rng = random.Random(0)
+    batch = []
+    for i in range(rows):
+        work_name, wages, office_name, office_place, employment_type = rng.choice(originals)
+        batch.append((f"{work_name}（{i % 997}）", wages, f"{office_name} {i % 4999}号店", office_place, employment_type))
+        if len(batch) >= BATCH:
+            storage.insert_listings(batch, conn=conn)
+            batch.clear()
+    storage.insert_listings(batch, conn=conn)
+
+
+def timed(run, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+# LIKE で全件を走査する従来の検索 (件数と id 順の 1 ページ目)
+def like_search(conn, query, per_page):
+    terms = search.split_terms(query)
+    where = " AND ".join(["(work_name LIKE ? ESCAPE '\\' OR office_name LIKE ? ESCAPE '\\')"] * len(terms))
+    params = [p for term in terms for p in [search._like_pattern(term)] * 2]
+    total = conn.execute(f"SELECT count(*) FROM job_listings WHERE {where}", params).fetchone()[0]
+    rows = conn.execute(f"SELECT id FROM job_listings WHERE {where} ORDER BY id LIMIT ?", params + [per_page]).fetchall()
+    return total, rows
+
+
+def like_ids(conn, query):
+    terms = search.split_terms(query)
+    where = " AND ".join(["(work_name LIKE ? ESCAPE '\\' OR office_name LIKE ? ESCAPE '\\')"] * len(terms))
+    params = [p for term in terms for p in [search._like_pattern(term)] * 2]
+    return {row[0] for row in conn.execute(f"SELECT id FROM job_listings WHERE {where}", params)}
+
+
+def search_ids(conn, query, total):
+    return {listing.id for listing in search.search(query, per_page=max(total, 1), conn=conn).listings}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "job_search_bench.db"))
+    parser.add_argument("--per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        started = time.perf_counter()
+        build(args.db, args.rows)
+        print(f"合成 DB: {args.rows:,} 件 ({time.perf_counter() - started:.1f} 秒)")
+    conn = storage.get_connection(args.db)
+    total = conn.execute("SELECT count(*) FROM job_listings").fetchone()[0]
+    size = os.path.getsize(args.db)
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] < storage.SCHEMA_VERSION:
+        started = time.perf_counter()
+        storage.init_db(args.db)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"索引の作成: {time.perf_counter() - started:.1f} 秒, "
+              f"{size / 2**20:.0f} MiB → {os.path.getsize(args.db) / 2**20:.0f} MiB")
+    print(f"job_listings: {total:,} 件, {os.path.getsize(args.db) / 2**20:.0f} MiB\n")
+
+    # 追加時の索引の同期 (トリガー) の費用 (追加した行は消しておく)
+    rows = conn.execute(
+        f"SELECT {', '.join(storage.LISTING_COLUMNS)} FROM job_listings ORDER BY id LIMIT 10000").fetchall()
+    conn.execute("CREATE TEMP TABLE plain AS SELECT * FROM job_listings WHERE 0")
+    started = time.perf_counter()
+    with conn:
+        conn.executemany(f"INSERT INTO plain ({', '.join(storage.LISTING_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", rows)
+    plain = time.perf_counter() - started
+    last_id = conn.execute("SELECT max(id) FROM job_listings").fetchone()[0]
+    started = time.perf_counter()
+    storage.insert_listings(rows, conn=conn)
+    synced = time.perf_counter() - started
+    with conn:
+        conn.execute("DELETE FROM job_listings WHERE id > ?", (last_id,))
+    print(f"{len(rows):,} 件の追加: 索引なし {plain * 1000:.0f} ms, 索引の同期あり {synced * 1000:.0f} ms\n")
+
+    print(f"{'検索語':<16} {'件数':>9} {'LIKE':>10} {'全文検索':>10} {'倍':>7}  結果")
+    failed = False
+    for query in QUERIES:
+        (like_total, _), like_time = timed(lambda: like_search(conn, query, args.per_page))
+        result, search_time = timed(lambda: search.search(query, per_page=args.per_page, conn=conn))
+        same = like_total == result.total and like_ids(conn, query) == search_ids(conn, query, result.total)
+        failed |= not same
+        print(f"{query:<16} {result.total:>9,} {like_time * 1000:8.1f}ms {search_time * 1000:8.1f}ms "
+              f"{like_time / search_time:7.1f}  {'一致' if same else '不一致'}")
+    storage.close_connections()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# 多数のセッションを同時に動かしたときのメモリ量と応答時間 (要 flet)
+# ブラウザの代わりに ForecastSession を N 個作り、各セッションが地域をランダムに選び続ける。
+# 予報はローカルのスタブサーバから取得するのでネットワークは不要
+#
+#   python benchmarks/bench_sessions.py --sessions 200 --selects 10 --latency 0.05
+#   python benchmarks/bench_sessions.py --isolated   # セッションごとにインデックスとキャッシュを持つ場合 (比較用)
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jma_common.area_index import get_area_index, load_bundled_index
+from jma_common.forecast_cache import ForecastCache
+from jma_common.http_client import JmaClient
+from jma_common.metrics import select_latency
+from jma_common.session import ForecastSession
+from jma_common.stub_server import run_stub_server
+
+
+async def drive(session, offices, selects, think, rng):
+    for _ in range(selects):
+        await asyncio.sleep(rng.uniform(0, think))
+        await session.select(rng.choice(offices))
+
+
+async def run(args, server):
+    client = JmaClient()
+
+    def fetch_from_stub(area_code):
+        try:
+            return client.get_json(f"{server.base_url}/bosai/forecast/data/forecast/{area_code}.json")
+        except Exception as e:
+            print(f"天気予報の取得中にエラーが発生しました: {e}")
+            return None
+
+    shared_index = get_area_index()
+    shared_cache = ForecastCache(fetch=fetch_from_stub)
+    offices = [shared_index.get("offices", code) for code in shared_index.office_codes()]
+    updates = [0]
+
+    def update():
+        updates[0] += 1
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    caches = []
+    sessions = []
+    for _ in range(args.sessions):
+        if args.isolated:
+            index = load_bundled_index()
+            cache = ForecastCache(fetch=fetch_from_stub)
+        else:
+            index, cache = shared_index, shared_cache
+        caches.append(cache)
+        sessions.append(ForecastSession(update=update, index=index, fetch=cache.get, store=None))
+    built = tracemalloc.get_traced_memory()[0]
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        drive(session, offices, args.selects, args.think, random.Random(rng.random()))
+        for session in sessions
+    ))
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    client.close()
+
+    n = args.sessions
+    stats = select_latency.snapshot()
+    upstream = server.stats()
+    hits = sum(c.stats()["hits"] for c in {id(c): c for c in caches}.values())
+    print(f"モード: {'セッションごとに保持' if args.isolated else 'プロセスで共有'}  {n} セッション x {args.selects} 回選択")
+    print(f"メモリ/セッション: 作成直後 {(built - baseline) / n / 1024:.1f} KiB, "
+          f"実行後 {(current - baseline) / n / 1024:.1f} KiB (ピーク合計 {(peak - baseline) / 2**20:.1f} MiB)")
+    print(f"選択→描画: p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+          f"p99 {stats['p99_ms']:.1f} ms, 最大 {stats['max_ms']:.1f} ms ({stats['count']} 回, {elapsed:.1f} 秒)")
+    print(f"上流へのリクエスト: {upstream['requests']} 回 (キャッシュヒット {hits} 回), page.update: {updates[0]} 回")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--selects", type=int, default=10, help="1 セッションあたりの地域選択回数")
+    parser.add_argument("--think", type=float, default=0.2, help="選択の間隔の最大値 (秒)")
+    parser.add_argument("--latency", type=float, default=0.05, help="スタブ側の応答遅延 (秒)")
+    parser.add_argument("--isolated", action="store_true")
+    args = parser.parse_args()
+
+    with run_stub_server(latency=args.latency) as server:
+        asyncio.run(run(args, server))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# 各アプリの起動時の import 時間 (python -X importtime)
+# エントリポイントの先頭にある import 文だけを別プロセスで実行し、import にかかった時間と
+# 時間のかかっているモジュールを表示する。--budget を超えたアプリがあれば終了コード 1 を返す
+#
+#   python benchmarks/bench_startup.py --runs 5 --budget 400
+#
+# 起動から最初の page.update() までの時間は各アプリが起動時に表示する
+import argparse
+import ast
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+APPS = (
+    "calculator/calc.py",
+    "calculator/calc_sakurako.py",
+    "counter/main.py",
+    "jma/main.py",
+    "jma2/main.py",
+)
+
+
+# モジュール直下の import 文だけを取り出す (main() や関数の中の遅延 import は含めない)
+def top_level_imports(path):
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+# importtime の出力を {モジュール名: (self, cumulative, 深さ)} (マイクロ秒) にする
+def parse_importtime(stderr):
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def run_importtime(code, cwd=ROOT):
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, capture_output=True, text=True)
+
+
+# インタプリタの起動時 (site など) に読み込まれるモジュール。アプリの import 時間からは除く
+def startup_modules():
+    return set(parse_importtime(run_importtime("pass").stderr))
+
+
+def measure(app, runs, baseline):
+    code = f"import sys; sys.path.insert(0, {str(ROOT)!r})\n" + top_level_imports(ROOT / app)
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        result = run_importtime(code, cwd=ROOT / app.split("/")[0])
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        modules = {k: v for k, v in parse_importtime(result.stderr).items() if k not in baseline}
+        totals.append(sum(c for _, c, depth in modules.values() if depth == 0))
+    return statistics.median(totals) / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="表示する重いモジュールの数")
+    parser.add_argument("--budget", type=float, default=400.0, help="import 時間の上限 (ms)")
+    args = parser.parse_args()
+
+    baseline = startup_modules()
+    over = []
+    for app in APPS:
+        total_ms, modules = measure(app, args.runs, baseline)
+        if total_ms is None:
+            print(f"{app:<30} 計測できません: {modules}")
+            continue
+        mark = "  (予算超過)" if total_ms > args.budget else ""
+        print(f"{app:<30} {total_ms:8.1f} ms{mark}")
+        heavy = sorted(
+            ((name, c) for name, (_, c, depth) in modules.items() if depth <= 1),
+            key=lambda item: item[1], reverse=True,
+        )
+        for name, cumulative in heavy[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        if mark:
+            over.append(app)
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
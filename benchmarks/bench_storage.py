@@ -0,0 +1,87 @@
+# 予報データの DB 書き込み性能の比較
+# legacy: 呼び出しごとに接続を開き、1 行ずつ execute (以前の jma2 の実装)
+# current: jma_common.storage (スレッドごとの接続 + WAL + executemany + upsert, 全 timeSeries を保存)
+# 同じ予報を繰り返し保存するので、current 側は行数が増えない
+#
+#   python benchmarks/bench_storage.py -n 2000
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jma_common import storage
+from jma_common.area_index import get_area_index
+from jma_common.stub_server import sample_forecast
+
+
+def legacy_init(db_name):
+    conn = sqlite3.connect(db_name)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS forecasts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        area_id INTEGER,
+        report_datetime TEXT,
+        forecast_time TEXT,
+        weather TEXT,
+        wind TEXT
+    )''')
+    conn.commit()
+    conn.close()
+
+
+def legacy_insert(db_name, area_id, forecast_data):
+    conn = sqlite3.connect(db_name)
+    cur = conn.cursor()
+    report_datetime = forecast_data[0]["reportDatetime"]
+    time_series = forecast_data[0]["timeSeries"][0]
+    time_defines = time_series["timeDefines"]
+    areas = time_series["areas"]
+
+    for area in areas:
+        for i, time_define in enumerate(time_defines):
+            weather = area["weathers"][i]
+            wind = area["winds"][i] if i < len(area["winds"]) else "情報なし"
+            cur.execute('''
+            INSERT INTO forecasts (area_id, report_datetime, forecast_time, weather, wind)
+            VALUES (?, ?, ?, ?, ?)''', (area_id, report_datetime, time_define, weather, wind))
+    conn.commit()
+    conn.close()
+
+
+def run(label, insert, payloads):
+    started = time.perf_counter()
+    for code, data in payloads:
+        insert(code, data)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} {len(payloads)} 件  {elapsed:7.3f} 秒  {len(payloads) / elapsed:9.1f} 件/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=1000, help="書き込む予報データの数")
+    args = parser.parse_args()
+
+    offices = get_area_index().office_codes()
+    samples = {code: sample_forecast(code) for code in offices}
+    payloads = [(offices[i % len(offices)], samples[offices[i % len(offices)]]) for i in range(args.n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = str(Path(tmp) / "legacy.db")
+        current_db = str(Path(tmp) / "current.db")
+        legacy_init(legacy_db)
+        storage.init_db(current_db)
+
+        run("legacy", lambda code, data: legacy_insert(legacy_db, code, data), payloads)
+        run("current", lambda code, data: storage.insert_forecast_data(code, data, current_db), payloads)
+        for label, db, table in (("legacy", legacy_db, "forecasts"), ("current", current_db, "weather_series")):
+            rows = sqlite3.connect(db).execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            print(f"{label:<8} {rows} 行 ({table})")
+        storage.close_connections()
+
+
+if __name__ == "__main__":
+    main()
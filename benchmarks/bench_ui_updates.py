@@ -0,0 +1,181 @@
+# 画面の更新のまとめ方 (calculator/ui_updates.py) ごとの更新回数と送信量
+# Flet のページを送信量を数えるだけの接続につなぎ、電卓 (calc_sakurako.py) とカウンター (counter/main.py) の
+# ボタンを押して、1 操作あたりの request() の回数 (ベンチマークから数えられる UpdateBatcher のみ)・page.update() の回数・
+# 送信メッセージ数・バイト数・時間を比べる
+#   従来 (update ×2)  : 変更前の電卓 (クリックごとに電卓全体を 2 回 update)
+#   update ×1         : 電卓全体を 1 回 update
+#   UpdateBatcher     : 変更した部品だけを登録し、イベントループの 1 回ごとにまとめて更新
+# --burst を指定すると、その回数のクリックが 1 回のループの間に届いた場合 (連打) も計る
+#
+#   python benchmarks/bench_ui_updates.py --clicks 5000 --burst 5
+#   python benchmarks/bench_ui_updates.py --max-bytes 120   # UpdateBatcher の電卓の送信量の上限 (超えたら失敗)
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "calculator"))
+
+import flet as ft
+from flet_core.local_connection import LocalConnection
+from flet_core.protocol import ClientActions, ClientMessage, CommandEncoder, PageCommandsBatchResponsePayload
+
+from calc_engine import KEYS
+from calc_sakurako import CalculatorApp
+from ui_updates import UpdateBatcher, UpdateStats
+
+
+# 送信する内容を JSON にして大きさを数えるだけの接続 (flet_runtime の FletSocketServer と同じ形で送る)
+class MeteredConnection(LocalConnection):
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        self.batches = 0
+        self.messages = 0
+        self.bytes = 0
+
+    def _send(self, message):
+        self.messages += 1
+        self.bytes += len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")).encode())
+
+    def send_command(self, session_id, command):
+        result, message = self._process_command(command)
+        if message:
+            self._send(message)
+        return SimpleNamespace(result=result, error="")
+
+    def send_commands(self, session_id, commands):
+        self.batches += 1
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ["add", "get"]:
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            self._send(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+
+# 変更前の電卓 (クリックごとに self.update() を 2 回)
+class DoubleUpdateCalculatorApp(CalculatorApp):
+    def refresh(self, *controls):
+        self.update()
+        self.update()
+
+
+def click(data):
+    return SimpleNamespace(control=SimpleNamespace(data=data))
+
+
+# burst 回のクリックごとにイベントループを 1 回まわす
+def run_clicks(loop, handler, events, burst):
+    for i in range(0, len(events), burst):
+        for event in events[i:i + burst]:
+            handler(event)
+        loop.run_until_complete(asyncio.sleep(0))
+
+
+def measure(label, build, events, burst):
+    loop = asyncio.new_event_loop()
+    conn = MeteredConnection()
+    page = ft.Page(conn, "bench", loop)
+    stats = UpdateStats()
+    handler = build(page, stats)
+    loop.run_until_complete(asyncio.sleep(0))
+    conn.reset()
+    stats.reset()
+
+    started = time.perf_counter()
+    run_clicks(loop, handler, events, burst)
+    elapsed = time.perf_counter() - started
+    loop.close()
+
+    count = len(events)
+    print(
+        f"{label:<24} {f'{stats.requests / count:.2f}' if stats.requests else '-':>8} {conn.batches / count:8.2f} {conn.messages / count:8.2f} {conn.bytes / count:10.1f}"
+        f" {elapsed / count * 1e6:10.1f}"
+    )
+    return conn.bytes / count
+
+
+def calculator(app_class, batched):
+    def build(page, stats):
+        app = app_class(UpdateBatcher(page, stats) if batched else None)
+        page.add(app)
+        return app.button_clicked
+    return build
+
+
+def load_counter():
+    spec = importlib.util.spec_from_file_location("counter_main", ROOT / "counter" / "main.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# 変更前のカウンター (クリックごとに page.update())
+def counter_page_update(page, stats):
+    txt_number = ft.TextField(value="0", text_align=ft.TextAlign.RIGHT, width=100)
+
+    def plus_click(e):
+        txt_number.value = str(int(txt_number.value) + 1)
+        page.update()
+
+    page.add(ft.Row([ft.IconButton(ft.icons.REMOVE), txt_number, ft.IconButton(ft.icons.ADD, on_click=plus_click)]))
+    return plus_click
+
+
+# counter/main.py の main をそのまま使い、+ ボタンの on_click を取り出す
+def counter_batched(counter):
+    def build(page, stats):
+        with contextlib.redirect_stdout(io.StringIO()):  # 起動時間の表示を抑える
+            counter.main(page)
+        row = page.controls[0]
+        return row.controls[2].on_click
+    return build
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=5000)
+    parser.add_argument("--burst", type=int, default=5, help="1 回のループの間に届くクリックの数 (連打)")
+    parser.add_argument("--max-bytes", type=float, default=None, help="UpdateBatcher の電卓の 1 クリックあたりの送信量の上限")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    keys = [rng.choice(KEYS) for _ in range(args.clicks)]
+    events = [click(key) for key in keys]
+    counter = load_counter()
+
+    batched_bytes = None
+    for burst in sorted({1, args.burst}):
+        print(f"\n1 回のループに {burst} クリック   (1 クリックあたり)")
+        print(f"{'':<24} {'request':>8} {'update':>8} {'送信数':>6} {'バイト':>8} {'µs':>10}")
+        measure("電卓 従来 (update ×2)", calculator(DoubleUpdateCalculatorApp, False), events, burst)
+        measure("電卓 update ×1", calculator(CalculatorApp, False), events, burst)
+        size = measure("電卓 UpdateBatcher", calculator(CalculatorApp, True), events, burst)
+        if burst == 1:
+            batched_bytes = size
+        measure("カウンター page.update()", counter_page_update, events, burst)
+        measure("カウンター UpdateBatcher", counter_batched(counter), events, burst)
+
+    if args.max_bytes is not None and batched_bytes > args.max_bytes:
+        print(f"\n送信量が上限を超えています: {batched_bytes:.1f} > {args.max_bytes} バイト/クリック")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
+import time
+
+# reference point for the time to the first page.update()
+STARTED = time.perf_counter()
+
 import flet as ft
 
+from calc_history import CalculationHistory
+from ui_updates import report_first_update
+
 
 class CalcButton(ft.ElevatedButton):
     def __init__(self, text, button_clicked, expand=1):
@@ -36,6 +44,8 @@ class CalculatorApp(ft.Container):
     def __init__(self):
         super().__init__()
         self.reset()
+        # recent results and the optional logs (see calc_history.py); reset() keeps them
+        self.history = CalculationHistory("calc")
 
         self.result = ft.Text(value="0", color=ft.colors.WHITE, size=20)
         self.width = 350
@@ -95,7 +105,6 @@ class CalculatorApp(ft.Container):
 
     def button_clicked(self, e):
         data = e.control.data
-        print(f"Button clicked with data = {data}")
         if self.result.value == "Error" or data == "AC":
             self.result.value = "0"
             self.reset()
@@ -137,6 +146,7 @@ class CalculatorApp(ft.Container):
                     self.format_number(abs(float(self.result.value)))
                 )
 
+        self.history.record(data, self.result.value)
         self.update()
 
     def format_number(self, num):
@@ -175,6 +185,7 @@ def main(page: ft.Page):
 
     # add application's root control to the page
     page.add(calc)
+    report_first_update(STARTED)
 
 
 ft.app(target=main)
@@ -0,0 +1,79 @@
+# 電卓の単項演算 (sin, cos, tan, ln, e^x, x^2, x^3, 1/x, 10^x, %) を NumPy 配列にまとめて適用する
+# (一括変換用。電卓アプリ本体は numpy を使わないので、requirements.txt (Docker イメージ) には入れていない。
+#  使うときは pip install numpy)
+#
+# 結果は (値の配列, エラーの配列) で返す。エラーの配列は電卓で "Error" と表示される要素が True で、
+# その要素の値は nan にする。エラーになる条件は CalculatorEngine と同じ:
+#   ln     : 0 以下
+#   1/x    : 0
+#   sin など: ±inf (math.sin が ValueError を出す)
+#   e^x, x^2, x^3, 10^x: 有限の入力で結果が桁あふれする (math.exp / math.pow が OverflowError を出す)
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise ModuleNotFoundError(
+        "calc_batch には numpy が必要です (pip install numpy)。電卓アプリ本体は numpy なしで動きます", name="numpy"
+    ) from e
+
+OPERATIONS = ("sin", "cos", "tan", "ln", "e^x", "x^2", "x^3", "1/x", "10^x", "%")
+
+
+def _trig(function):
+    def apply(x, out):
+        np.radians(x, out=out)
+        function(out, out=out)
+        return np.isinf(x)
+    return apply
+
+
+def _ln(x, out):
+    error = x <= 0
+    np.log(x, out=out, where=~error)
+    return error
+
+
+def _overflowing(function):
+    def apply(x, out):
+        function(x, out)
+        return np.isinf(out) & np.isfinite(x)
+    return apply
+
+
+def _reciprocal(x, out):
+    error = x == 0
+    np.divide(1.0, x, out=out, where=~error)
+    return error
+
+
+def _percent(x, out):
+    np.divide(x, 100, out=out)
+    return np.zeros(x.shape, dtype=bool)
+
+
+_APPLY = {
+    "sin": _trig(np.sin),
+    "cos": _trig(np.cos),
+    "tan": _trig(np.tan),
+    "ln": _ln,
+    "e^x": _overflowing(lambda x, out: np.exp(x, out=out)),
+    "x^2": _overflowing(lambda x, out: np.square(x, out=out)),
+    "x^3": _overflowing(lambda x, out: np.power(x, 3.0, out=out)),
+    "1/x": _reciprocal,
+    "10^x": _overflowing(lambda x, out: np.power(10.0, x, out=out)),
+    "%": _percent,
+}
+
+
+# values に op を適用して (結果, エラー) を返す
+# out に float64 の配列を渡すと結果をそこに書き込む (繰り返し呼ぶときに確保し直さない)
+def apply(op, values, out=None):
+    if op not in _APPLY:
+        raise ValueError(f"未対応の演算です: {op!r} (対応: {', '.join(OPERATIONS)})")
+    x = np.asarray(values, dtype=np.float64)
+    if out is None:
+        out = np.empty_like(x)
+    with np.errstate(all="ignore"):
+        error = _APPLY[op](x, out)
+    out[error] = np.nan
+    return out, error
@@ -0,0 +1,147 @@
+import math
+
+# 電卓の計算ロジック (Flet に依存しないので単体で import・テストできる)
+# キー ("7", "+", "sin", "=", ...) を 1 つずつ受け取り、表示する文字列を返す状態機械
+
+# キーの種類
+DIGIT_KEYS = ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", ".")
+OPERATOR_KEYS = ("+", "-", "*", "/")
+SCIENTIFIC_KEYS = ("sin", "cos", "tan", "ln", "e^x", "π", "x^2", "x^3", "1/x", "10^x")
+KEYS = ("AC", "+/-", "%", "=") + DIGIT_KEYS + OPERATOR_KEYS + SCIENTIFIC_KEYS
+
+
+# 浮動小数点数をフォーマットし、小数部が0の場合は整数として表示
+def format_number(num):
+    return int(num) if num % 1 == 0 else num
+
+
+# 基本的な四則演算 (+, -, *, /) を実行
+# 割り算の際にゼロ除算エラーを防ぐ処理を追加
+def calculate(operand1, operand2, operator):
+    if operator == "+":
+        return format_number(operand1 + operand2)
+    elif operator == "-":
+        return format_number(operand1 - operand2)
+    elif operator == "*":
+        return format_number(operand1 * operand2)
+    elif operator == "/":
+        return "Error" if operand2 == 0 else format_number(operand1 / operand2)
+
+
+# 科学計算 (引数は表示中の値)
+SCIENTIFIC = {
+    "sin": lambda value: format_number(math.sin(math.radians(value))),
+    "cos": lambda value: format_number(math.cos(math.radians(value))),
+    "tan": lambda value: format_number(math.tan(math.radians(value))),
+    "ln": lambda value: "Error" if value <= 0 else format_number(math.log(value)),
+    "e^x": lambda value: format_number(math.exp(value)),
+    "π": lambda value: format_number(math.pi),
+    "x^2": lambda value: format_number(math.pow(value, 2)),
+    "x^3": lambda value: format_number(math.pow(value, 3)),
+    "1/x": lambda value: "Error" if value == 0 else format_number(1 / value),
+    "10^x": lambda value: format_number(math.pow(10, value)),
+}
+
+
+# クラス: CalculatorEngine
+# 即時実行方式 (2+3*4 は左から順に計算) の電卓の状態
+# value は表示中の値で、入力途中は文字列、計算結果は int / float、エラー時は "Error"
+class CalculatorEngine:
+    # 数値の扱い (PreciseCalculatorEngine が decimal / fractions 用に差し替える)
+    to_number = float
+    calculate = staticmethod(calculate)
+    format_number = staticmethod(format_number)
+    scientific = SCIENTIFIC
+    percent = staticmethod(lambda number: number / 100)
+
+    def __init__(self):
+        self.value = "0"
+        self.reset()
+
+    # 表示する文字列
+    # 桁数が多すぎて文字列にできない整数 (Python の既定の上限は 4300 桁) は "Error" にする
+    @property
+    def display(self):
+        try:
+            return str(self.value)
+        except ValueError:
+            self.value = "Error"
+            return self.value
+
+    # キーを 1 つ処理して表示する文字列を返す
+    # "1.2." のように数値として読めない入力に演算子を押した場合や、計算できない場合は何も変えずに無視する
+    def press(self, key):
+        try:
+            # エラー状態やリセット時の処理
+            if self.value == "Error" or key == "AC":
+                self.value = "0"
+                self.reset()
+            else:
+                handler = _HANDLERS.get(key)
+                if handler is not None:
+                    handler(self, key)
+        except (TypeError, ValueError, ArithmeticError):
+            pass
+        return self.display
+
+    # キーの並びをまとめて処理して、最後の表示を返す
+    def feed(self, keys):
+        for key in keys:
+            self.press(key)
+        return self.display
+
+    # 数字入力の処理
+    def _digit(self, key):
+        if self.value == "0" or self.new_operand:
+            self.value = key
+            self.new_operand = False
+        else:
+            self.value += key
+
+    # 基本演算の処理 (+, -, *, /)
+    def _operator(self, key):
+        self.value = self.calculate(self.operand1, self.to_number(self.value), self.operator)
+        self.operator = key
+        if self.value == "Error":
+            self.operand1 = "0"
+        else:
+            self.operand1 = self.to_number(self.value)
+        self.new_operand = True
+
+    # 等号 (=) を押した際の処理
+    def _equals(self, key):
+        self.value = self.calculate(self.operand1, self.to_number(self.value), self.operator)
+        self.reset()
+
+    # パーセント (%) 計算
+    def _percent(self, key):
+        self.value = self.percent(self.to_number(self.value))
+        self.reset()
+
+    # +/- ボタン (符号の切り替え)
+    def _negate(self, key):
+        number = self.to_number(self.value)
+        if number > 0:
+            self.value = "-" + str(self.value)
+        elif number < 0:
+            self.value = str(self.format_number(abs(number)))
+
+    # 科学計算の処理
+    def _scientific(self, key):
+        try:
+            self.value = self.scientific[key](self.to_number(self.value))
+        except Exception:
+            self.value = "Error"
+
+    # 計算状態を初期化
+    def reset(self):
+        self.operator = "+"  # 初期演算子を "+" に設定
+        self.operand1 = 0    # 最初のオペランドを 0 に設定。
+        self.new_operand = True  # 新しいオペランドを受け付ける状態に設定
+
+
+# キーごとの処理 ("AC" とエラー状態からの復帰は press で先に扱う)
+_HANDLERS = {"=": CalculatorEngine._equals, "%": CalculatorEngine._percent, "+/-": CalculatorEngine._negate}
+_HANDLERS.update(dict.fromkeys(DIGIT_KEYS, CalculatorEngine._digit))
+_HANDLERS.update(dict.fromkeys(OPERATOR_KEYS, CalculatorEngine._operator))
+_HANDLERS.update(dict.fromkeys(SCIENTIFIC_KEYS, CalculatorEngine._scientific))
@@ -0,0 +1,277 @@
+import math
+import re
+from functools import lru_cache
+
+from calc_engine import format_number
+
+# 式入力モード
+# "2+3*4" のような式を字句解析・構文解析して Python のコードオブジェクトにコンパイルし、
+# ソース文字列ごとにキャッシュしておく (同じ式を評価し直すときは解析もコンパイルもしない)
+#
+# 文法 (優先順位の低い順)
+#   expr    := term (("+" | "-") term)*
+#   term    := unary (("*" | "/") unary | unary)*      2π や 2(3+4) は掛け算とみなす
+#   unary   := ("-" | "+") unary | power
+#   power   := postfix ("^" unary)?                    右結合 (2^3^2 = 2^9)、-2^2 = -(2^2)
+#   postfix := primary "%"*
+#   primary := 数値 | "π" | "e" | "ans" | 関数 "(" expr ")" | "(" expr ")"
+# 式の末尾で閉じていない括弧は閉じたものとみなす ("sin(30" は "sin(30)")
+
+# コンパイル済みの式を覚えておく数
+CACHE_SIZE = 1024
+
+# 括弧・関数・符号・指数の入れ子の深さの上限 (パーサは再帰するので、深すぎる式は RecursionError になる前に断る)
+MAX_DEPTH = 50
+
+TOKEN = re.compile(r"\s*(?:(\d+\.?\d*|\.\d+)|(sin|cos|tan|ln|ans|π|e)|(.))")
+
+FUNCTIONS = ("sin", "cos", "tan", "ln")
+CONSTANTS = {"π": "_pi", "e": "_e", "ans": "ans"}
+
+
+# 式として解釈できないときの例外
+class ExpressionError(ValueError):
+    pass
+
+
+# 三角関数は度で受け取る (即時実行モードと同じ)
+def _sin(x):
+    return math.sin(math.radians(x))
+
+
+def _cos(x):
+    return math.cos(math.radians(x))
+
+
+def _tan(x):
+    return math.tan(math.radians(x))
+
+
+NAMESPACE = {
+    "__builtins__": {},
+    "_sin": _sin,
+    "_cos": _cos,
+    "_tan": _tan,
+    "_ln": math.log,  # 0 以下は ValueError
+    "_pow": math.pow,  # 桁あふれは OverflowError
+    "_pi": math.pi,
+    "_e": math.e,
+}
+
+
+# 式を (種類, 値) のトークン列にする
+def tokenize(source):
+    tokens = []
+    for match in TOKEN.finditer(source.rstrip()):
+        number, name, symbol = match.groups()
+        if number is not None:
+            if tokens and tokens[-1][0] == "num":
+                raise ExpressionError(f"数値の書き方が正しくありません: {tokens[-1][1]}{number}")
+            tokens.append(("num", number))
+        elif name is not None:
+            tokens.append(("func" if name in FUNCTIONS else "const", name))
+        elif symbol in "+-*/^%()":
+            tokens.append(("op", symbol))
+        else:
+            raise ExpressionError(f"使えない文字です: {symbol!r}")
+    return tokens
+
+
+# トークン列を Python の式 (文字列) に変換する再帰下降パーサ
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    # 入れ子を 1 段深くして parse を呼ぶ
+    def nested(self, parse):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ExpressionError(f"括弧や関数の入れ子が深すぎます (上限 {MAX_DEPTH})")
+        code = parse()
+        self.depth -= 1
+        return code
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("式が空です")
+        code = self.expr()
+        if self.pos < len(self.tokens):
+            raise ExpressionError(f"余分な {self.peek()[1]!r} があります")
+        return code
+
+    def expr(self):
+        code = self.term()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            op = self.take()[1]
+            code = f"{code} {op} {self.term()}"
+        return code
+
+    def term(self):
+        code = self.unary()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and value in "*/":
+                self.take()
+                code = f"{code} {value} {self.unary()}"
+            elif kind in ("num", "const", "func") or (kind, value) == ("op", "("):
+                code = f"{code} * {self.unary()}"
+            else:
+                return code
+
+    def unary(self):
+        kind, value = self.peek()
+        if kind == "op" and value in "+-":
+            self.take()
+            return f"({value}{self.nested(self.unary)})"
+        return self.power()
+
+    def power(self):
+        code = self.postfix()
+        if self.peek() == ("op", "^"):
+            self.take()
+            code = f"_pow({code}, {self.nested(self.unary)})"
+        return code
+
+    def postfix(self):
+        code = self.primary()
+        while self.peek() == ("op", "%"):
+            self.take()
+            code = f"({code} / 100)"
+        return code
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "num":
+            number = float(value)
+            if not math.isfinite(number):
+                raise ExpressionError(f"数値が大きすぎます: {value[:10]}… ({len(value)} 桁)")
+            return repr(number)
+        if kind == "const":
+            return CONSTANTS[value]
+        if kind == "func":
+            if self.take() != ("op", "("):
+                raise ExpressionError(f"{value} の後には ( が必要です")
+            return f"_{value}({self.group()})"
+        if (kind, value) == ("op", "("):
+            return f"({self.group()})"
+        raise ExpressionError("式が途中で終わっています" if kind is None else f"{value!r} の位置が正しくありません")
+
+    # "(" の後の式と ")" (式の末尾なら省略可)
+    def group(self):
+        code = self.nested(self.expr)
+        kind, value = self.take()
+        if kind is not None and (kind, value) != ("op", ")"):
+            raise ExpressionError(") が必要です")
+        return code
+
+
+# コンパイル済みの式
+class CompiledExpression:
+    def __init__(self, source, python_source):
+        self.source = source
+        self.python_source = python_source
+        try:
+            self.code = compile(python_source, "<expression>", "eval")
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise ExpressionError(f"式が複雑すぎます: {e}")
+
+    # 式を評価して表示する値 (int / float) を返す。計算できないときは "Error"
+    def evaluate(self, ans=0):
+        try:
+            value = eval(self.code, NAMESPACE, {"ans": ans})
+        except (ArithmeticError, ValueError, RecursionError, MemoryError):
+            return "Error"
+        if not math.isfinite(value):
+            return "Error"
+        return format_number(value)
+
+
+# 式をコンパイルする (ソース文字列ごとにキャッシュ)
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(source):
+    return CompiledExpression(source, _Parser(tokenize(source)).parse())
+
+
+# 式を評価する。式として正しくないときも "Error" を返す
+def evaluate(source, ans=0):
+    try:
+        compiled = compile_expression(source)
+    except (ExpressionError, RecursionError, MemoryError):
+        return "Error"
+    return compiled.evaluate(ans)
+
+
+# 式入力モードのキーを式に追加する文字列
+KEY_TEXT = {
+    "sin": "sin(", "cos": "cos(", "tan": "tan(", "ln": "ln(",
+    "e^x": "e^(", "10^x": "10^(", "x^2": "^2", "x^3": "^3", "1/x": "1/(",
+    "π": "π", "%": "%", "(": "(", ")": ")",
+}
+
+
+# 括弧の対応が途中で崩れていないか ("(1)+(2" のように閉じていない括弧は許す)
+def _balanced(text):
+    depth = 0
+    for char in text:
+        depth += (char == "(") - (char == ")")
+        if depth < 0:
+            return False
+    return True
+
+
+# クラス: ExpressionEngine
+# 式入力モードの電卓の状態 (CalculatorEngine と同じく press でキーを受け取り、表示する文字列を返す)
+# "=" で式を評価し、結果は次の式で ans として使える
+class ExpressionEngine:
+    def __init__(self):
+        self.source = ""
+        self.ans = 0
+        self.value = "0"
+        self.evaluated = False  # 直前のキーが "=" か
+
+    @property
+    def display(self):
+        return self.source or str(self.value)
+
+    def press(self, key):
+        if key == "AC":
+            self.source = ""
+            self.value = "0"
+        elif key == "⌫":
+            self.source = self.source[:-1]
+        elif key == "=":
+            if self.source:
+                self.value = evaluate(self.source, self.ans)
+                if self.value != "Error":
+                    self.ans = self.value
+                self.source = ""
+                self.evaluated = True
+                return str(self.value)
+        elif key == "+/-":
+            if self.source.startswith("-(") and self.source.endswith(")") and _balanced(self.source[2:-1]):
+                self.source = self.source[2:-1]
+            elif self.source:
+                self.source = f"-({self.source})"
+        else:
+            text = KEY_TEXT.get(key, key)
+            if self.evaluated and self.value != "Error" and (key in "+-*/%" or text.startswith("^")):
+                # 直前の結果に続けて計算する
+                text = "ans" + text
+            self.source += text
+        self.evaluated = False
+        return self.display
+
+    def feed(self, keys):
+        for key in keys:
+            self.press(key)
+        return self.display
@@ -0,0 +1,291 @@
+import argparse
+import atexit
+import json
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import uuid
+from collections import deque, namedtuple
+
+# 電卓の計算履歴
+#   - セッションごとに直近 HISTORY_SIZE 件の結果をメモリに持つ (リングバッファ)
+#   - CALC_LOG を設定すると、押したキーを 1 行 1 件の JSON で書き出す (別スレッドで書くので画面の処理を待たせない)
+#       CALC_LOG=-          標準エラー出力
+#       CALC_LOG=calc.jsonl ファイルに追記
+#   - CALC_HISTORY を設定すると、押したキーをすべて追記専用のバイナリログに残す
+#     ログは mmap で読み、セッションの一覧・キーの再生 (同じ結果になるかの確認) ができる
+#     calc.py と calc_sakurako.py が同じログに書いてもよいように、レコードごとに書いたアプリを残し、
+#     再生するときはそのアプリと同じ計算で押し直す
+#
+#   python calc_history.py sessions calc_history.bin
+#   python calc_history.py show calc_history.bin 1a2b3c4d5e6f7a8b
+#   python calc_history.py verify calc_history.bin
+
+# メモリに残す結果の件数 (セッションごと)
+HISTORY_SIZE = 100
+
+# 結果が出るキー (リングバッファにはこれらのキーの結果だけを残す)
+RESULT_KEYS = {"=", "%", "sin", "cos", "tan", "ln", "e^x", "π", "x^2", "x^3", "1/x", "10^x"}
+
+# モードの切り替えはキーの代わりに "mode:<モード名>" として残す (再生のときにエンジンを作り直す)
+MODE_PREFIX = "mode:"
+
+# ログに書くアプリ (レコードにはこのタプルの位置を残す)
+APPS = ("calc_sakurako", "calc")
+
+# バイナリログの形式
+#   先頭 8 バイト: MAGIC
+#   各レコード: RECORD (時刻, セッション, アプリ, キーの長さ, 表示の長さ) + キー (UTF-8) + 表示 (UTF-8)
+#   キーは 255 バイト、表示は 4 GiB 未満まで。途中で切ると UTF-8 の文字が割れて読めなくなるので、長すぎるものは書かない
+MAGIC = b"CALCLOG2"
+RECORD = struct.Struct("<dQBBI")
+MAX_KEY_BYTES = 0xFF
+MAX_VALUE_BYTES = 0xFFFFFFFF
+
+HistoryEntry = namedtuple("HistoryEntry", "time session key value app", defaults=(APPS[0],))
+
+
+# 押したキーを 1 行 1 件の JSON で書き出す
+# write() はキューに入れるだけで、書き込みは別スレッドでまとめて行う
+class ActionLog:
+    def __init__(self, stream):
+        self.stream = stream
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="calc-action-log", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, **fields):
+        self.queue.put(fields)
+
+    def _run(self):
+        while True:
+            records = [self.queue.get()]
+            while True:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = records[-1] is None
+            lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in records if record is not None]
+            if lines:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+            if closing:
+                return
+
+    # 溜まっている分を書き出して終わる
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+
+# 追記専用のバイナリログ
+# 1 レコードを 1 回の write() で O_APPEND のファイルに書くので、複数のワーカー (serve.py) が
+# 同じファイルに書いてもレコードが混ざらない
+class HistoryLog:
+    def __init__(self, path):
+        self.path = str(path)
+        _create_log(self.path)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+
+    # キーか表示が長すぎるレコードは ValueError (切り詰めると読めないレコードになる)
+    def append(self, entry):
+        key = entry.key.encode()
+        value = entry.value.encode()
+        if len(key) > MAX_KEY_BYTES or len(value) > MAX_VALUE_BYTES:
+            raise ValueError(f"計算履歴に書けない長さです: キー {len(key)} バイト, 表示 {len(value)} バイト")
+        app = APPS.index(entry.app)
+        os.write(self.fd, RECORD.pack(entry.time, entry.session, app, len(key), len(value)) + key + value)
+
+    def close(self):
+        os.close(self.fd)
+
+
+# 先頭に MAGIC だけを書いたファイルを作る (既にあれば形式が同じかだけ確かめる)
+# 一時ファイルに書いてから link するので、他のプロセスが書きかけのファイルを開くことはない
+def _create_log(path):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"形式の違う計算履歴のログには追記できません: {path}")
+        return
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+    try:
+        os.link(temporary, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(temporary)
+
+
+# バイナリログのレコードを先頭から順に返す (session を指定するとそのセッションだけ)
+# 書き込み途中で途切れた末尾のレコードは読み飛ばす
+def scan(path, session=None):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"計算履歴のログではありません: {path}")
+            unpack = RECORD.unpack_from
+            header = RECORD.size
+            end = len(data)
+            offset = len(MAGIC)
+            while offset + header <= end:
+                created, entry_session, app, key_length, value_length = unpack(data, offset)
+                start = offset + header
+                offset = start + key_length + value_length
+                if offset > end:
+                    break
+                if session is None or entry_session == session:
+                    middle = start + key_length
+                    yield HistoryEntry(
+                        created, entry_session, data[start:middle].decode(), data[middle:offset].decode(), APPS[app]
+                    )
+
+
+# セッションごとの (アプリ, レコード数, 最初の時刻, 最後の時刻)
+# キーと表示は読まずにヘッダだけをたどる
+def sessions(path):
+    summary = {}
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(MAGIC):
+            return summary
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"計算履歴のログではありません: {path}")
+            unpack = RECORD.unpack_from
+            header = RECORD.size
+            end = len(data)
+            offset = len(MAGIC)
+            while offset + header <= end:
+                created, session, app, key_length, value_length = unpack(data, offset)
+                offset += header + key_length + value_length
+                if offset > end:
+                    break
+                _, count, first, _ = summary.get(session, (app, 0, created, created))
+                summary[session] = (APPS[app], count + 1, first, created)
+    return summary
+
+
+# モード名に対応する電卓の状態を作る ("expression" は式入力モード)
+def _engine_for(mode):
+    from calc_expression import ExpressionEngine
+    from calc_precision import make_engine
+
+    return ExpressionEngine() if mode == "expression" else make_engine(mode)
+
+
+# セッションのキーを押し直し、記録された表示と違うレコードを (記録, 再生した表示) で返す
+# 書いたアプリと同じ計算で押し直す。calc.py は calc_engine の CalculatorEngine と同じ即時実行の計算を
+# 自前で持っていて、精度や式入力のモードはないので、モードの切り替えのレコードは不一致として扱う
+def replay(entries):
+    engine = _engine_for("float")
+    mismatches = []
+    for entry in entries:
+        if entry.key.startswith(MODE_PREFIX):
+            if entry.app == "calc":
+                mismatches.append((entry, engine.display))
+                continue
+            engine = _engine_for(entry.key[len(MODE_PREFIX):])
+            display = engine.display
+        else:
+            display = engine.press(entry.key)
+        if display != entry.value:
+            mismatches.append((entry, display))
+    return mismatches
+
+
+# クラス: CalculationHistory
+# 1 セッション (電卓 1 つ) の計算履歴。record() で押したキーと押した後の表示を受け取る
+# app はログに残すアプリの名前 (APPS のどれか)
+class CalculationHistory:
+    def __init__(self, app=APPS[0], size=HISTORY_SIZE, log=None, action_log=None):
+        if app not in APPS:
+            raise ValueError(f"未対応のアプリです: {app!r} (対応: {', '.join(APPS)})")
+        self.app = app
+        self.session = uuid.uuid4().int >> 64
+        self.recent = deque(maxlen=size)  # 直近の結果 (HistoryEntry)
+        self.log = log if log is not None else shared_history_log()
+        self.action_log = action_log if action_log is not None else shared_action_log()
+
+    def record(self, key, value):
+        entry = HistoryEntry(time.time(), self.session, key, str(value), self.app)
+        if key in RESULT_KEYS:
+            self.recent.append(entry)
+        if self.log:
+            self.log.append(entry)
+        if self.action_log:
+            self.action_log.write(
+                time=round(entry.time, 3), app=self.app, session=f"{self.session:016x}", key=key, value=entry.value
+            )
+
+    # 直近 count 件の結果 (新しいものが先)
+    def latest(self, count):
+        return [self.recent[-i] for i in range(1, min(count, len(self.recent)) + 1)]
+
+
+_shared_lock = threading.Lock()
+_shared_logs = {}
+
+
+# 環境変数で有効にしたログをプロセスで 1 つだけ作る (無効なら False)
+def _shared(name, create):
+    with _shared_lock:
+        if name not in _shared_logs:
+            target = os.environ.get(name)
+            _shared_logs[name] = create(target) if target else False
+        return _shared_logs[name]
+
+
+def shared_action_log():
+    return _shared(
+        "CALC_LOG", lambda target: ActionLog(sys.stderr if target == "-" else open(target, "a", encoding="utf-8"))
+    )
+
+
+def shared_history_log():
+    return _shared("CALC_HISTORY", HistoryLog)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="電卓の計算履歴のログを読む")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("sessions", help="セッションの一覧").add_argument("path")
+    show = subparsers.add_parser("show", help="セッションのキーと表示")
+    show.add_argument("path")
+    show.add_argument("session", help="セッション (16 進)")
+    subparsers.add_parser("verify", help="全セッションのキーを押し直して表示が同じか確かめる").add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "sessions":
+        for session, (app, count, first, last) in sessions(args.path).items():
+            print(f"{session:016x}  {app:<13}  {count:>7,} 件  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))}"
+                  f" - {time.strftime('%H:%M:%S', time.localtime(last))}")
+    elif args.command == "show":
+        for entry in scan(args.path, int(args.session, 16)):
+            print(f"{time.strftime('%H:%M:%S', time.localtime(entry.time))}  {entry.key:>16}  {entry.value}")
+    elif args.command == "verify":
+        by_session = {}
+        for entry in scan(args.path):
+            by_session.setdefault(entry.session, []).append(entry)
+        failed = 0
+        for session, entries in by_session.items():
+            mismatches = replay(entries)
+            failed += bool(mismatches)
+            for entry, display in mismatches[:3]:
+                print(f"{session:016x}  {entry.key}: 記録 {entry.value!r}, 再生 {display!r}")
+        print(f"{len(by_session)} セッション中 {failed} セッションが一致しません")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
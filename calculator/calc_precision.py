@@ -0,0 +1,159 @@
+import math
+from decimal import Context, Decimal, InvalidOperation
+from fractions import Fraction
+
+from calc_engine import CalculatorEngine
+
+# 精度モード
+#   "float"   : 通常の 2 進浮動小数点 (CalculatorEngine そのもの。既定で最速)
+#   "decimal" : 10 進の decimal で digits 桁まで計算する (0.1+0.2 が 0.3 になる)
+#   "fraction": 四則演算・%・x^2・x^3・1/x を分数で正確に計算し、"1/3" のように表示する
+# decimal でも sin / cos / tan は float で計算してから digits 桁に丸める。
+# fraction の sin・ln・e^x・10^x (指数が整数でないとき)・π は float で計算し、分母が
+# 10^digits 以下の分数で近似する
+MODES = ("float", "decimal", "fraction")
+
+# 既定の桁数 (decimal は有効桁数、fraction は近似するときの分母の桁数)
+DEFAULT_DIGITS = {"decimal": 28, "fraction": 6}
+
+# float で計算した値を decimal に変換するときの有効桁数 (float の精度以上の桁は意味がない)
+FLOAT_DIGITS = 15
+
+# fraction で扱う分子・分母の桁数の上限 (これを超える結果は "Error"。Python が int を文字列にできるのは
+# 既定で 4300 桁までで、それより前に計算も遅くなる)
+MAX_FRACTION_DIGITS = 1000
+
+# π (100 桁)
+PI = "3.141592653589793238462643383279502884197169399375105820974944592307816406286208998628034825342117068"
+
+
+def _is_integral(number):
+    return number == int(number)
+
+
+class _DecimalMode:
+    def __init__(self, digits):
+        self.context = Context(prec=digits)
+        self.float_context = Context(prec=min(digits, FLOAT_DIGITS))
+        context = self.context
+        self.operations = {"+": context.add, "-": context.subtract, "*": context.multiply, "/": context.divide}
+        self.scientific = {
+            "sin": lambda value: self.from_float(math.sin(math.radians(value))),
+            "cos": lambda value: self.from_float(math.cos(math.radians(value))),
+            "tan": lambda value: self.from_float(math.tan(math.radians(value))),
+            "ln": lambda value: "Error" if value <= 0 else self.format_number(context.ln(value)),
+            "e^x": lambda value: self.format_number(context.exp(value)),
+            "π": lambda value: self.format_number(context.plus(Decimal(PI))),
+            "x^2": lambda value: self.format_number(context.multiply(value, value)),
+            "x^3": lambda value: self.format_number(context.power(value, 3)),
+            "1/x": lambda value: "Error" if value == 0 else self.format_number(context.divide(1, value)),
+            "10^x": lambda value: self.format_number(context.power(10, value)),
+        }
+
+    def to_number(self, value):
+        try:
+            return Decimal(value) if not isinstance(value, str) else Decimal(value.strip())
+        except InvalidOperation:
+            raise ValueError(f"数値ではありません: {value!r}")
+
+    def from_float(self, number):
+        return self.format_number(self.float_context.create_decimal_from_float(number))
+
+    # 有効桁数に収まる整数なら int、そうでなければ末尾の 0 を落とした Decimal
+    # (1E+5000 のような大きな整数を int にすると全桁を表示することになるので、指数表記のままにする)
+    def format_number(self, number):
+        if number.is_finite() and number.adjusted() < self.context.prec and _is_integral(number):
+            return int(number)
+        return number.normalize(self.context) if number.is_finite() else number
+
+    def calculate(self, operand1, operand2, operator):
+        if operator == "/" and operand2 == 0:
+            return "Error"
+        return self.format_number(self.operations[operator](operand1, operand2))
+
+    def percent(self, number):
+        return self.format_number(self.context.divide(number, 100))
+
+
+class _FractionMode:
+    def __init__(self, digits):
+        self.max_denominator = 10 ** digits
+        self.scientific = {
+            "sin": lambda value: self.from_float(math.sin(math.radians(value))),
+            "cos": lambda value: self.from_float(math.cos(math.radians(value))),
+            "tan": lambda value: self.from_float(math.tan(math.radians(value))),
+            "ln": lambda value: "Error" if value <= 0 else self.from_float(math.log(value)),
+            "e^x": lambda value: self.from_float(math.exp(value)),
+            "π": lambda value: self.from_float(math.pi),
+            "x^2": lambda value: self.format_number(value * value),
+            "x^3": lambda value: self.format_number(value ** 3),
+            "1/x": lambda value: "Error" if value == 0 else self.format_number(1 / value),
+            "10^x": lambda value: (
+                self.power_of_ten(int(value)) if value.denominator == 1 else self.from_float(math.pow(10, value))
+            ),
+        }
+
+    def to_number(self, value):
+        try:
+            return Fraction(value) if not isinstance(value, str) else Fraction(value.strip())
+        except ZeroDivisionError:
+            raise ValueError(f"数値ではありません: {value!r}")
+
+    def from_float(self, number):
+        return self.format_number(Fraction(number).limit_denominator(self.max_denominator))
+
+    # 10 ** exponent (桁数が上限を超えるなら先に "Error" にして、大きな整数を作らない)
+    def power_of_ten(self, exponent):
+        if abs(exponent) >= MAX_FRACTION_DIGITS:
+            return "Error"
+        return self.format_number(Fraction(10) ** exponent)
+
+    # 整数なら int、そうでなければ Fraction ("1/3" と表示される)
+    # 分子か分母が MAX_FRACTION_DIGITS 桁を超えたら OverflowError (float の inf の代わり。電卓では "Error" か無視)
+    def format_number(self, number):
+        limit = MAX_FRACTION_DIGITS * math.log2(10)  # 10 進の桁数 → ビット数
+        if number.numerator.bit_length() > limit or number.denominator.bit_length() > limit:
+            raise OverflowError("桁数が多すぎます")
+        return int(number) if number.denominator == 1 else number
+
+    def calculate(self, operand1, operand2, operator):
+        if operator == "+":
+            return self.format_number(operand1 + operand2)
+        elif operator == "-":
+            return self.format_number(operand1 - operand2)
+        elif operator == "*":
+            return self.format_number(operand1 * operand2)
+        elif operator == "/":
+            return "Error" if operand2 == 0 else self.format_number(operand1 / operand2)
+
+    def percent(self, number):
+        return self.format_number(number / 100)
+
+
+# クラス: PreciseCalculatorEngine
+# 10 進 (decimal) または分数 (fraction) で計算する電卓の状態
+# キーの扱いは CalculatorEngine と同じで、数値の変換・四則演算・表示の整形だけを差し替える
+class PreciseCalculatorEngine(CalculatorEngine):
+    def __init__(self, mode="decimal", digits=None):
+        digits = digits or DEFAULT_DIGITS.get(mode)
+        if mode == "decimal":
+            numbers = _DecimalMode(digits)
+        elif mode == "fraction":
+            numbers = _FractionMode(digits)
+        else:
+            raise ValueError(f"未対応の精度モードです: {mode!r} (対応: decimal, fraction)")
+        self.mode = mode
+        self.digits = digits
+        self.to_number = numbers.to_number
+        self.calculate = numbers.calculate
+        self.format_number = numbers.format_number
+        self.percent = numbers.percent
+        self.scientific = numbers.scientific
+        super().__init__()
+
+
+# 精度モードに応じた電卓の状態を作る ("float" は従来の CalculatorEngine)
+def make_engine(mode="float", digits=None):
+    if mode == "float":
+        return CalculatorEngine()
+    return PreciseCalculatorEngine(mode, digits)
@@ -1,5 +1,15 @@
+import time
+
+# 起動時間の基準 (ここから最初の page.update() までを計測する)
+STARTED = time.perf_counter()
+
 import flet as ft
-import math
+
+from calc_engine import CalculatorEngine
+from calc_expression import ExpressionEngine
+from calc_history import MODE_PREFIX, RESULT_KEYS, CalculationHistory
+from calc_precision import MODES, make_engine
+from ui_updates import UpdateBatcher, report_first_update
 
 # クラス: CalcButton
 # 数字や演算子ボタンの基本クラス。ボタンの基本的なプロパティを設定
@@ -44,25 +54,47 @@ class ScientificButton(CalcButton):
         self.color = ft.colors.WHITE
 
 
-
 # クラス: CalculatorApp
-# 電卓のメインロジックとUIを管理するクラス
+# 電卓の UI を管理。計算の状態は CalculatorEngine (calc_engine.py) が持つ
 class CalculatorApp(ft.Container):
-    def __init__(self):
+    def __init__(self, updates=None):
         super().__init__()
-        self.reset() # 初期化メソッドを呼び出し、状態をリセット
-        
-
-# クラス: CalculatorApp
-# 電卓のメインロジックとUIを管理。
-class CalculatorApp(ft.Container):
-    def __init__(self):
-        super().__init__()
-        self.reset()  # 初期化メソッドを呼び出し、状態をリセット
+        self.updates = updates  # 画面の更新をまとめる UpdateBatcher (ui_updates.py)
+        self.engine = CalculatorEngine()  # 計算の状態 (Flet に依存しない)
+        self.history = CalculationHistory("calc_sakurako")  # 直近の結果とログ (calc_history.py)。AC でも消さない
 
         # 表示画面の設定
         # 計算結果を表示する画面を設定
-        self.result = ft.Text(value="0", color=ft.colors.WHITE, size=40)
+        self.result = ft.Text(value=self.engine.display, color=ft.colors.WHITE, size=40)
+
+        # 直近の結果 (新しいものが左)
+        self.recent = ft.Text(value="", color=ft.colors.WHITE54, size=14)
+
+        # 式入力モードの切り替え (オンにすると 2+3*4 を優先順位どおりに計算する)
+        self.mode_switch = ft.Switch(
+            label="式入力", value=False, on_change=self.mode_changed, label_style=ft.TextStyle(color=ft.colors.WHITE)
+        )
+
+        # 精度モード (float / decimal / fraction)。即時実行モードでだけ選べる
+        self.precision = ft.Dropdown(
+            options=[ft.dropdown.Option(mode) for mode in MODES],
+            value="float",
+            on_change=self.mode_changed,
+            width=150,
+            dense=True,
+            color=ft.colors.WHITE,
+        )
+
+        # 式入力モードでだけ使うボタンの行 ((, ), ⌫)
+        self.expression_row = ft.Row(
+            controls=[
+                ExtraActionButton(text="(", button_clicked=self.button_clicked),
+                ExtraActionButton(text=")", button_clicked=self.button_clicked),
+                ExtraActionButton(text="⌫", button_clicked=self.button_clicked),
+            ],
+            expand=True,
+            visible=False,
+        )
         self.width = 600
         self.bgcolor = ft.colors.BLACK
         self.border_radius = ft.border_radius.all(20)
@@ -72,9 +104,14 @@ class CalculatorApp(ft.Container):
         # 各種ボタンと行・列のレイアウトを設定
         self.content = ft.Column(
             controls=[
-                # 計算結果表示エリア
+                # モード切り替えと計算結果表示エリア
+                ft.Row(controls=[self.mode_switch, self.precision]),
+                ft.Row(controls=[self.recent], alignment="end"),
                 ft.Row(controls=[self.result], alignment="end"),
 
+                # 式入力モードのボタンの行 ((, ), ⌫)
+                self.expression_row,
+
                 # アクションボタンの行 (AC, +/-, %, /)
                 ft.Row(
                     controls=[
@@ -162,116 +199,37 @@ class CalculatorApp(ft.Container):
             ]
         )
 
+    # 即時実行モード・式入力モードや精度モードを切り替える (計算の状態はリセットする)
+    def mode_changed(self, e):
+        if self.mode_switch.value:
+            self.engine = ExpressionEngine()
+        else:
+            self.engine = make_engine(self.precision.value)
+        self.expression_row.visible = self.mode_switch.value
+        self.precision.disabled = self.mode_switch.value
+        self.result.value = self.engine.display
+        self.history.record(MODE_PREFIX + ("expression" if self.mode_switch.value else self.precision.value), self.result.value)
+        self.refresh(self.expression_row, self.precision, self.result)
+
     # ボタンが押された時の動作を定義
+    # 計算は CalculatorEngine に任せ、ここでは表示の更新だけを行う
     def button_clicked(self, e):
         data = e.control.data
-        print(f"Button clicked with data = {data}")
-
-        # エラー状態やリセット時の処理
-        if self.result.value == "Error" or data == "AC":
-            self.result.value = "0"
-            self.reset()
-
-        # 数字入力の処理
-        elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
-            if self.result.value == "0" or self.new_operand:
-                self.result.value = data
-                self.new_operand = False
-            else:
-                self.result.value += data
-
-        # 基本演算の処理 (+, -, *, /)
-        elif data in ("+", "-", "*", "/"):
-            self.result.value = self.calculate(
-                self.operand1, float(self.result.value), self.operator
-            )
-            self.operator = data
-            if self.result.value == "Error":
-                self.operand1 = "0"
-            else:
-                self.operand1 = float(self.result.value)
-            self.new_operand = True
-
-        # 等号 (=) を押した際の処理
-        elif data == "=":
-            self.result.value = self.calculate(
-                self.operand1, float(self.result.value), self.operator
-            )
-            self.reset()
-        # パーセント (%) 計算
-        elif data == "%":
-            self.result.value = float(self.result.value) / 100
-            self.reset()
-            
-        # +/- ボタン (符号の切り替え)
-        elif data == "+/-":
-            if float(self.result.value) > 0:
-                self.result.value = "-" + str(self.result.value)
-            elif float(self.result.value) < 0:
-                self.result.value = str(
-                    self.format_number(abs(float(self.result.value)))
-                )
-
-        # 科学計算の処理
-        elif data in ("sin", "cos", "tan", "ln", "e^x", "π", "x^2", "x^3", "1/x", "10^x"):
-            try:
-                value = float(self.result.value)
-                if data == "sin":
-                    self.result.value = self.format_number(math.sin(math.radians(value)))
-                elif data == "cos":
-                    self.result.value = self.format_number(math.cos(math.radians(value)))
-                elif data == "tan":
-                    self.result.value = self.format_number(math.tan(math.radians(value)))
-                elif data == "ln":
-                    self.result.value = (
-                        "Error" if value <= 0 else self.format_number(math.log(value))
-                    )
-                elif data == "e^x":
-                    self.result.value = self.format_number(math.exp(value))
-                elif data == "π":
-                    self.result.value = self.format_number(math.pi)
-                elif data == "x^2":
-                    self.result.value = self.format_number(math.pow(value, 2))
-                elif data == "x^3":
-                    self.result.value = self.format_number(math.pow(value, 3))
-                elif data == "1/x":
-                    self.result.value = (
-                        "Error" if value == 0 else self.format_number(1 / value)
-                    )
-                elif data == "10^x":
-                    self.result.value = self.format_number(math.pow(10, value))
-            except:
-                self.result.value = "Error"
-
-        # 画面の更新
-        # 計算結果が変更された場合にUIを更新します
-        self.update()
-
-        # 計算結果が変更された場合にUIを更新
-        self.update()
-
-    # 浮動小数点数をフォーマットし、小数部が0の場合は整数として表示
-    def format_number(self, num):
-        return int(num) if num % 1 == 0 else num
-      
-    # 基本的な四則演算 (+, -, *, /) を実行
-    # 割り算の際にゼロ除算エラーを防ぐ処理を追加
-    def calculate(self, operand1, operand2, operator):
-        if operator == "+":
-            return self.format_number(operand1 + operand2)
-        elif operator == "-":
-            return self.format_number(operand1 - operand2)
-        elif operator == "*":
-            return self.format_number(operand1 * operand2)
-        elif operator == "/":
-            return "Error" if operand2 == 0 else self.format_number(operand1 / operand2)
-
-
-    # 計算状態を初期化
-    def reset(self):
-        self.operator = "+"  # 初期演算子を "+" に設定
-        self.operand1 = 0    # 最初のオペランドを 0 に設定。
-        self.new_operand = True  # 新しいオペランドを受け付ける状態に設定
+        self.result.value = self.engine.press(data)
+        self.history.record(data, self.result.value)
+        if data in RESULT_KEYS:
+            self.recent.value = "   ".join(entry.value for entry in self.history.latest(3))
+            self.refresh(self.result, self.recent)
+        else:
+            self.refresh(self.result)
+
+    # 変更した部品の画面の更新を UpdateBatcher に頼む (連打しても 1 回の更新にまとまる)
+    # UpdateBatcher がなければその場で電卓全体を更新する
+    def refresh(self, *controls):
+        if self.updates is None:
+            self.update()
+        else:
+            self.updates.request(*controls)
 
 
 # ページのレイアウトを設定し、CalculatorAppを追加
@@ -290,10 +248,12 @@ def main(page: ft.Page):
 
 
     # 電卓アプリをインスタンス化し、ページに追加
-    calc = CalculatorApp()
+    calc = CalculatorApp(UpdateBatcher(page))
     page.add(calc)
+    report_first_update(STARTED)
 
 
 # アプリケーションの開始
 # Fletアプリケーションを起動し、main関数をターゲットとして指定
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
\ No newline at end of file
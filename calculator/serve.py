@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from http.cookies import CookieError, SimpleCookie
+from pathlib import Path
+
+# 複数の Flet ワーカープロセスを 1 つのポートの裏で動かす
+# Flet のセッション (WebSocket) はそれを受けたワーカーのメモリにしか存在しないので、
+# 最初の応答でワーカー番号をクッキーに入れ、再接続も同じワーカーに送る (セッションアフィニティ)。
+#
+#   python serve.py --workers 4 --port 8080
+#
+# SIGINT / SIGTERM を受けると新しい接続の受け付けをやめ、処理中の接続を DRAIN_TIMEOUT 秒まで待ってから
+# ワーカーに SIGINT を送って終了する (fly.toml の kill_signal = "SIGINT", kill_timeout = 5 に合わせている)
+
+# ワーカー番号を入れるクッキー
+AFFINITY_COOKIE = "flet_worker"
+
+# ワーカーが使うポート (WORKER_BASE_PORT から順に割り当てる)
+WORKER_BASE_PORT = 8551
+
+# 処理中の接続を待つ時間 (秒)。kill_timeout より短くしておく
+DRAIN_TIMEOUT = 3.0
+
+# ワーカーに SIGINT を送ってから強制終了するまでの時間 (秒)
+WORKER_STOP_TIMEOUT = 1.0
+
+# ワーカーの起動を待つ時間 (秒)
+WORKER_START_TIMEOUT = 60.0
+
+# リクエストヘッダの最大サイズ
+MAX_HEADER_SIZE = 64 * 1024
+
+CHUNK_SIZE = 64 * 1024
+
+DEFAULT_APP = Path(__file__).resolve().parent / "calc.py"
+
+
+# Flet アプリを動かす子プロセス 1 つ
+class Worker:
+    def __init__(self, index, port, app):
+        self.index = index
+        self.port = port
+        self.app = Path(app)
+        self.process = None
+        self.active = 0  # 中継中の接続数
+        self.assigned = 0  # 新しく割り当てたセッション数
+        self.restarts = 0
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        env = dict(os.environ, FLET_SERVER_PORT=str(self.port), FLET_FORCE_WEB_SERVER="true")
+        # 端末の Ctrl-C がワーカーに直接届かないよう別のプロセスグループで起動する
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, str(self.app), cwd=str(self.app.parent), env=env, start_new_session=True
+        )
+
+    # ポートが接続を受け付けるようになるまで待つ
+    async def wait_ready(self, timeout=WORKER_START_TIMEOUT):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            if not self.alive:
+                raise RuntimeError(f"ワーカー {self.index} が起動直後に終了しました")
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", self.port)
+            except OSError:
+                await asyncio.sleep(0.1)
+                continue
+            writer.close()
+            return
+        raise RuntimeError(f"ワーカー {self.index} (ポート {self.port}) が起動しませんでした")
+
+    async def stop(self, timeout=WORKER_STOP_TIMEOUT):
+        if not self.alive:
+            return
+        self.process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+
+# Cookie ヘッダからワーカー番号を取り出す (なければ None)
+def affinity_of(head):
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() != b"cookie":
+            continue
+        try:
+            cookie = SimpleCookie(value.decode("latin-1"))
+        except CookieError:
+            return None
+        morsel = cookie.get(AFFINITY_COOKIE)
+        if morsel is not None and morsel.value.isdigit():
+            return int(morsel.value)
+    return None
+
+
+# 応答ヘッダの末尾にワーカー番号のクッキーを追加する
+def with_affinity_cookie(head, index):
+    cookie = f"Set-Cookie: {AFFINITY_COOKIE}={index}; Path=/; HttpOnly; SameSite=Lax\r\n".encode("latin-1")
+    return head[:-2] + cookie + b"\r\n"
+
+
+async def pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(CHUNK_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        try:
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (OSError, RuntimeError):
+            pass
+
+
+def close_quietly(writer):
+    try:
+        writer.close()
+    except (OSError, RuntimeError):
+        pass
+
+
+# 受け付けた TCP 接続をワーカーに中継するフロントのプロセス
+class Supervisor:
+    def __init__(self, workers, host="0.0.0.0", port=8080):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.server = None
+        self.connections = set()
+        self.stopping = False
+        self.stopped = asyncio.Event()
+
+    # クッキーのワーカーが生きていればそれを、なければ接続数が最も少ないワーカーを選ぶ
+    # (同数なら割り当てたセッションが少ない方)
+    def choose(self, head):
+        index = affinity_of(head)
+        if index is not None and index < len(self.workers) and self.workers[index].alive:
+            return self.workers[index], False
+        alive = [w for w in self.workers if w.alive]
+        if not alive:
+            return None, False
+        worker = min(alive, key=lambda w: (w.active, w.assigned))
+        worker.assigned += 1
+        return worker, True
+
+    async def handle(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            await self._relay(reader, writer)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connections.discard(task)
+            close_quietly(writer)
+
+    async def _relay(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return
+        worker, assign = self.choose(head)
+        try:
+            if worker is None:
+                raise OSError("no worker")
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", worker.port)
+        except OSError:
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+
+        worker.active += 1
+        try:
+            upstream_writer.write(head)
+            if assign:
+                try:
+                    response_head = await upstream_reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                writer.write(with_affinity_cookie(response_head, worker.index))
+            await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+        finally:
+            worker.active -= 1
+            close_quietly(upstream_writer)
+
+    # ワーカーが落ちたら起動し直す (停止中を除く)
+    async def watch(self, worker):
+        while not self.stopping:
+            await worker.process.wait()
+            if self.stopping:
+                return
+            print(f"ワーカー {worker.index} が終了しました (コード {worker.process.returncode})。再起動します", flush=True)
+            worker.restarts += 1
+            await asyncio.sleep(min(worker.restarts, 5))
+            await worker.start()
+
+    async def serve(self):
+        for worker in self.workers:
+            await worker.start()
+        try:
+            await asyncio.gather(*(worker.wait_ready() for worker in self.workers))
+        except Exception:
+            await asyncio.gather(*(worker.stop() for worker in self.workers))
+            raise
+        watchers = [asyncio.create_task(self.watch(worker)) for worker in self.workers]
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.request_stop)
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, limit=MAX_HEADER_SIZE)
+        print(f"{len(self.workers)} ワーカーで待ち受け中: http://{self.host}:{self.port}", flush=True)
+
+        await self.stopped.wait()
+        await self.shutdown()
+        for watcher in watchers:
+            watcher.cancel()
+
+    def request_stop(self):
+        if self.stopped.is_set():
+            # 2 回目のシグナルでは接続を待たずに終了する
+            for task in list(self.connections):
+                task.cancel()
+            return
+        self.stopping = True
+        self.stopped.set()
+
+    async def shutdown(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self.server.close()
+        if self.connections:
+            print(f"{len(self.connections)} 件の接続の終了を待っています…", flush=True)
+            await asyncio.wait(list(self.connections), timeout=DRAIN_TIMEOUT)
+        for task in list(self.connections):
+            task.cancel()
+        if self.connections:
+            await asyncio.wait(list(self.connections), timeout=WORKER_STOP_TIMEOUT)
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        print(f"停止しました ({loop.time() - started:.1f} 秒)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flet アプリを複数ワーカーで動かす")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("FLET_SERVER_PORT", 8080)))
+    parser.add_argument("--base-port", type=int, default=WORKER_BASE_PORT, help="ワーカーの先頭ポート")
+    parser.add_argument("--app", default=str(DEFAULT_APP), help="ワーカーで動かす Flet アプリ")
+    args = parser.parse_args()
+
+    workers = [Worker(i, args.base_port + i, args.app) for i in range(max(args.workers, 1))]
+    asyncio.run(Supervisor(workers, args.host, args.port).serve())
+
+
+if __name__ == "__main__":
+    main()
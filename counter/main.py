@@ -1,18 +1,27 @@
+import time
+
+# reference point for the time to the first page.update()
+STARTED = time.perf_counter()
+
 import flet as ft
 
+from ui_updates import UpdateBatcher, report_first_update
+
 def main(page: ft.Page):
     page.title = "Flet counter example"
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
+    # clicks only mark the text field as changed; the batcher sends one update per event loop tick
+    updates = UpdateBatcher(page)
 
     txt_number = ft.TextField(value="0", text_align=ft.TextAlign.RIGHT, width=100)
 
     def minus_click(e):
         txt_number.value = str(int(txt_number.value) - 1)
-        page.update()
+        updates.request(txt_number)
 
     def plus_click(e):
         txt_number.value = str(int(txt_number.value) + 1)
-        page.update()
+        updates.request(txt_number)
 
     page.add(
         ft.Row(
@@ -24,5 +33,7 @@ def main(page: ft.Page):
             alignment=ft.MainAxisAlignment.CENTER,
         )
     )
+    report_first_update(STARTED)
 
-ft.app(main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(main)
\ No newline at end of file
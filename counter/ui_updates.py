@@ -0,0 +1,78 @@
+# calculator/ui_updates.py の写し (calculator と counter は別々のアプリのディレクトリとして配布され、
+# calculator の Docker イメージには calculator/ しか入らないので、共通のパッケージにせず両方に置く。変更するときは両方を同じにする)
+
+import threading
+import time
+
+# 画面の更新をまとめる
+# クリックのたびに page.update() / control.update() を呼ぶ代わりに request() で変更した部品を登録しておくと、
+# イベントループの次の 1 回でまとめて 1 回だけ page.update(部品...) を呼ぶ
+#   - 同じイベント (同じループの 1 回) の中で何度 request() しても送る差分は 1 回分
+#   - 速い連打で複数のハンドラが同時に走っても、その間の変更は 1 回の更新にまとまる
+#   - 変更した部品だけを渡すので、ページ全体の差分を取り直さない
+# Flet の同期ハンドラは別スレッドで動くので、更新はページのイベントループ (page.loop) 上で行う
+
+
+# 更新の回数の記録 (ベンチマーク用)
+class UpdateStats:
+    def __init__(self):
+        self.requests = 0  # request() の回数
+        self.updates = 0  # 実際に呼んだ page.update() の回数
+        self.controls = 0  # page.update() に渡した部品の数の合計
+
+    def reset(self):
+        self.requests = self.updates = self.controls = 0
+
+
+# クラス: UpdateBatcher
+# 1 つのページの更新をまとめる
+class UpdateBatcher:
+    def __init__(self, page, stats=None):
+        self.page = page
+        self.stats = stats
+        self.lock = threading.Lock()
+        self.pending = []  # 次の更新で送る部品 (登録順)
+        self.scheduled = False
+
+    # controls を次の更新に含める (省略するとページ全体)
+    def request(self, *controls):
+        controls = controls or (self.page,)
+        with self.lock:
+            if self.stats:
+                self.stats.requests += 1
+            for control in controls:
+                if not any(control is pending for pending in self.pending):
+                    self.pending.append(control)
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.page.loop.call_soon_threadsafe(self.flush)
+
+    # 登録された部品をまとめて更新する (イベントループから呼ばれる。直接呼んでもよい)
+    def flush(self):
+        with self.lock:
+            controls = self.pending
+            self.pending = []
+            self.scheduled = False
+        if not controls:
+            return
+        # ページ全体を更新するなら個々の部品は不要
+        if any(control is self.page for control in controls):
+            controls = [self.page]
+        if self.stats:
+            self.stats.updates += 1
+            self.stats.controls += len(controls)
+        self.page.update(*controls)
+
+
+_first_update_reported = False
+
+
+# 起動から最初の page.update() までの時間を表示する (プロセスで 1 回だけ。2 つ目以降のセッションでは何もしない)
+# started はエントリポイントの先頭で取った time.perf_counter()
+def report_first_update(started):
+    global _first_update_reported
+    if _first_update_reported:
+        return
+    _first_update_reported = True
+    print(f"起動から最初の page.update() まで: {(time.perf_counter() - started) * 1000:.0f} ms")
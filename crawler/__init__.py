@@ -0,0 +1 @@
+# 求人サイトを巡回して job_listings.db に書き込むクローラ (ノートブックのスクレイピングをモジュールにしたもの)
@@ -0,0 +1,149 @@
+from collections import namedtuple
+from typing import NamedTuple
+from urllib.parse import urljoin
+
+from crawler.listing_page import ITEM_CLASS, LINK_CLASS, parse_wages
+from jobs.storage import LISTING_COLUMNS
+
+# サイトごとの抽出定義 (スキーマ) で一覧ページから求人を取り出す (要 lxml または selectolax)
+# スキーマには「求人 1 件を囲む要素」「項目ごとの要素」「巡回するリンク」をタグ名とクラス名で書いておき、
+# 抽出器を作るときに 1 回だけ lxml の XPath / selectolax の CSS セレクタにする
+# ノートブックの item.find("span", class_=...) のように項目ごとに木をたどり直すのではなく、
+# コンパイル済みの式で求人の要素の中だけを探す
+#
+#   extractor = make_extractor(JOB_SITE, "lxml")
+#   for record in extractor.records(html): ...       # スキーマの項目を持つ namedtuple を 1 件ずつ返す
+#   crawler = Crawler(parse=extractor.parse)          # crawler.pipeline の解析段に差し込める
+
+
+# 1 つの項目 (tag 要素のうち class_name を持つ最初のもの。attribute を指定するとその属性、なければ文字列)
+class Field(NamedTuple):
+    name: str
+    tag: str
+    class_name: str
+    attribute: str = None
+    convert: object = None
+
+
+class SiteSchema(NamedTuple):
+    name: str
+    item: Field
+    fields: tuple
+    link: Field
+
+
+# crawler.listing_page と同じ形の求人一覧ページ (crawler.fixture_server が返すページ)
+JOB_SITE = SiteSchema(
+    name="job_site",
+    item=Field("item", "div", ITEM_CLASS),
+    fields=tuple(
+        Field(name, "span", name, convert=parse_wages if name == "wages" else None) for name in LISTING_COLUMNS
+    ),
+    link=Field("link", "a", LINK_CLASS, attribute="href"),
+)
+
+
+def _value(text, field):
+    if text is None or field.convert is None:
+        return text
+    return field.convert(text)
+
+
+# lxml の HTML パーサとコンパイル済みの XPath で抽出する
+# 項目ごとに XPath を評価すると求人 1 件あたり項目の数だけ木をたどるので、求人の要素の中の class を持つ要素を
+# 1 回の XPath ですべて取り出し、(タグ名, クラス名) から項目の位置を引く表で振り分ける
+class LxmlExtractor:
+    def __init__(self, schema):
+        from lxml import etree, html
+
+        self.schema = schema
+        self.record = namedtuple(schema.name, [field.name for field in schema.fields])
+        self._fromstring = html.fromstring
+        self._items = etree.XPath("//" + self._step(schema.item))
+        self._classed = etree.XPath(".//*[@class]")
+        self._slots = {}
+        for i, field in enumerate(schema.fields):
+            self._slots.setdefault((field.tag, field.class_name), []).append(i)
+        self._links = etree.XPath("//" + self._step(schema.link) + "/@" + schema.link.attribute)
+
+    # クラス名の一致は空白で区切った単語として比べる (CSS の .class と同じ)
+    @staticmethod
+    def _step(field):
+        return f"{field.tag}[contains(concat(' ', normalize-space(@class), ' '), ' {field.class_name} ')]"
+
+    def _records(self, tree):
+        record, fields, slots = self.record, self.schema.fields, self._slots
+        for item in self._items(tree):
+            # 項目ごとに、文書の順で最初に見つかった要素
+            found = [None] * len(fields)
+            for element in self._classed(item):
+                for class_name in element.get("class").split():
+                    for i in slots.get((element.tag, class_name), ()):
+                        if found[i] is None:
+                            found[i] = element
+            values = []
+            for element, field in zip(found, fields):
+                if element is None:
+                    values.append(None)
+                elif field.attribute:
+                    values.append(_value(element.get(field.attribute), field))
+                else:
+                    values.append(_value(element.text_content().strip(), field))
+            yield record(*values)
+
+    def records(self, html):
+        yield from self._records(self._fromstring(html))
+
+    def parse(self, url, html):
+        tree = self._fromstring(html)
+        return list(self._records(tree)), [urljoin(url, href) for href in self._links(tree) if href]
+
+
+# selectolax (lexbor) の CSS セレクタで抽出する
+# selectolax にはコンパイル済みのセレクタを渡す API がないので、セレクタの文字列を組み立てるのを最初の 1 回にする
+class SelectolaxExtractor:
+    def __init__(self, schema):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self.schema = schema
+        self.record = namedtuple(schema.name, [field.name for field in schema.fields])
+        self._parser = LexborHTMLParser
+        self._items = self._selector(schema.item)
+        self._fields = [(self._selector(field), field) for field in schema.fields]
+        self._links = self._selector(schema.link)
+
+    @staticmethod
+    def _selector(field):
+        return f"{field.tag}.{field.class_name}"
+
+    def _records(self, tree):
+        record = self.record
+        for item in tree.css(self._items):
+            values = []
+            for selector, field in self._fields:
+                node = item.css_first(selector)
+                if node is None:
+                    values.append(None)
+                elif field.attribute:
+                    values.append(_value(node.attributes.get(field.attribute), field))
+                else:
+                    values.append(_value(node.text(deep=True).strip(), field))
+            yield record(*values)
+
+    def records(self, html):
+        yield from self._records(self._parser(html))
+
+    def parse(self, url, html):
+        tree = self._parser(html)
+        attribute = self.schema.link.attribute
+        links = [urljoin(url, node.attributes[attribute]) for node in tree.css(self._links) if node.attributes.get(attribute)]
+        return list(self._records(tree)), links
+
+
+EXTRACTORS = {"lxml": LxmlExtractor, "selectolax": SelectolaxExtractor}
+
+
+def make_extractor(schema=JOB_SITE, backend="lxml"):
+    if backend not in EXTRACTORS:
+        raise ValueError(f"未対応の抽出器です: {backend!r} (対応: {', '.join(EXTRACTORS)})")
+    return EXTRACTORS[backend](schema)
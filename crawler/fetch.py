@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+# ページの並行取得 (asyncio から requests をスレッドで呼ぶ。jma_common.prefetch と同じ方式)
+# ホストごとに同時接続数とリクエストの開始間隔を制限し、失敗したら待ち時間を延ばしながらやり直す
+
+# 同時に取得するページ数の上限 (全ホスト合計。取得用のスレッド数でもある)
+MAX_CONCURRENCY = 16
+
+# 1 ホストあたりの同時接続数
+PER_HOST = 4
+
+# 1 ホストあたりのリクエスト開始レート (回/秒)。相手のサイトに負荷をかけないよう控えめにする
+REQUESTS_PER_SECOND = 2.0
+
+# やり直しの回数と、最初の待ち時間 (秒)。n 回目は BACKOFF * 2 ** n 秒までのランダムな時間だけ待つ
+RETRIES = 3
+BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+
+# やり直す HTTP ステータス (429 と 503 は Retry-After があれば従う)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# 接続・読み込みのタイムアウト (秒)
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+
+USER_AGENT = "job-listings-crawler/1.0"
+
+
+# 取得したページ
+class Page(NamedTuple):
+    url: str
+    status: int
+    text: str
+    attempts: int
+
+
+class FetchError(Exception):
+    def __init__(self, url, reason, attempts):
+        super().__init__(f"{url}: {reason} ({attempts} 回試行)")
+        self.url = url
+        self.reason = reason
+        self.attempts = attempts
+
+
+# ホストごとの同時接続数とリクエストの開始間隔の制限
+class HostLimiter:
+    def __init__(self, per_host=PER_HOST, rate=REQUESTS_PER_SECOND):
+        self.per_host = per_host
+        self.interval = 1.0 / rate if rate else 0.0
+        self._semaphores = {}
+        self._next_slot = {}
+
+    def semaphore(self, host):
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    # 前のリクエストの開始から interval 秒たつまで待つ
+    async def wait(self, host):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# Retry-After (秒数か日時) を秒にする
+def retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Fetcher:
+    def __init__(
+        self,
+        max_concurrency=MAX_CONCURRENCY,
+        per_host=PER_HOST,
+        rate=REQUESTS_PER_SECOND,
+        retries=RETRIES,
+        backoff=BACKOFF,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        seed=None,
+    ):
+        # jma_common.http_client と同じく、requests は最初のクライアントを作るときに読み込む
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._requests = requests
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.limiter = HostLimiter(per_host, rate)
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="crawler-fetch")
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+        self.bytes_received = 0
+
+    def _get(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        return response.status_code, response.headers.get("Retry-After"), len(response.content), response.text
+
+    # 1 回分のリクエスト (ホストの制限を守る)
+    async def _attempt(self, url):
+        host = urlsplit(url).netloc
+        async with self.limiter.semaphore(host):
+            await self.limiter.wait(host)
+            self.requests += 1
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, self._get, url)
+        self.bytes_received += result[2]
+        return result
+
+    # url を取得する。やり直しても失敗したら FetchError
+    async def fetch(self, url):
+        attempt = 0
+        while True:
+            attempt += 1
+            wait = None
+            try:
+                status, retry_header, _, text = await self._attempt(url)
+            except self._requests.RequestException as e:
+                reason = f"{type(e).__name__}: {e}"
+            else:
+                if status < 400:
+                    return Page(url, status, text, attempt)
+                reason = f"HTTP {status}"
+                if status not in RETRY_STATUSES:
+                    self.failed += 1
+                    raise FetchError(url, reason, attempt)
+                wait = retry_after(retry_header) if status in (429, 503) else None
+            if attempt > self.retries:
+                self.failed += 1
+                raise FetchError(url, reason, attempt)
+            self.retried += 1
+            if wait is None:
+                wait = self._random.uniform(0, min(self.backoff * 2 ** (attempt - 1), MAX_BACKOFF))
+            await asyncio.sleep(min(wait, MAX_BACKOFF))
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "failed": self.failed,
+            "bytes_received": self.bytes_received,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
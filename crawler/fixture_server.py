@@ -0,0 +1,142 @@
+import html
+import re
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from jobs.storage import LISTING_COLUMNS
+
+# オフラインで巡回の動作確認・ベンチマークをするための求人サイトのスタブサーバ (jma_common.stub_server と同じ作り)
+# job_listings.db の行を使って、/jobs/1.html 〜 /jobs/<pages>.html の一覧ページ (crawler.listing_page の形) を
+# 起動時に作っておき、そのまま返す。各ページには先の 10 ページと 1 ページ目へのリンクがある
+
+SOURCE_DB = Path(__file__).resolve().parent.parent / "job_listings.db"
+
+PAGE_PATH = re.compile(r"^/jobs/(\d+)\.html$")
+
+# ページャに並べる先のページ数
+PAGER_WIDTH = 10
+
+
+def _listing_html(row):
+    item = dict(zip(LISTING_COLUMNS, row))
+    wages = "" if item["wages"] is None else f"月給 {item['wages']:,.0f}円"
+    fields = "\n".join(
+        f'    <span class="{name}">{html.escape(wages if name == "wages" else item[name] or "")}</span>'
+        for name in LISTING_COLUMNS
+    )
+    return f'  <div class="job">\n{fields}\n    <br>\n  </div>'
+
+
+def _page_html(number, pages, rows):
+    links = [1] + list(range(number + 1, min(number + PAGER_WIDTH, pages) + 1))
+    pager = " ".join(f'<a class="page" href="/jobs/{n}.html">{n}</a>' for n in links)
+    listings = "\n".join(_listing_html(row) for row in rows)
+    return (
+        f'<!DOCTYPE html>\n<html lang="ja">\n<head><meta charset="utf-8"><title>求人一覧 {number}</title></head>\n'
+        f'<body>\n<div class="jobs">\n{listings}\n</div>\n<nav>{pager}</nav>\n</body>\n</html>\n'
+    )
+
+
+# 一覧ページの HTML を作る ({ページ番号: 本文 (UTF-8)})。ベンチマーク用の保存済みページにも使う
+def build_pages(pages=100, per_page=20):
+    source = sqlite3.connect(SOURCE_DB)
+    originals = source.execute(f"SELECT {', '.join(LISTING_COLUMNS)} FROM job_listings ORDER BY id").fetchall()
+    source.close()
+    bodies = {}
+    for number in range(1, pages + 1):
+        start = (number - 1) * per_page
+        rows = [originals[i % len(originals)] for i in range(start, start + per_page)]
+        bodies[number] = _page_html(number, pages, rows).encode("utf-8")
+    return bodies
+
+
+class FixtureJobServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # fail_every: n 回目ごとのリクエストに 503 (Retry-After: 0) を返す (やり直しの確認用。0 なら返さない)
+    def __init__(self, address=("127.0.0.1", 0), pages=100, per_page=20, latency=0.0, fail_every=0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+        self.max_active = 0
+        self.listings = pages * per_page
+        self.bodies = build_pages(pages, per_page)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "max_active": self.max_active,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            number = server.requests
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+            match = PAGE_PATH.match(self.path)
+            body = server.bodies.get(int(match.group(1))) if match else None
+            if body is None:
+                self._send(404)
+            elif server.fail_every and number % server.fail_every == 0:
+                with server.lock:
+                    server.errors += 1
+                self._send(503, headers=[("Retry-After", "0")])
+            else:
+                self._send(200, body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+# スタブサーバを別スレッドで起動し、終了時に停止する
+@contextmanager
+def run_fixture_server(pages=100, per_page=20, latency=0.0, fail_every=0):
+    server = FixtureJobServer(pages=pages, per_page=per_page, latency=latency, fail_every=fail_every)
+    thread = threading.Thread(target=server.serve_forever, name="fixture-jobs", daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,94 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from jobs.storage import LISTING_COLUMNS
+
+# 求人一覧ページの解析 (標準ライブラリの html.parser を使う)
+# ノートブックの soup.find_all("div", class_="item-class") → item.find("span", class_="name") と同じく、
+# 求人 1 件を囲む要素のクラスと、項目ごとの要素のクラスで値を取り出す
+#
+#   <div class="job">
+#     <span class="work_name">介護職員</span> <span class="wages">月給 220,000円</span>
+#     <span class="office_name">…</span> <span class="office_place">…</span> <span class="employment_type">…</span>
+#   </div>
+#   <a class="page" href="/jobs/2.html">2</a>
+#
+# 項目のクラス名は job_listings の列名と同じにしておき、サイトごとの違いは ListingPageParser の引数で指定する
+
+ITEM_CLASS = "job"
+LINK_CLASS = "page"
+
+# 終了タグのない要素 (入れ子の深さに数えない)
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"))
+
+NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+# 賃金の文字列 ("月給 220,000円" など) から最初の数値を取り出す
+def parse_wages(text):
+    match = NUMBER.search(text or "")
+    return float(match.group().replace(",", "")) if match else None
+
+
+class ListingPageParser(HTMLParser):
+    def __init__(self, base_url, item_class=ITEM_CLASS, link_class=LINK_CLASS, fields=LISTING_COLUMNS):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.item_class = item_class
+        self.link_class = link_class
+        self.fields = set(fields)
+        self.rows = []
+        self.links = []
+        self._item = None
+        self._item_depth = 0
+        self._field = None
+        self._field_depth = 0
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag == "a" and self.link_class in classes and attrs.get("href"):
+            self.links.append(urljoin(self.base_url, attrs["href"]))
+        if tag in VOID_TAGS:
+            return
+        if self._item is not None:
+            self._item_depth += 1
+            if self._field is not None:
+                self._field_depth += 1
+            else:
+                field = next((name for name in classes if name in self.fields), None)
+                if field is not None:
+                    self._field, self._field_depth, self._text = field, 1, []
+        elif self.item_class in classes:
+            self._item, self._item_depth = {}, 1
+
+    def handle_endtag(self, tag):
+        if self._item is None or tag in VOID_TAGS:
+            return
+        if self._field is not None:
+            self._field_depth -= 1
+            if self._field_depth == 0:
+                self._item[self._field] = "".join(self._text).strip()
+                self._field = None
+        self._item_depth -= 1
+        if self._item_depth == 0:
+            self.rows.append(self._row(self._item))
+            self._item = None
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+    def _row(self, item):
+        return tuple(parse_wages(item.get(name)) if name == "wages" else item.get(name) for name in LISTING_COLUMNS)
+
+
+# ページの HTML から (求人の行のリスト, 次に巡回するリンクのリスト) を返す
+# 行は jobs.storage.insert_listings にそのまま渡せる LISTING_COLUMNS 順のタプル
+def parse_listing_page(url, html):
+    parser = ListingPageParser(url)
+    parser.feed(html)
+    parser.close()
+    return parser.rows, parser.links
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from crawler.fetch import MAX_CONCURRENCY, PER_HOST, REQUESTS_PER_SECOND, Fetcher, FetchError
+from crawler.listing_page import parse_listing_page
+from jobs import storage
+
+# 巡回の流れ: 取得 (Fetcher、並行) → 解析 (1 ページずつ) → SQLite への書き込み (まとめて)
+# 取得したページは上限つきのキューで解析に渡すので、解析が追いつかないときは取得が待つ
+# 解析で見つかったリンクはまだ見ていないものだけを巡回先に加える
+# 書き込みは専用のスレッド 1 本で行う (jobs.storage の接続はスレッドごとなので、接続も 1 本になる)
+#
+#   python -m crawler.pipeline https://example.com/jobs/1.html --db /tmp/crawl.db --max-pages 100
+
+# 解析待ちのページ数の上限
+QUEUE_SIZE = 64
+
+# 1 回の書き込みでまとめる行数
+BATCH_SIZE = 500
+
+
+# 1 回の巡回の結果
+class CrawlReport(NamedTuple):
+    pages: int
+    listings: int
+    failed: tuple
+    duration: float
+
+
+class Crawler:
+    def __init__(
+        self,
+        fetcher=None,
+        parse=parse_listing_page,
+        db_name=None,
+        workers=MAX_CONCURRENCY,
+        batch_size=BATCH_SIZE,
+        max_pages=None,
+    ):
+        self.fetcher = fetcher or Fetcher()
+        self.parse = parse
+        self.db_name = db_name
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pages = max_pages
+        self.pages = 0
+        self.listings = 0
+        self.failed = []
+        self._batch = []
+
+    # 巡回先のキューからページを取得して解析待ちのキューに入れる
+    async def _fetch_worker(self, frontier, pages):
+        while True:
+            url = await frontier.get()
+            try:
+                page = await self.fetcher.fetch(url)
+            except FetchError as e:
+                print(f"取得に失敗しました: {e}")
+                self.failed.append(url)
+                frontier.task_done()
+                continue
+            await pages.put(page)
+
+    # ページを解析し、求人を batch_size 件ずつ書き込み、新しいリンクを巡回先に加える
+    # 解析できないページは失敗として記録して続ける。書き込みの失敗はそれ以上続けても保存できないので、
+    # 例外のままこのタスクを終わらせ、run() が受け取る
+    async def _parse_stage(self, frontier, pages, seen, writer):
+        loop = asyncio.get_running_loop()
+        while True:
+            page = await pages.get()
+            try:
+                try:
+                    rows, links = self.parse(page.url, page.text)
+                except Exception as e:
+                    print(f"解析に失敗しました: {page.url}: {type(e).__name__}: {e}")
+                    self.failed.append(page.url)
+                    continue
+                self.pages += 1
+                for link in links:
+                    if link not in seen and (self.max_pages is None or len(seen) < self.max_pages):
+                        seen.add(link)
+                        frontier.put_nowait(link)
+                self._batch.extend(rows)
+                if len(self._batch) >= self.batch_size:
+                    batch, self._batch = self._batch, []
+                    await loop.run_in_executor(writer, self._write, batch)
+            finally:
+                # リンクを巡回先に加えてから完了にする (先に完了にすると frontier.join() が早く返ってしまう)
+                frontier.task_done()
+
+    def _write(self, rows):
+        self.listings += storage.insert_listings(rows, db_name=self.db_name)
+
+    # start_urls から巡回し、見つかった求人を書き込む
+    async def run(self, start_urls):
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        writer = ThreadPoolExecutor(1, thread_name_prefix="crawler-writer")
+        await loop.run_in_executor(writer, storage.init_db, self.db_name)
+        frontier = asyncio.Queue()
+        pages = asyncio.Queue(QUEUE_SIZE)
+        seen = set()
+        for url in start_urls:
+            if url not in seen:
+                seen.add(url)
+                frontier.put_nowait(url)
+        tasks = [asyncio.create_task(self._fetch_worker(frontier, pages)) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self._parse_stage(frontier, pages, seen, writer)))
+        join = asyncio.create_task(frontier.join())
+        try:
+            # 巡回し終わるか、どれかのタスクが例外で終わるまで待つ (例外で終わったタスクがあると join は返らない)
+            done, _ = await asyncio.wait([join, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not join:
+                    task.result()
+            # 最後の batch_size 件に満たない分
+            if self._batch:
+                batch, self._batch = self._batch, []
+                await loop.run_in_executor(writer, self._write, batch)
+        finally:
+            for task in tasks + [join]:
+                task.cancel()
+            await asyncio.gather(*tasks, join, return_exceptions=True)
+            await loop.run_in_executor(writer, storage.close_connections)
+            writer.shutdown()
+        return CrawlReport(self.pages, self.listings, tuple(self.failed), time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="求人一覧ページを巡回して job_listings に書き込む")
+    parser.add_argument("urls", nargs="+", help="巡回を始めるページ")
+    parser.add_argument("--db", default=None, help="SQLite ファイル (省略時は job_listings.db)")
+    parser.add_argument("--max-pages", type=int, default=None, help="巡回するページ数の上限")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=PER_HOST, help="1 ホストあたりの同時接続数")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="1 ホストあたりのリクエスト数/秒 (0 で制限なし)")
+    parser.add_argument("--parser", choices=("html.parser", "lxml", "selectolax"), default="html.parser",
+                        help="一覧ページの解析に使うもの (lxml / selectolax は crawler.extract の JOB_SITE)")
+    args = parser.parse_args()
+
+    parse = parse_listing_page
+    if args.parser != "html.parser":
+        from crawler.extract import make_extractor
+
+        parse = make_extractor(backend=args.parser).parse
+    fetcher = Fetcher(args.concurrency, args.per_host, args.rate)
+    crawler = Crawler(fetcher, parse, db_name=args.db, workers=args.concurrency, max_pages=args.max_pages)
+    try:
+        report = asyncio.run(crawler.run(args.urls))
+    finally:
+        fetcher.close()
+    print(f"{report.pages} ページ, 求人 {report.listings} 件, {report.duration:.2f} 秒 "
+          f"(失敗: {len(report.failed)} ページ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,21 @@
-import requests
-import flet as ft
+import time
 
-# 地域リストの取得エンドポイント
-AREA_URL = "http://www.jma.go.jp/bosai/common/const/area.json"
-FORECAST_URL_TEMPLATE = "https://www.jma.go.jp/bosai/forecast/data/forecast/{area_code}.json"
+# 起動時間の基準 (ここから最初の page.update() までを計測する)
+STARTED = time.perf_counter()
 
+import sys
+from pathlib import Path
 
-# 地域リストを取得する関数
-def fetch_area_list():
-    try:
-        response = requests.get(AREA_URL)
-        response.raise_for_status()
-        return response.json()  # JSONデータを返す
-    except Exception as e:
-        print(f"地域リストの取得中にエラーが発生しました: {e}")
-        return None
+import flet as ft
 
+# リポジトリ直下の共有モジュール (jma_common) を読み込めるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-# 天気予報を取得する関数
-def fetch_forecast(area_code):
-    try:
-        url = FORECAST_URL_TEMPLATE.format(area_code=area_code)
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"天気予報の取得中にエラーが発生しました: {e}")
-        return None
+from jma_common.area_index import get_area_index, start_background_refresh
+from jma_common.area_picker import AreaPicker
+from jma_common.forecast_cache import get_forecast
+from jma_common.forecast_view import ForecastView
+from jma_common.metrics import mark_first_update
 
 
 # Flet アプリのメイン関数
@@ -41,74 +30,50 @@ def main(page: ft.Page):
     )
 
     # サイドバー
-    sidebar = ft.Column(
-        controls=[
-            ft.Text("地域を選択", weight=ft.FontWeight.BOLD, color=ft.colors.WHITE),
-        ],
-        scroll=ft.ScrollMode.AUTO,
-        width=250,
-    )
-
-    # 地域リストを取得してサイドバーに追加
-    area_data = fetch_area_list()
-    if area_data:
-        for key, value in area_data.get("centers", {}).items():
-            dropdown = ft.Dropdown(
-                label=value["name"],
-                label_style=ft.TextStyle(color=ft.colors.WHITE),  # ドロップダウンラベルを白に設定
-                border_color=ft.colors.WHITE,  # ドロップダウンの枠を白に設定
-            )
-            for child in value.get("children", []):
-                dropdown.options.append(
-                    ft.dropdown.Option(text=f"{value['name']} ({child})", key=child)
-                )
-            dropdown.on_change = lambda e: on_select(e)
-            sidebar.controls.append(dropdown)
+    # 同梱の地域インデックスから階層をたどって選べる (ネットワークには依存しない)
+    # 最初は地方の一覧だけを送り、子地域は開いたときに作る
+    area_index = get_area_index()
+    sidebar = ft.Column(controls=[], width=250, expand=True)
+    if len(area_index):
+        picker = AreaPicker(area_index, on_select=lambda office: on_select(office))
+        sidebar.controls.append(picker.control)
     else:
         sidebar.controls.append(ft.Text("地域リストの取得に失敗しました", color=ft.colors.WHITE))
 
     # メインビュー
+    # 予報の一覧は ForecastView を使い回し、選択が変わっても変化した行だけを送る
+    status = ft.Text("Active View", style=ft.TextThemeStyle.HEADLINE_SMALL)
+    forecast_view = ForecastView()
     main_view = ft.Container(
-        content=ft.Text("Active View", style=ft.TextThemeStyle.HEADLINE_SMALL),
+        content=ft.Column(controls=[status, forecast_view.control], expand=True),
         alignment=ft.alignment.center,
         expand=True,
     )
 
     # 地域選択時のイベント処理
-    def on_select(e):
-        area_code = e.control.value  # 選択された地域コード
-        forecast_data = fetch_forecast(area_code)
+    def on_select(office):
+        area_code = office.code  # 選択された府県予報区のコード
+        forecast_data = get_forecast(area_code)  # 共有キャッシュ経由で取得
         if forecast_data:
             display_weather(forecast_data)
         else:
-            main_view.content = ft.Text(
-                "天気予報の取得に失敗しました", style=ft.TextThemeStyle.BODY_LARGE, color=ft.colors.RED
-            )
+            status.value = "天気予報の取得に失敗しました"
+            status.color = ft.colors.RED
+            forecast_view.clear()
         page.update()
 
     # 天気予報データを表示
     def display_weather(data):
         if data:
-            main_view.content = None  # メインビューの内容をクリア
-            report_datetime = data[0]["reportDatetime"]
-            time_series = data[0]["timeSeries"][0]
-
-            content = ft.Column(controls=[], scroll=ft.ScrollMode.AUTO)
-            content.controls.append(ft.Text(f"発表日時: {report_datetime}"))
-
-            time_defines = time_series["timeDefines"]
-            areas = time_series["areas"]
-            for area in areas:
-                content.controls.append(
-                    ft.Text(f"地域: {area['area']['name']}", size=20, weight="bold")
-                )
-                for i, time_define in enumerate(time_defines):
-                    weather = area["weathers"][i]
-                    wind = area["winds"][i] if i < len(area["winds"]) else "情報なし"
-                    content.controls.append(ft.Text(f"{time_define}: {weather} / {wind}"))
-            main_view.content = content
+            status.value = f"発表日時: {data[0]['reportDatetime']}"
+            status.color = None
         else:
-            main_view.content = ft.Text("データなし", color="red")
+            status.value = "データなし"
+            status.color = ft.colors.RED
+        forecast_view.render(data)
+
+    # ヘッダーを設定 (page.add の前に設定して最初の更新に含める)
+    page.appbar = app_bar
 
     # ページのレイアウトを作成
     page.add(
@@ -120,9 +85,11 @@ def main(page: ft.Page):
             expand=True,
         )
     )
+    mark_first_update(STARTED)
 
-    # ヘッダーを設定
-    page.appbar = app_bar
+    # 検索用の配列の作成と地域リストの更新確認は最初の画面を出した後に行う
+    page.run_thread(area_index.prepare_search)
+    start_background_refresh()
 
 
 ft.app(target=main)
\ No newline at end of file
@@ -0,0 +1 @@
+# jma / jma2 アプリで共有する気象庁データ処理モジュール群
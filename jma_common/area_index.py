@@ -0,0 +1,204 @@
+import bisect
+import json
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import NamedTuple
+
+from jma_common.http_client import JMA_BASE_URL, get_client
+
+# 地域リストの取得エンドポイント
+AREA_URL = JMA_BASE_URL + "/bosai/common/const/area.json"
+
+# リポジトリに同梱している area.json (起動時はネットワークに依存せずこれを読む)
+BUNDLED_AREA_PATH = Path(__file__).resolve().parent.parent / "jma" / "area.json"
+
+# 階層の並び (上位 → 下位)
+LEVELS = ("centers", "offices", "class10s", "class15s", "class20s")
+
+# 画面表示用の階層名
+LEVEL_LABELS = {
+    "centers": "地方",
+    "offices": "府県予報区",
+    "class10s": "一次細分区域",
+    "class15s": "市町村等をまとめた地域",
+    "class20s": "市町村",
+}
+
+# バックグラウンド更新の間隔 (秒)
+REFRESH_INTERVAL = 6 * 60 * 60
+
+
+# 1 地域分のコンパクトな表現
+class Area(NamedTuple):
+    code: str
+    level: str
+    name: str
+    en_name: str
+    kana: str
+    parent: str
+    children: tuple
+
+
+# 検索用に文字列をそろえる (全角・半角の統一、小文字化、カタカナ → ひらがな)
+def normalize_query(text):
+    text = unicodedata.normalize("NFKC", text).strip().lower()
+    return "".join(chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text)
+
+
+# area.json を階層ごとの辞書に変換した読み取り専用のインデックス
+class AreaIndex:
+    def __init__(self, raw):
+        self._search_keys = None
+        self._search_lock = threading.Lock()
+        self.levels = {}
+        for level in LEVELS:
+            entries = {}
+            for code, value in raw.get(level, {}).items():
+                entries[code] = Area(
+                    code=code,
+                    level=level,
+                    name=value.get("name", ""),
+                    en_name=value.get("enName", ""),
+                    kana=value.get("kana", ""),
+                    parent=value.get("parent", ""),
+                    children=tuple(value.get("children", ())),
+                )
+            self.levels[level] = entries
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.levels.values())
+
+    # 指定した階層の地域を取得 (存在しなければ None)
+    def get(self, level, code):
+        return self.levels[level].get(code)
+
+    # 指定した階層の地域をすべて返す
+    def all(self, level):
+        return self.levels[level].values()
+
+    def centers(self):
+        return self.all("centers")
+
+    def office_codes(self):
+        return list(self.levels["offices"])
+
+    # 子地域 (1 つ下の階層) を Area のリストで返す
+    def children(self, level, code):
+        area = self.get(level, code)
+        if area is None:
+            return []
+        child_level = LEVELS[LEVELS.index(level) + 1]
+        entries = self.levels[child_level]
+        return [entries[c] for c in area.children if c in entries]
+
+    # 気象台 (府県予報区) までさかのぼる。centers では None
+    def office_of(self, level, code):
+        while level != "offices":
+            area = self.get(level, code)
+            if area is None or level == "centers":
+                return None
+            level, code = LEVELS[LEVELS.index(level) - 1], area.parent
+        return self.get("offices", code)
+
+    # 全階層の名前・よみ・英語名を並べた検索用の配列 (初回の検索時に 1 回だけ作る)
+    def _build_search_keys(self):
+        entries = []
+        for rank, level in enumerate(LEVELS):
+            for area in self.levels[level].values():
+                for key in {area.name, area.kana, area.en_name}:
+                    if key:
+                        entries.append((normalize_query(key), rank, area.code))
+        entries.sort()
+        return [e[0] for e in entries], [(LEVELS[e[1]], e[2]) for e in entries]
+
+    # 検索用の配列を用意する (最初の画面を出した後にバックグラウンドで呼んでおくと初回の検索が待たされない)
+    def prepare_search(self):
+        if self._search_keys is None:
+            with self._search_lock:
+                if self._search_keys is None:
+                    self._search_keys = self._build_search_keys()
+        return self._search_keys
+
+    # 名前・よみ (ひらがな / カタカナ)・英語名の前方一致で全階層を検索する
+    # ソート済み配列の二分探索なので、件数によらず最初の候補までは O(log n)
+    def search(self, query, limit=50):
+        query = normalize_query(query)
+        if not query:
+            return []
+        keys, targets = self.prepare_search()
+        results = []
+        seen = set()
+        i = bisect.bisect_left(keys, query)
+        while i < len(keys) and keys[i].startswith(query) and len(results) < limit:
+            if targets[i] not in seen:
+                seen.add(targets[i])
+                results.append(self.get(*targets[i]))
+            i += 1
+        return results
+
+    # 最下層 (class20s) の件数
+    def leaf_count(self):
+        return len(self.levels["class20s"])
+
+
+_index = None
+_index_lock = threading.Lock()
+_refresh_thread = None
+
+
+# 同梱ファイルからインデックスを構築する
+def load_bundled_index(path=BUNDLED_AREA_PATH):
+    with open(path, encoding="utf-8") as f:
+        return AreaIndex(json.load(f))
+
+
+# プロセス全体で共有するインデックスを返す (初回のみ同梱ファイルを読む)
+def get_area_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = load_bundled_index()
+    return _index
+
+
+# 上流の area.json が更新されていればインデックスを差し替える
+# 変更がなければ (304 もしくは内容が同一) 何もしない。差し替えた場合は True を返す
+def refresh_area_index():
+    global _index
+    current = get_area_index()
+    try:
+        result = get_client().fetch_json(AREA_URL)
+    except Exception as e:
+        print(f"地域リストの更新中にエラーが発生しました: {e}")
+        return False
+    if result.not_modified:
+        return False
+
+    updated = AreaIndex(result.data)
+    if updated.levels == current.levels:
+        return False
+    # 差し替えた直後の検索で配列を作ることにならないよう、このスレッドで先に用意しておく
+    updated.prepare_search()
+    with _index_lock:
+        _index = updated
+    return True
+
+
+# 定期的に refresh_area_index を呼ぶデーモンスレッドを起動する (プロセスで 1 回だけ)
+def start_background_refresh(interval=REFRESH_INTERVAL):
+    global _refresh_thread
+    with _index_lock:
+        if _refresh_thread is not None:
+            return _refresh_thread
+
+        def loop():
+            while True:
+                refresh_area_index()
+                time.sleep(interval)
+
+        _refresh_thread = threading.Thread(target=loop, name="area-index-refresh", daemon=True)
+        _refresh_thread.start()
+        return _refresh_thread
@@ -0,0 +1,100 @@
+import flet as ft
+
+from jma_common.area_index import LEVEL_LABELS, LEVELS
+
+# 1 項目の高さ
+ITEM_HEIGHT = 56
+
+# 検索結果として表示する最大件数
+SEARCH_LIMIT = 50
+
+
+# 階層をたどって地域を選ぶサイドバー
+# 最初は地方 (centers) だけを表示し、子地域は開いたときに作る。
+# 検索欄では全階層 (市町村まで) を名前・よみの前方一致で探せる。
+# 地域を選ぶと、その地域を含む府県予報区の Area を on_select に渡す
+class AreaPicker:
+    def __init__(self, index, on_select, color=ft.colors.WHITE):
+        self.index = index
+        self.on_select = on_select
+        self.color = color
+        self.path = []  # 開いている地域の (level, code) の並び
+        self.search_field = ft.TextField(
+            hint_text="地域名・よみで検索",
+            on_change=self._on_search,
+            dense=True,
+            border_color=color,
+            color=color,
+            prefix_icon=ft.icons.SEARCH,
+        )
+        self.back_button = ft.IconButton(ft.icons.ARROW_BACK, icon_color=color, on_click=self._on_back, visible=False)
+        self.title = ft.Text("地域を選択", weight=ft.FontWeight.BOLD, color=color)
+        self.list = ft.ListView(controls=[], item_extent=ITEM_HEIGHT, expand=True)
+        self.control = ft.Column(
+            controls=[self.search_field, ft.Row(controls=[self.back_button, self.title]), self.list],
+            expand=True,
+        )
+        self._show(list(index.centers()))
+
+    def _tile(self, area, show_level=False):
+        has_children = area.level != LEVELS[-1] and bool(area.children)
+        subtitle = LEVEL_LABELS[area.level]
+        if show_level and area.level not in ("centers", "offices"):
+            office = self.index.office_of(area.level, area.code)
+            if office is not None:
+                subtitle = f"{subtitle} / {office.name}"
+        return ft.ListTile(
+            title=ft.Text(area.name, color=self.color),
+            subtitle=ft.Text(subtitle, color=self.color, size=11),
+            trailing=ft.IconButton(
+                ft.icons.CHEVRON_RIGHT,
+                icon_color=self.color,
+                on_click=lambda e, a=area: self._open(a),
+            ) if has_children else None,
+            on_click=lambda e, a=area: self._choose(a),
+            dense=True,
+        )
+
+    def _show(self, areas, show_level=False):
+        self.list.controls = [self._tile(area, show_level) for area in areas]
+
+    # 子地域を開く (その時点で初めて子の項目を作る)
+    def _open(self, area):
+        self.path.append((area.level, area.code))
+        self._show(self.index.children(area.level, area.code))
+        self.title.value = area.name
+        self.back_button.visible = True
+        self.control.update()
+
+    def _on_back(self, e):
+        self.path.pop()
+        if self.path:
+            level, code = self.path[-1]
+            self._show(self.index.children(level, code))
+            self.title.value = self.index.get(level, code).name
+        else:
+            self._show(list(self.index.centers()))
+            self.title.value = "地域を選択"
+            self.back_button.visible = False
+        self.control.update()
+
+    def _choose(self, area):
+        if area.level == "centers":
+            self._open(area)
+            return
+        office = self.index.office_of(area.level, area.code)
+        if office is not None:
+            self.on_select(office)
+
+    def _on_search(self, e):
+        query = self.search_field.value or ""
+        if query.strip():
+            self.path.clear()
+            self._show(self.index.search(query, SEARCH_LIMIT), show_level=True)
+            self.title.value = "検索結果"
+            self.back_button.visible = False
+        else:
+            self.path.clear()
+            self._show(list(self.index.centers()))
+            self.title.value = "地域を選択"
+        self.control.update()
@@ -0,0 +1,70 @@
+import argparse
+import os
+
+from jma_common import storage
+
+# 既存の weather_forecast.db を新しいスキーマに移行し、重複行を取り除いてその場で縮める
+# 移行元の旧形式のテーブルは *_legacy として残る。中身を確かめてから --drop-legacy で削除する
+#
+#   python -m jma_common.compact weather_forecast.db [他の DB ...]
+#   python -m jma_common.compact --drop-legacy weather_forecast.db
+
+# 行数を数える予報のテーブル (旧形式・新しいスキーマ・移行後に残した *_legacy)
+# area / areas / offices などの名前の表は数えない
+COUNTED_TABLES = ("forecasts", "weather", "weather_series", "pop_series", "temp_series")
+LEGACY_COUNTED_TABLES = tuple(t + storage.LEGACY_SUFFIX for t in ("forecasts", "weather"))
+
+
+# テーブルごとの行数 (tables のうち DB にあるものだけ)
+def _row_counts(conn, tables):
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in tables
+        if table in existing
+    }
+
+
+def compact_file(path, drop_legacy=False):
+    conn = storage.get_connection(path)
+    before = sum(_row_counts(conn, COUNTED_TABLES + LEGACY_COUNTED_TABLES).values())
+    size_before = os.path.getsize(path)
+    # 旧形式なら移行 (同じキーの行は 1 行にまとまる。細分区域の決まらない行は init_db が行数を表示する)
+    migration = storage.init_db(path)
+    if migration is not None:
+        print(f"{path}: 旧形式から {migration.migrated} 行を移行しました (移行していない行 {migration.skipped} 行)")
+    if drop_legacy:
+        legacy_rows = sum(_row_counts(conn, LEGACY_COUNTED_TABLES).values())
+        dropped = storage.drop_legacy_tables(conn)
+        lost = f"、うち移行していない行 {migration.skipped} 行" if migration is not None and migration.skipped else ""
+        print(f"{path}: 旧形式のテーブルを削除しました: {', '.join(dropped) or 'なし'} (予報 {legacy_rows} 行{lost})")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    after = sum(_row_counts(conn, COUNTED_TABLES + LEGACY_COUNTED_TABLES).values())
+    legacy_after = sum(_row_counts(conn, LEGACY_COUNTED_TABLES).values())
+    print(
+        f"{path}: {before} 行 → {after} 行 (うち旧形式のテーブル {legacy_after} 行) "
+        f"({size_before / 1024:.1f} KiB → {os.path.getsize(path) / 1024:.1f} KiB)"
+    )
+    kept = storage.legacy_tables(conn)
+    if kept:
+        print(
+            f"{path}: 旧形式のテーブル ({', '.join(kept)}) を残しているので、何も削除していません。"
+            "移行した行の分だけ DB は大きくなります (削除するには --drop-legacy)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="予報 DB を移行して重複行を削除する")
+    parser.add_argument("paths", nargs="+", help="対象の SQLite ファイル")
+    parser.add_argument("--drop-legacy", action="store_true", help="移行済みの旧形式のテーブル (*_legacy) を削除する")
+    args = parser.parse_args()
+    for path in args.paths:
+        if not os.path.exists(path):
+            parser.error(f"{path} が見つかりません")
+        compact_file(path, args.drop_legacy)
+    storage.close_connections()
+
+
+if __name__ == "__main__":
+    main()
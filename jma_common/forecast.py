@@ -0,0 +1,14 @@
+from jma_common.http_client import JMA_BASE_URL, get_client
+
+# 天気予報の取得エンドポイント
+FORECAST_URL_TEMPLATE = JMA_BASE_URL + "/bosai/forecast/data/forecast/{area_code}.json"
+
+
+# 天気予報を取得する関数
+def fetch_forecast(area_code):
+    try:
+        url = FORECAST_URL_TEMPLATE.format(area_code=area_code)
+        return get_client().get_json(url)
+    except Exception as e:
+        print(f"天気予報の取得中にエラーが発生しました: {e}")
+        return None
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from jma_common.forecast import fetch_forecast
+
+JST = timezone(timedelta(hours=9))
+
+# 気象庁の府県天気予報は毎日 5時・11時・17時 (JST) に発表される
+PUBLISH_HOURS = (5, 11, 17)
+
+# 発表時刻ちょうどには配信が間に合わないことがあるので少し待ってから失効させる
+PUBLISH_GRACE = timedelta(minutes=10)
+
+# reportDatetime が読めない場合の TTL
+FALLBACK_TTL = timedelta(minutes=30)
+
+# 次の発表時刻を過ぎても新しい予報が出ていない場合の再取得間隔
+RETRY_TTL = timedelta(minutes=5)
+
+DEFAULT_MAXSIZE = 128
+
+
+# 指定時刻より後の最初の発表時刻を返す
+def next_publication(after):
+    after = after.astimezone(JST)
+    day = after.replace(minute=0, second=0, microsecond=0)
+    for days in (0, 1):
+        base = day + timedelta(days=days)
+        for hour in PUBLISH_HOURS:
+            candidate = base.replace(hour=hour)
+            if candidate > after:
+                return candidate
+    raise AssertionError("unreachable")
+
+
+# 予報データの reportDatetime を取り出す (なければ None)
+def report_datetime_of(data):
+    try:
+        return datetime.fromisoformat(data[0]["reportDatetime"])
+    except (LookupError, TypeError, ValueError):
+        return None
+
+
+# 予報データが失効する時刻 (UNIX 時間) を計算する
+def expiry_for(data, now=None):
+    now = datetime.now(JST) if now is None else now
+    reported = report_datetime_of(data)
+    if reported is None:
+        return (now + FALLBACK_TTL).timestamp()
+    expires = next_publication(reported) + PUBLISH_GRACE
+    if expires <= now:
+        # 次の発表時刻を過ぎても古い予報のままなら、少し待って取り直す
+        expires = now + RETRY_TTL
+    return expires.timestamp()
+
+
+class _Entry:
+    __slots__ = ("data", "expires_at")
+
+    def __init__(self, data, expires_at):
+        self.data = data
+        self.expires_at = expires_at
+
+
+# 同時に同じ地域を取得しようとしたリクエストを 1 回の取得にまとめるための待ち合わせ
+class _InFlight:
+    __slots__ = ("done", "data")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+
+
+# プロセス全体で共有する天気予報キャッシュ (LRU + 発表時刻に合わせた TTL)
+class ForecastCache:
+    def __init__(self, fetch=fetch_forecast, maxsize=DEFAULT_MAXSIZE, clock=time.time):
+        self.fetch = fetch
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.collapsed = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # キャッシュから予報を返す。なければ (もしくは失効していれば) 取得する
+    def get(self, area_code):
+        with self._lock:
+            entry = self._entries.get(area_code)
+            if entry is not None and entry.expires_at > self.clock():
+                self._entries.move_to_end(area_code)
+                self.hits += 1
+                return entry.data
+            if entry is None:
+                self.misses += 1
+            else:
+                self.stale += 1
+
+            waiter = self._in_flight.get(area_code)
+            if waiter is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                waiter = self._in_flight[area_code] = _InFlight()
+                leader = True
+
+        if not leader:
+            waiter.done.wait()
+            return waiter.data
+
+        try:
+            data = self.fetch(area_code)
+            if data:
+                self.put(area_code, data)
+            elif entry is not None:
+                # 取得に失敗したら失効済みでも手元のデータを返す
+                data = entry.data
+            waiter.data = data
+            return data
+        finally:
+            with self._lock:
+                del self._in_flight[area_code]
+            waiter.done.set()
+
+    # 取得済みの予報をキャッシュに登録する
+    def put(self, area_code, data):
+        expires_at = expiry_for(data, datetime.fromtimestamp(self.clock(), JST))
+        with self._lock:
+            self._entries[area_code] = _Entry(data, expires_at)
+            self._entries.move_to_end(area_code)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, area_code=None):
+        with self._lock:
+            if area_code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(area_code, None)
+
+    # キャッシュサイズの調整用カウンタ
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "collapsed": self.collapsed,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# プロセス全体で共有するキャッシュ
+forecast_cache = ForecastCache()
+
+
+# キャッシュ経由で天気予報を取得する関数
+def get_forecast(area_code):
+    return forecast_cache.get(area_code)
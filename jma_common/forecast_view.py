@@ -0,0 +1,127 @@
+import flet as ft
+
+from jma_common import history
+
+# 1 行の高さ。ListView に item_extent を渡しておくと、画面外の行の配置計算を省ける
+ROW_HEIGHT = 32
+
+HEADER = "header"
+ROW = "row"
+
+# 天気コードの先頭の数字による大まかな分類
+WEATHER_GROUPS = {"1": "晴れ", "2": "くもり", "3": "雨", "4": "雪"}
+
+
+def _at(values, i, default=""):
+    return values[i] if values and i < len(values) and values[i] != "" else default
+
+
+# 予報データを表示用の行 (種類, 文字列) のリストに変換する
+# daily の天気・風 (timeSeries[0])、降水確率 (timeSeries[1])、気温 (timeSeries[2])
+# と weekly (data[1]) の週間予報を含む
+def forecast_lines(data):
+    lines = []
+    time_series = data[0]["timeSeries"]
+    pops = {}
+    if len(time_series) > 1:
+        times = [t[11:16] for t in time_series[1]["timeDefines"]]
+        for area in time_series[1]["areas"]:
+            pops[area["area"]["code"]] = [
+                f"{t} {p}%" for t, p in zip(times, area.get("pops", ())) if p != ""
+            ]
+
+    weather = time_series[0]
+    for area in weather["areas"]:
+        lines.append((HEADER, f"地域: {area['area']['name']}"))
+        for i, time_define in enumerate(weather["timeDefines"]):
+            wind = _at(area.get("winds"), i, "情報なし")
+            lines.append((ROW, f"{time_define}: {_at(area.get('weathers'), i)} / {wind}"))
+        if pops.get(area["area"]["code"]):
+            lines.append((ROW, "降水確率: " + " / ".join(pops[area["area"]["code"]])))
+
+    if len(time_series) > 2:
+        lines.append((HEADER, "気温"))
+        for area in time_series[2]["areas"]:
+            temps = [t for t in area.get("temps", ()) if t != ""]
+            lines.append((ROW, f"{area['area']['name']}: {' / '.join(temps)} ℃"))
+
+    if len(data) > 1:
+        weekly = data[1]["timeSeries"]
+        days = [t[:10] for t in weekly[0]["timeDefines"]]
+        temps = weekly[1]["areas"][0] if len(weekly) > 1 and weekly[1]["areas"] else {}
+        for area in weekly[0]["areas"]:
+            lines.append((HEADER, f"週間予報: {area['area']['name']}"))
+            for i, day in enumerate(days):
+                code = _at(area.get("weatherCodes"), i)
+                text = f"{day}: {WEATHER_GROUPS.get(code[:1], '')} ({code})" if code else f"{day}:"
+                pop = _at(area.get("pops"), i)
+                if pop:
+                    text += f" 降水確率 {pop}%"
+                low, high = _at(temps.get("tempsMin"), i), _at(temps.get("tempsMax"), i)
+                if low or high:
+                    text += f" 気温 {low}〜{high} ℃"
+                lines.append((ROW, text))
+    return lines
+
+
+# 表示中の予報の時刻ごとに、保存済みの発表ごとの天気の移り変わりを表示用の行にする
+# (jma_common.history.forecast_revisions の daily の発表。1 件しか保存されていない時刻は省く)
+# storage の接続はスレッドごとなので、DB に書き込むのと同じスレッドで呼ぶ
+def revision_lines(data, conn=None):
+    weather = data[0]["timeSeries"][0]
+    lines = []
+    for area in weather["areas"]:
+        for time_define in weather["timeDefines"]:
+            rows = [row for row in history.forecast_revisions(area["area"]["code"], time_define, conn)
+                    if row[1] == "daily"]
+            if len(rows) < 2:
+                continue
+            changes = sum(row[-1] for row in rows)
+            texts = " → ".join(row[3] or str(row[2] or "不明") for row in rows)
+            lines.append((ROW, f"{area['area']['name']} {time_define}: {texts} ({changes} 回変化)"))
+    if lines:
+        lines.insert(0, (HEADER, "予報の変化 (保存済みの発表)"))
+    return lines
+
+
+# 予報の一覧表示
+# 行ごとの ft.Text を使い回し、前回と違う行の値だけを書き換える
+# (変更のない行は page.update() の差分に含まれない)
+class ForecastView:
+    def __init__(self):
+        self.control = ft.ListView(controls=[], item_extent=ROW_HEIGHT, expand=True)
+        self.lines = []
+        self.patched = 0  # 直前の render で書き換えた行数
+
+    @staticmethod
+    def _apply(text, kind, value):
+        text.value = value
+        if kind == HEADER:
+            text.size = 18
+            text.weight = ft.FontWeight.BOLD
+        else:
+            text.size = None
+            text.weight = None
+
+    # extra は予報の後ろに続ける行 (revision_lines など)
+    def render(self, data, extra=()):
+        lines = (forecast_lines(data) if data else []) + list(extra)
+        controls = self.control.controls
+        patched = 0
+        for i, (kind, value) in enumerate(lines):
+            if i < len(controls):
+                if i < len(self.lines) and self.lines[i] == (kind, value):
+                    continue
+                self._apply(controls[i], kind, value)
+            else:
+                text = ft.Text()
+                self._apply(text, kind, value)
+                controls.append(text)
+            patched += 1
+        del controls[len(lines):]
+        self.lines = lines
+        self.patched = patched
+        return patched
+
+    def clear(self):
+        return self.render(None)
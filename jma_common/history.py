@@ -0,0 +1,138 @@
+import argparse
+from datetime import datetime
+
+from jma_common import storage
+from jma_common.forecast_cache import JST
+
+# weather_forecast.db に蓄積した予報履歴を読み出す
+# どの関数も結果をリストにせず sqlite3 のカーソルをそのまま返すので、行は 1 件ずつ読み出される
+#
+#   python -m jma_common.history range 130000 2024-12-17 2024-12-20
+#   python -m jma_common.history latest
+#   python -m jma_common.history changes 130010 2024-12-18T00:00:00+09:00
+
+# 系列ごとのテーブルと取り出す列
+SERIES = {
+    "weather": (
+        "weather_series",
+        "s.weather_code, wt.text AS weather, wd.text AS wind, s.reliability",
+        "LEFT JOIN weather_texts wt ON wt.id = s.weather_id LEFT JOIN wind_texts wd ON wd.id = s.wind_id",
+    ),
+    "pop": ("pop_series", "s.pop", ""),
+    "temp": ("temp_series", "s.temp, s.temp_min, s.temp_max", ""),
+}
+
+
+# datetime / ISO 8601 文字列 / UNIX 時間を UNIX 時間 (秒) にそろえる
+def epoch_of(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=JST)
+    return int(value.timestamp())
+
+
+def _connection(conn):
+    return conn if conn is not None else storage.get_connection()
+
+
+# 気象台 office_code の予報のうち、予報対象時刻が start 以上 end 未満のものを返す
+# 各行: (area_code, forecast_time, report_time, kind, <系列ごとの列>...)
+def forecasts_between(office_code, start, end, series="weather", conn=None):
+    table, columns, joins = SERIES[series]
+    return _connection(conn).execute(f'''
+    SELECT s.area_code, s.forecast_time, r.report_time, r.kind, {columns}
+    FROM forecast_areas a
+    JOIN {table} s ON s.area_code = a.code AND s.forecast_time >= ? AND s.forecast_time < ?
+    JOIN reports r ON r.id = s.report_id
+    {joins}
+    WHERE a.office_code = ?
+    ORDER BY s.area_code, s.forecast_time, r.report_time''', (epoch_of(start), epoch_of(end), office_code))
+
+
+# 気象台・種類 (daily / weekly) ごとの最新の発表を返す
+# 各行: (office_code, kind, report_time, report_id)
+# reports を全件走査せず、(気象台, 種類) ごとに UNIQUE (office_code, kind, report_time) 索引の末尾を 1 件引く
+def latest_reports(conn=None):
+    kinds = ", ".join(f"('{kind}')" for kind in storage.REPORT_KINDS)
+    return _connection(conn).execute(f'''
+    WITH kinds (kind) AS (VALUES {kinds})
+    SELECT r.office_code, r.kind, r.report_time, r.id
+    FROM offices o CROSS JOIN kinds k
+    JOIN reports r ON r.id = (
+        SELECT id FROM reports
+        WHERE office_code = o.code AND kind = k.kind
+        ORDER BY report_time DESC LIMIT 1
+    )
+    ORDER BY r.office_code, r.kind''')
+
+
+# ある地域・予報対象時刻について、発表ごとの予報と前回 (同じ種類の発表) からの変化を返す
+# 各行: (report_time, kind, weather_code, weather, changed)
+def forecast_revisions(area_code, forecast_time, conn=None):
+    return _connection(conn).execute('''
+    SELECT report_time, kind, weather_code, weather,
+           prev_id IS NOT NULL AND (weather_code IS NOT prev_code OR weather_id IS NOT prev_id) AS changed
+    FROM (
+        SELECT r.report_time, r.kind, s.weather_code, s.weather_id, wt.text AS weather,
+               LAG(s.weather_id) OVER w AS prev_id,
+               LAG(s.weather_code) OVER w AS prev_code
+        FROM weather_series s
+        JOIN reports r ON r.id = s.report_id
+        LEFT JOIN weather_texts wt ON wt.id = s.weather_id
+        WHERE s.area_code = ? AND s.forecast_time = ?
+        WINDOW w AS (PARTITION BY r.kind ORDER BY r.report_time)
+    )
+    ORDER BY kind, report_time''', (area_code, epoch_of(forecast_time)))
+
+
+# ある地域・予報対象時刻について、予報が何回変わったかを返す
+def count_forecast_changes(area_code, forecast_time, conn=None):
+    return sum(row[-1] for row in forecast_revisions(area_code, forecast_time, conn))
+
+
+def _iso(value):
+    return datetime.fromtimestamp(value, JST).isoformat() if isinstance(value, int) else value
+
+
+def _print_rows(rows, time_columns):
+    for row in rows:
+        print("\t".join(
+            "" if v is None else str(_iso(v) if i in time_columns else v) for i, v in enumerate(row)
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="予報履歴の検索")
+    parser.add_argument("--db", default=None, help="SQLite ファイル (省略時は weather_forecast.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    range_parser = commands.add_parser("range", help="気象台の予報を期間で検索")
+    range_parser.add_argument("office_code")
+    range_parser.add_argument("start")
+    range_parser.add_argument("end")
+    range_parser.add_argument("--series", choices=SERIES, default="weather")
+
+    commands.add_parser("latest", help="気象台ごとの最新の発表")
+
+    changes_parser = commands.add_parser("changes", help="予報対象時刻ごとの予報の変化")
+    changes_parser.add_argument("area_code")
+    changes_parser.add_argument("forecast_time")
+
+    args = parser.parse_args()
+    storage.init_db(args.db)
+    conn = storage.get_connection(args.db)
+    if args.command == "range":
+        _print_rows(forecasts_between(args.office_code, args.start, args.end, args.series, conn), {1, 2})
+    elif args.command == "latest":
+        _print_rows(latest_reports(conn), {2})
+    else:
+        rows = list(forecast_revisions(args.area_code, args.forecast_time, conn))
+        _print_rows(rows, {0})
+        print(f"変化: {sum(row[-1] for row in rows)} 回")
+
+
+if __name__ == "__main__":
+    main()
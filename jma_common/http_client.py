@@ -0,0 +1,144 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+# 気象庁サイトのベース URL (スタブサーバで試すときは環境変数で差し替える)
+JMA_BASE_URL = os.environ.get("JMA_BASE_URL", "https://www.jma.go.jp").rstrip("/")
+
+# 接続・読み込みのタイムアウト (秒)
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+
+# 1 ホストあたりに保持する keep-alive 接続の数
+POOL_MAXSIZE = 16
+
+# 条件付き GET のために覚えておく URL の数
+VALIDATOR_CACHE_SIZE = 256
+
+
+# 条件付き GET の結果
+class FetchResult(NamedTuple):
+    data: object
+    not_modified: bool
+    etag: str
+    last_modified: str
+
+
+# ETag / Last-Modified と本文をまとめて覚えておく
+class _Validator(NamedTuple):
+    etag: str
+    last_modified: str
+    data: object
+
+
+# 気象庁エンドポイント用の HTTP クライアント
+# 接続を使い回し、gzip を要求し、前回の ETag / Last-Modified で条件付き GET を行う
+class JmaClient:
+    def __init__(
+        self,
+        pool_maxsize=POOL_MAXSIZE,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        retries=2,
+    ):
+        # requests (と urllib3) は読み込みに 100ms 以上かかるので、最初の画面表示に必要ない
+        # モジュールの import 時ではなく、クライアントを初めて作るときに読み込む
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=("GET",),
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._validators = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+
+    # JSON を取得し、変更がなければ (304) 前回の本文を返す
+    def fetch_json(self, url):
+        with self._lock:
+            validator = self._validators.get(url)
+        headers = {}
+        if validator is not None:
+            if validator.etag:
+                headers["If-None-Match"] = validator.etag
+            if validator.last_modified:
+                headers["If-Modified-Since"] = validator.last_modified
+
+        response = self._get(url, headers)
+        if response.status_code == 304 and validator is not None:
+            with self._lock:
+                self.not_modified += 1
+                self._validators.move_to_end(url)
+            return FetchResult(validator.data, True, validator.etag, validator.last_modified)
+
+        # 条件を付けていないのに 304 が返った (途中のキャッシュが別の要求の結果を返したなど) ときは
+        # 返せる本文がないので、キャッシュを通さずに 1 回だけ取り直し、それでも 304 ならエラーにする
+        if response.status_code == 304:
+            response = self._get(url, {"Cache-Control": "no-cache", "Pragma": "no-cache"})
+            if response.status_code == 304:
+                from requests import HTTPError
+
+                raise HTTPError(f"304 Not Modified (条件付きでない要求): {url}", response=response)
+
+        response.raise_for_status()
+        data = response.json()
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+        if etag or last_modified:
+            with self._lock:
+                self._validators[url] = _Validator(etag, last_modified, data)
+                self._validators.move_to_end(url)
+                while len(self._validators) > VALIDATOR_CACHE_SIZE:
+                    self._validators.popitem(last=False)
+        return FetchResult(data, False, etag, last_modified)
+
+    def _get(self, url, headers):
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += int(response.headers.get("Content-Length", len(response.content)))
+        return response
+
+    def get_json(self, url):
+        return self.fetch_json(url).data
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "bytes_received": self.bytes_received,
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+# プロセス全体で共有するクライアントを返す
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = JmaClient()
+    return _client
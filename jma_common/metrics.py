@@ -0,0 +1,73 @@
+import bisect
+import threading
+import time
+
+# レイテンシ計測用のバケット境界 (ミリ秒)。1ms から約 33 秒まで 2 倍刻み
+DEFAULT_BOUNDS_MS = tuple(2.0 ** i for i in range(16))
+
+
+# 固定バケットのレイテンシヒストグラム (p50 / p95 などをバケット単位で推定する)
+class LatencyHistogram:
+    def __init__(self, name, bounds_ms=DEFAULT_BOUNDS_MS):
+        self.name = name
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    # 1 回分の計測値 (秒) を記録する
+    def observe(self, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+            self.total += 1
+            self.sum_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    # q (0〜1) 分位点を含むバケットの上限をミリ秒で返す
+    def percentile(self, q):
+        with self._lock:
+            if not self.total:
+                return 0.0
+            rank = q * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return min(self.bounds_ms[i], self.max_ms) if i < len(self.bounds_ms) else self.max_ms
+            return self.max_ms
+
+    def snapshot(self):
+        with self._lock:
+            total, sum_ms, max_ms = self.total, self.sum_ms, self.max_ms
+        return {
+            "name": self.name,
+            "count": total,
+            "mean_ms": sum_ms / total if total else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": max_ms,
+        }
+
+
+# 地域を選択してから予報が描画されるまでの時間 (全セッション共通)
+select_latency = LatencyHistogram("select_to_render")
+
+
+# 起動から最初の page.update() までの時間 (プロセスごとに最初のセッションだけ記録する)
+first_update_latency = LatencyHistogram("start_to_first_update")
+_first_update_recorded = False
+
+
+# 最初の page.update() が終わった時点で呼ぶ。started はエントリポイントの先頭で取った time.perf_counter()
+def mark_first_update(started):
+    global _first_update_recorded
+    if _first_update_recorded:
+        return
+    _first_update_recorded = True
+    elapsed = time.perf_counter() - started
+    first_update_latency.observe(elapsed)
+    print(f"起動から最初の page.update() まで: {elapsed * 1000:.0f} ms")
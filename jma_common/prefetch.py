@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from jma_common.area_index import get_area_index
+from jma_common.forecast import FORECAST_URL_TEMPLATE
+from jma_common.forecast_cache import JST, PUBLISH_GRACE, forecast_cache, next_publication
+from jma_common.http_client import get_client
+
+# 同時に取得する地域数の上限
+MAX_CONCURRENCY = 8
+
+# 1 ホストあたりのリクエスト開始レート (回/秒)
+REQUESTS_PER_SECOND = 10.0
+
+
+# 1 回の一括取得の結果
+class SweepReport(NamedTuple):
+    started_at: datetime
+    duration: float
+    succeeded: int
+    failed: tuple
+
+
+# ホストごとにリクエストの開始間隔をそろえるレートリミッタ
+class HostRateLimiter:
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url):
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# 全気象台の予報を並行して取得し、キャッシュと DB に書き込む
+class ForecastPrefetcher:
+    def __init__(
+        self,
+        office_codes=None,
+        cache=forecast_cache,
+        store=None,
+        max_concurrency=MAX_CONCURRENCY,
+        rate=REQUESTS_PER_SECOND,
+    ):
+        self.office_codes = office_codes
+        self.cache = cache
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.reports = []
+
+    async def _fetch_one(self, code, semaphore, limiter):
+        url = FORECAST_URL_TEMPLATE.format(area_code=code)
+        async with semaphore:
+            await limiter.wait(url)
+            data = await asyncio.to_thread(get_client().get_json, url)
+            self.cache.put(code, data)
+            if self.store is not None:
+                await asyncio.to_thread(self.store, code, data)
+
+    # 1 回分の一括取得
+    async def sweep(self):
+        codes = self.office_codes or get_area_index().office_codes()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = HostRateLimiter(self.rate)
+        started_at = datetime.now(JST)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._fetch_one(code, semaphore, limiter) for code in codes),
+            return_exceptions=True,
+        )
+        failed = tuple(code for code, result in zip(codes, results) if isinstance(result, Exception))
+        report = SweepReport(started_at, time.perf_counter() - started, len(codes) - len(failed), failed)
+        self.reports.append(report)
+        print(
+            f"予報の一括取得: {report.succeeded}/{len(codes)} 件 "
+            f"{report.duration:.2f} 秒 (失敗: {', '.join(failed) or 'なし'})"
+        )
+        return report
+
+    # 起動直後に 1 回、その後は気象庁の発表時刻ごとに取得し直す
+    async def run_forever(self):
+        while True:
+            await self.sweep()
+            now = datetime.now(JST)
+            wake_at = next_publication(now - PUBLISH_GRACE) + PUBLISH_GRACE
+            await asyncio.sleep(max((wake_at - now).total_seconds(), 0))
+
+
+_prefetch_thread = None
+_prefetch_lock = threading.Lock()
+
+
+# 専用スレッドのイベントループで run_forever を動かす (プロセスで 1 回だけ)
+def start_background_prefetch(store=None):
+    global _prefetch_thread
+    with _prefetch_lock:
+        if _prefetch_thread is None:
+            prefetcher = ForecastPrefetcher(store=store)
+            _prefetch_thread = threading.Thread(
+                target=asyncio.run,
+                args=(prefetcher.run_forever(),),
+                name="forecast-prefetch",
+                daemon=True,
+            )
+            _prefetch_thread.start()
+    return _prefetch_thread
+
+
+# 単発で一括取得する (python -m jma_common.prefetch)
+if __name__ == "__main__":
+    from jma_common.storage import init_db, insert_forecast_data
+
+    init_db()
+    asyncio.run(ForecastPrefetcher(store=insert_forecast_data).sweep())
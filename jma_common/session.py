@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flet as ft
+
+from jma_common.area_index import get_area_index, start_background_refresh
+from jma_common.area_picker import AreaPicker
+from jma_common.forecast_cache import get_forecast
+from jma_common.forecast_view import ForecastView, revision_lines
+from jma_common.metrics import select_latency
+from jma_common.prefetch import start_background_prefetch
+from jma_common.storage import init_db, insert_forecast_data
+
+# DB 書き込みに使うスレッド数
+# storage の接続はスレッドごとに 1 本なので、セッション数に関係なく DB 接続はこの本数までに収まる
+DB_WORKERS = 2
+
+_db_executor = None
+_setup_lock = threading.Lock()
+_setup_done = False
+
+
+# プロセス全体で共有する状態を用意する (プロセスで 1 回だけ。2 回目以降は何もしない)
+# 地域インデックス・予報キャッシュ・HTTP の接続プール・DB 接続はすべてプロセス単位で、
+# セッションごとに持つのは画面のコントロールと選択中のタスクだけにする。
+# Web サーバモードではセッションを受け付ける前に、デスクトップでは最初の画面を出した後に呼ぶ
+def setup_shared_state(store=True, prefetch=True):
+    global _db_executor, _setup_done
+    with _setup_lock:
+        if _setup_done:
+            return
+        _setup_done = True
+        get_area_index().prepare_search()
+        start_background_refresh()
+        if store:
+            init_db()
+            _db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="jma-db")
+        if prefetch:
+            start_background_prefetch(store=insert_forecast_data if store else None)
+
+
+# 1 セッション (ブラウザのタブ 1 つ) 分の画面と状態
+# index / fetch は共有のものを使う。update には page.update、run_task には page.run_task を渡す
+class ForecastSession:
+    def __init__(self, update, run_task=None, index=None, fetch=get_forecast, store=insert_forecast_data):
+        self.update = update
+        self.fetch = fetch
+        self.store = store
+        self.task = None  # 実行中の選択処理 (地域を素早く切り替えたときに古い方を取り消す)
+
+        self.app_bar = ft.AppBar(
+            title=ft.Text("天気予報", style=ft.TextThemeStyle.HEADLINE_MEDIUM, color=ft.colors.WHITE),
+            bgcolor=ft.colors.PURPLE,
+        )
+
+        # サイドバー
+        # 最初は地方の一覧だけを送り、子地域は開いたときに作る
+        index = index if index is not None else get_area_index()
+        sidebar = ft.Column(controls=[], width=250, expand=True)
+        if len(index):
+            on_select = (lambda office: run_task(self.select, office)) if run_task else None
+            self.picker = AreaPicker(index, on_select=on_select)
+            sidebar.controls.append(self.picker.control)
+        else:
+            self.picker = None
+            sidebar.controls.append(ft.Text("地域リストの取得に失敗しました", color=ft.colors.WHITE))
+
+        # メインビュー
+        # 予報の一覧は ForecastView を使い回し、選択が変わっても変化した行だけを送る
+        self.loading = ft.ProgressBar(visible=False)
+        self.status = ft.Text("Active View", style=ft.TextThemeStyle.HEADLINE_SMALL)
+        self.forecast_view = ForecastView()
+        main_view = ft.Container(
+            content=ft.Column(controls=[self.loading, self.status, self.forecast_view.control], expand=True),
+            alignment=ft.alignment.center,
+            expand=True,
+        )
+
+        self.layout = ft.Row(
+            controls=[
+                ft.Container(sidebar, bgcolor=ft.colors.LIGHT_BLUE, padding=10),
+                main_view,
+            ],
+            expand=True,
+        )
+
+    # 地域選択時のイベント処理
+    # 取得と DB 書き込みは別スレッドで行い、その間はイベントループを止めない
+    async def select(self, office):
+        started = time.perf_counter()
+        area_code = office.code  # 選択された府県予報区のコード
+        previous = self.task
+        # 同じタスクから続けて呼ばれたとき (負荷試験など) は自分自身を取り消さない
+        if previous is not None and previous is not asyncio.current_task() and not previous.done():
+            previous.cancel()
+        self.task = asyncio.current_task()
+
+        # 取得が終わるまで読み込み中の表示を出しておく
+        self.loading.visible = True
+        self.status.value = "天気予報を取得しています…"
+        self.status.color = None
+        self.update()
+
+        forecast_data = await asyncio.to_thread(self.fetch, area_code)  # 共有キャッシュ経由で取得
+        if self.task is not asyncio.current_task():
+            return
+        self.loading.visible = False
+        if forecast_data:
+            self.display_weather(forecast_data)
+        else:
+            self.status.value = "天気予報の取得に失敗しました"
+            self.status.color = ft.colors.RED
+            self.forecast_view.clear()
+        self.update()
+        select_latency.observe(time.perf_counter() - started)
+
+        if forecast_data and self.store is not None and _db_executor is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(_db_executor, self.store, area_code, forecast_data)  # DBに格納
+            # 保存済みの発表と比べた予報の変化を一覧の末尾に足す (変わらない予報の行は送り直さない)
+            revisions = await loop.run_in_executor(_db_executor, revision_lines, forecast_data)
+            if revisions and self.task is asyncio.current_task():
+                self.forecast_view.render(forecast_data, revisions)
+                self.update()
+
+    # 天気予報データを表示
+    def display_weather(self, data):
+        if data:
+            self.status.value = f"発表日時: {data[0]['reportDatetime']}"
+            self.status.color = None
+        else:
+            self.status.value = "データなし"
+            self.status.color = ft.colors.RED
+        self.forecast_view.render(data)
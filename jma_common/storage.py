@@ -0,0 +1,409 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import NamedTuple
+
+from jma_common.area_index import get_area_index
+
+# SQLiteデータベースの初期化
+DB_NAME = "weather_forecast.db"
+
+# 接続ごとに設定する PRAGMA
+# WAL にすると読み込みと書き込みが互いを待たなくなり、synchronous=NORMAL でコミットごとの fsync を減らせる
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # 約 16MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# PRAGMA user_version に記録するスキーマのバージョン
+# 0: 旧形式 (forecasts / weather / area / areas テーブル)
+# 1: 正規化した形式 (下の SCHEMA)
+SCHEMA_VERSION = 1
+
+# forecast/{office}.json の data[0] が daily (3 日分)、data[1] が weekly (週間予報)
+REPORT_KINDS = ("daily", "weekly")
+
+# 時刻はすべて UNIX 時間 (秒) の整数で持つ
+# 各予報テーブルの主キーを (area_code, forecast_time, report_id) にしておくと、
+# 「ある地域のある期間の予報」が主キーの範囲検索になる
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS offices (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS forecast_areas (
+    code TEXT PRIMARY KEY,
+    office_code TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS forecast_areas_office ON forecast_areas (office_code);
+
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    office_code TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    report_time INTEGER NOT NULL,
+    UNIQUE (office_code, kind, report_time)
+);
+CREATE INDEX IF NOT EXISTS reports_time ON reports (report_time);
+
+CREATE TABLE IF NOT EXISTS weather_texts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS wind_texts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS weather_series (
+    area_code TEXT NOT NULL,
+    forecast_time INTEGER NOT NULL,
+    report_id INTEGER NOT NULL REFERENCES reports (id),
+    weather_code INTEGER,
+    weather_id INTEGER REFERENCES weather_texts (id),
+    wind_id INTEGER REFERENCES wind_texts (id),
+    reliability TEXT,
+    PRIMARY KEY (area_code, forecast_time, report_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS weather_series_report ON weather_series (report_id);
+
+CREATE TABLE IF NOT EXISTS pop_series (
+    area_code TEXT NOT NULL,
+    forecast_time INTEGER NOT NULL,
+    report_id INTEGER NOT NULL REFERENCES reports (id),
+    pop INTEGER,
+    PRIMARY KEY (area_code, forecast_time, report_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pop_series_report ON pop_series (report_id);
+
+CREATE TABLE IF NOT EXISTS temp_series (
+    area_code TEXT NOT NULL,
+    forecast_time INTEGER NOT NULL,
+    report_id INTEGER NOT NULL REFERENCES reports (id),
+    temp REAL,
+    temp_min REAL,
+    temp_max REAL,
+    PRIMARY KEY (area_code, forecast_time, report_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS temp_series_report ON temp_series (report_id);
+'''
+
+# 旧形式のテーブル
+# 移行した後も消さずに、名前の後ろに LEGACY_SUFFIX を付けて残す (forecasts → forecasts_legacy)
+# 消すのは python -m jma_common.compact --drop-legacy を実行したときだけ
+LEGACY_TABLES = ("forecasts", "weather", "area", "areas")
+LEGACY_SUFFIX = "_legacy"
+
+
+# 旧形式のテーブルの移行結果
+# migrated: 新しいスキーマに写した行数
+# skipped : 細分区域が決まらないため写さず、forecasts_legacy にだけ残っている行数
+class LegacyMigration(NamedTuple):
+    migrated: int
+    skipped: int
+
+# スレッドごとに 1 本ずつ保持する接続 ({DBファイル名: 接続})
+_local = threading.local()
+
+
+# このスレッド用の接続を返す (初回だけ開いて PRAGMA を設定する)
+def get_connection(db_name=None):
+    db_name = db_name or DB_NAME
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_name)
+    if conn is None:
+        conn = sqlite3.connect(db_name)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        connections[db_name] = conn
+    return conn
+
+
+# このスレッドの接続を閉じる
+def close_connections():
+    connections = getattr(_local, "connections", None) or {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
+    _local.__dict__.pop("text_ids", None)
+
+
+# ISO 8601 の日時文字列を UNIX 時間 (秒) に変換する
+def to_epoch(value):
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+# 気象台コードを 6 桁の文字列にそろえる (旧形式では整数で保存されていた)
+def office_code_of(value):
+    return f"{int(value):06d}"
+
+
+# スキーマを作成し、旧形式のテーブルがあれば移行する (旧形式のテーブルは *_legacy として残し、消さない)
+# 移行したときは LegacyMigration を、スキーマが最新だったときは None を返す
+def init_db(db_name=None):
+    conn = get_connection(db_name)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return None
+    conn.executescript("BEGIN;" + SCHEMA + "COMMIT;")
+    result = migrate_legacy_tables(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    if result.skipped:
+        print(
+            f"{db_name or DB_NAME}: 旧形式の予報 {result.skipped} 行は細分区域が決まらないため移行せず、"
+            f"forecasts{LEGACY_SUFFIX} に残しています"
+        )
+    return result
+
+
+# 予報データの値を取り出す (範囲外や空文字は None)
+def _value(entry, key, i, convert=None):
+    values = entry.get(key)
+    if not values or i >= len(values) or values[i] in ("", None):
+        return None
+    return convert(values[i]) if convert else values[i]
+
+
+# 予報データ (data[0] と data[1]) をテーブルごとの行に分解する
+# 戻り値: [(kind, report_time, weather_rows, pop_rows, temp_rows), ...] と {地域コード: 名前}
+def parse_forecast(forecast_data):
+    reports = []
+    names = {}
+    for kind, report in zip(REPORT_KINDS, forecast_data):
+        weather_rows, pop_rows, temp_rows = [], [], []
+        for series in report.get("timeSeries", ()):
+            times = [to_epoch(t) for t in series["timeDefines"]]
+            for entry in series["areas"]:
+                code = entry["area"]["code"]
+                names[code] = entry["area"]["name"]
+                has_weather = "weatherCodes" in entry or "weathers" in entry
+                has_temp = "temps" in entry or "tempsMin" in entry or "tempsMax" in entry
+                for i, forecast_time in enumerate(times):
+                    # 週間予報の初日のように値が空の欄は行にしない
+                    if has_weather:
+                        values = (
+                            _value(entry, "weatherCodes", i, int),
+                            _value(entry, "weathers", i),
+                            _value(entry, "winds", i),
+                            _value(entry, "reliabilities", i),
+                        )
+                        if any(v is not None for v in values):
+                            weather_rows.append((code, forecast_time, *values))
+                    pop = _value(entry, "pops", i, int)
+                    if pop is not None:
+                        pop_rows.append((code, forecast_time, pop))
+                    if has_temp:
+                        values = (
+                            _value(entry, "temps", i, float),
+                            _value(entry, "tempsMin", i, float),
+                            _value(entry, "tempsMax", i, float),
+                        )
+                        if any(v is not None for v in values):
+                            temp_rows.append((code, forecast_time, *values))
+        reports.append((kind, to_epoch(report["reportDatetime"]), weather_rows, pop_rows, temp_rows))
+    return reports, names
+
+
+# 文字列を辞書テーブルの id に変換する (未登録なら登録する)
+# 一度調べた id はスレッドごとに覚えておき、同じ文字列では DB を引かない
+def _encode(conn, table, texts):
+    cache = _local.__dict__.setdefault("text_ids", {}).setdefault((id(conn), table), {})
+    missing = sorted({t for t in texts if t is not None and t not in cache})
+    if missing:
+        conn.executemany(
+            f"INSERT INTO {table} (text) VALUES (?) ON CONFLICT (text) DO NOTHING",
+            [(t,) for t in missing],
+        )
+        placeholders = ", ".join("?" * len(missing))
+        cache.update(
+            (text, text_id)
+            for text_id, text in conn.execute(
+                f"SELECT id, text FROM {table} WHERE text IN ({placeholders})", missing
+            )
+        )
+    return cache
+
+
+def _report_id(conn, office_code, kind, report_time):
+    conn.execute(
+        "INSERT INTO reports (office_code, kind, report_time) VALUES (?, ?, ?) "
+        "ON CONFLICT (office_code, kind, report_time) DO NOTHING",
+        (office_code, kind, report_time),
+    )
+    return conn.execute(
+        "SELECT id FROM reports WHERE office_code = ? AND kind = ? AND report_time = ?",
+        (office_code, kind, report_time),
+    ).fetchone()[0]
+
+
+# 1 つの発表分の行を書き込む (同じキーの行は上書き)
+def _write_report(conn, report_id, weather_rows, pop_rows=(), temp_rows=()):
+    weather_ids = _encode(conn, "weather_texts", (row[3] for row in weather_rows))
+    wind_ids = _encode(conn, "wind_texts", (row[4] for row in weather_rows))
+    conn.executemany('''
+    INSERT INTO weather_series (area_code, forecast_time, report_id, weather_code, weather_id, wind_id, reliability)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (area_code, forecast_time, report_id) DO UPDATE SET
+        weather_code = excluded.weather_code,
+        weather_id = excluded.weather_id,
+        wind_id = excluded.wind_id,
+        reliability = excluded.reliability''', [
+        (code, t, report_id, weather_code, weather_ids.get(weather), wind_ids.get(wind), reliability)
+        for code, t, weather_code, weather, wind, reliability in weather_rows
+    ])
+    conn.executemany('''
+    INSERT INTO pop_series (area_code, forecast_time, report_id, pop) VALUES (?, ?, ?, ?)
+    ON CONFLICT (area_code, forecast_time, report_id) DO UPDATE SET pop = excluded.pop''', [
+        (code, t, report_id, pop) for code, t, pop in pop_rows
+    ])
+    conn.executemany('''
+    INSERT INTO temp_series (area_code, forecast_time, report_id, temp, temp_min, temp_max)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (area_code, forecast_time, report_id) DO UPDATE SET
+        temp = excluded.temp,
+        temp_min = excluded.temp_min,
+        temp_max = excluded.temp_max''', [
+        (code, t, report_id, temp, temp_min, temp_max) for code, t, temp, temp_min, temp_max in temp_rows
+    ])
+
+
+# 気象台と予報区域の名前を登録する
+def _write_names(conn, office_code, office_name, names):
+    conn.execute(
+        "INSERT INTO offices (code, name) VALUES (?, ?) ON CONFLICT (code) DO UPDATE SET name = excluded.name",
+        (office_code, office_name),
+    )
+    conn.executemany('''
+    INSERT INTO forecast_areas (code, office_code, name) VALUES (?, ?, ?)
+    ON CONFLICT (code) DO UPDATE SET name = excluded.name''', [
+        (code, office_code, name) for code, name in names.items()
+    ])
+
+
+def _office_name(office_code, default=None):
+    office = get_area_index().get("offices", office_code)
+    return office.name if office else (default or office_code)
+
+
+# 天気予報データをDBに保存 (1 回の予報を 1 トランザクションで書き込む)
+# 同じ予報を何度保存しても行は増えず、内容が変わった行だけ更新される
+def insert_forecast_data(area_id, forecast_data, db_name=None):
+    conn = get_connection(db_name)
+    office_code = office_code_of(area_id)
+    reports, names = parse_forecast(forecast_data)
+    try:
+        with conn:
+            _write_names(conn, office_code, _office_name(office_code), names)
+            for kind, report_time, weather_rows, pop_rows, temp_rows in reports:
+                report_id = _report_id(conn, office_code, kind, report_time)
+                _write_report(conn, report_id, weather_rows, pop_rows, temp_rows)
+    except Exception:
+        # ロールバックされた辞書の id を覚えたままにしない
+        _local.__dict__.pop("text_ids", None)
+        raise
+
+
+def _tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+# 旧形式の forecasts テーブルの各行の細分区域コードを決める
+# 保存されている sub_area_code か、気象台の細分区域が 1 つしかない場合のその区域のように、保存されている
+# キーから決まるものだけを使う。決まらない行は None にして移行せず、forecasts_legacy に残す
+# (書き込み順から細分区域を推測すると、順番がずれていたときに気付かないまま別の区域の予報になる)
+def _legacy_forecast_rows(conn):
+    index = get_area_index()
+    sub_area_column = "sub_area_code" if "sub_area_code" in _columns(conn, "forecasts") else "''"
+    rows = conn.execute(
+        f"SELECT area_id, report_datetime, forecast_time, weather, wind, {sub_area_column} "
+        "FROM forecasts ORDER BY id"
+    )
+    for area_id, report_datetime, forecast_time, weather, wind, sub_area_code in rows:
+        office_code = office_code_of(area_id)
+        if not sub_area_code:
+            sub_areas = index.children("offices", office_code)
+            sub_area_code = sub_areas[0].code if len(sub_areas) == 1 else None
+        yield office_code, sub_area_code, report_datetime, forecast_time, weather, wind
+
+
+# 旧形式のテーブルを新しいスキーマに写し、旧形式のテーブルは *_legacy という名前で残す
+# 同じキーの行が複数あれば後から書き込まれたものを残す。細分区域の決まらない行は写さずに数える (LegacyMigration)
+def migrate_legacy_tables(conn):
+    tables = _tables(conn)
+    legacy = [t for t in LEGACY_TABLES if t in tables]
+    if not legacy:
+        return LegacyMigration(0, 0)
+
+    index = get_area_index()
+    office_names = {}
+    if "area" in tables:
+        office_names.update(conn.execute("SELECT area_code, area_name FROM area"))
+    if "areas" in tables:
+        office_names.update((office_code_of(i), name) for i, name in conn.execute("SELECT id, name FROM areas"))
+
+    # (office_code, report_datetime) ごとに行をまとめる
+    grouped = {}
+    skipped = 0
+    if "forecasts" in tables:
+        for office_code, code, reported, forecast_time, weather, wind in _legacy_forecast_rows(conn):
+            if code is None:
+                skipped += 1
+                continue
+            grouped.setdefault((office_code, reported), []).append((code, forecast_time, weather, wind))
+    if "weather" in tables:
+        rows = conn.execute(
+            "SELECT area_code, report_datetime, forecast_date, weather, wind FROM weather ORDER BY id"
+        )
+        for area_code, reported, forecast_time, weather, wind in rows:
+            office_code = office_code_of(area_code)
+            grouped.setdefault((office_code, reported), []).append((office_code, forecast_time, weather, wind))
+
+    migrated = 0
+    with conn:
+        for (office_code, reported), rows in grouped.items():
+            names = {}
+            for code, *_ in rows:
+                area = index.get("class10s", code)
+                names[code] = area.name if area else office_names.get(code, code)
+            _write_names(conn, office_code, _office_name(office_code, office_names.get(office_code)), names)
+            report_id = _report_id(conn, office_code, "daily", to_epoch(reported))
+            _write_report(conn, report_id, [
+                (code, to_epoch(forecast_time), None, weather, wind, None)
+                for code, forecast_time, weather, wind in rows
+            ])
+            migrated += len(rows)
+        for office_code, name in office_names.items():
+            conn.execute(
+                "INSERT INTO offices (code, name) VALUES (?, ?) ON CONFLICT (code) DO NOTHING",
+                (office_code, name),
+            )
+        for table in legacy:
+            conn.execute(f"ALTER TABLE {table} RENAME TO {table}{LEGACY_SUFFIX}")
+    return LegacyMigration(migrated, skipped)
+
+
+# 移行した後に残しておいた旧形式のテーブル (*_legacy) の名前
+def legacy_tables(conn):
+    tables = _tables(conn)
+    return [t + LEGACY_SUFFIX for t in LEGACY_TABLES if t + LEGACY_SUFFIX in tables]
+
+
+# 旧形式のテーブル (*_legacy) を削除する。削除したテーブルの名前を返す
+def drop_legacy_tables(conn):
+    tables = legacy_tables(conn)
+    with conn:
+        for table in tables:
+            conn.execute(f"DROP TABLE {table}")
+    return tables
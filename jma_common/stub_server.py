@@ -0,0 +1,238 @@
+import gzip
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from jma_common.area_index import BUNDLED_AREA_PATH, get_area_index
+from jma_common.forecast_cache import JST
+
+# オフラインで動作確認・ベンチマークをするための気象庁 API のスタブサーバ
+
+FORECAST_PATH = re.compile(r"^/bosai/forecast/data/forecast/(\d{6})\.json$")
+AREA_PATH = "/bosai/common/const/area.json"
+
+WEATHERS = (
+    ("100", "晴れ"),
+    ("101", "晴れ　時々　くもり"),
+    ("200", "くもり"),
+    ("202", "くもり　一時　雨"),
+    ("300", "雨"),
+    ("400", "雪"),
+)
+WINDS = ("北の風", "北西の風　やや強く", "南の風", "東の風　後　北の風", "西の風　海上　では　強く")
+
+
+# 気象庁の forecast/{office}.json と同じ形の予報データを作る
+# seed を変えると中身 (天気・気温など) が変わる
+def sample_forecast(office_code, report_datetime=None, seed=0):
+    index = get_area_index()
+    if report_datetime is None:
+        report_datetime = datetime(2024, 12, 17, 17, tzinfo=JST)
+    class10s = index.children("offices", office_code)
+    sub_areas = [{"name": a.name, "code": a.code} for a in class10s] or [
+        {"name": office_code, "code": office_code}
+    ]
+    amedas = [{"name": a["name"][:2], "code": f"{int(a['code']) % 100000:05d}"} for a in sub_areas]
+    base = int(office_code) + seed
+    day = report_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def iso(dt):
+        return dt.isoformat()
+
+    near_days = [iso(report_datetime)] + [iso(day + timedelta(days=d)) for d in (1, 2)]
+    pop_times = [iso(day + timedelta(days=d, hours=h)) for d in (0, 1) for h in (0, 6, 12, 18)][2:]
+    temp_times = [iso(day + timedelta(days=1, hours=h)) for h in (0, 9)]
+    week_days = [iso(day + timedelta(days=d)) for d in range(1, 8)]
+
+    def weather(i):
+        return WEATHERS[(base + i) % len(WEATHERS)]
+
+    return [
+        {
+            "publishingOffice": "気象庁",
+            "reportDatetime": iso(report_datetime),
+            "timeSeries": [
+                {
+                    "timeDefines": near_days,
+                    "areas": [
+                        {
+                            "area": area,
+                            "weatherCodes": [weather(i + j)[0] for j in range(3)],
+                            "weathers": [weather(i + j)[1] for j in range(3)],
+                            "winds": [WINDS[(base + i + j) % len(WINDS)] for j in range(3)],
+                        }
+                        for i, area in enumerate(sub_areas)
+                    ],
+                },
+                {
+                    "timeDefines": pop_times,
+                    "areas": [
+                        {"area": area, "pops": [str((base + i * 7 + j * 10) % 11 * 10) for j in range(6)]}
+                        for i, area in enumerate(sub_areas)
+                    ],
+                },
+                {
+                    "timeDefines": temp_times,
+                    "areas": [
+                        {"area": area, "temps": [str((base + i) % 10), str((base + i) % 10 + 8)]}
+                        for i, area in enumerate(amedas)
+                    ],
+                },
+            ],
+        },
+        {
+            "publishingOffice": "気象庁",
+            "reportDatetime": iso(report_datetime),
+            "timeSeries": [
+                {
+                    "timeDefines": week_days,
+                    "areas": [
+                        {
+                            "area": sub_areas[0],
+                            "weatherCodes": [weather(j)[0] for j in range(7)],
+                            "pops": [""] + [str((base + j * 3) % 11 * 10) for j in range(1, 7)],
+                            "reliabilities": ["", ""] + ["ABC"[(base + j) % 3] for j in range(2, 7)],
+                        }
+                    ],
+                },
+                {
+                    "timeDefines": week_days,
+                    "areas": [
+                        {
+                            "area": amedas[0],
+                            "tempsMin": [""] + [str((base + j) % 10) for j in range(1, 7)],
+                            "tempsMax": [""] + [str((base + j) % 10 + 8) for j in range(1, 7)],
+                        }
+                    ],
+                },
+            ],
+        },
+    ]
+
+
+# 1 つのリソース (本文とその検証用ヘッダ)
+class _Resource:
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body)
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+
+class StubJmaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.seed = 0
+        self.lock = threading.Lock()
+        self.resources = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.connections = 0
+        with open(BUNDLED_AREA_PATH, "rb") as f:
+            self.resources[AREA_PATH] = _Resource(f.read())
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # 全地域の予報を「再発表」して中身と ETag を変える
+    def publish(self):
+        with self.lock:
+            self.seed += 1
+            self.resources = {AREA_PATH: self.resources[AREA_PATH]}
+
+    def resource(self, path):
+        with self.lock:
+            resource = self.resources.get(path)
+            if resource is None:
+                match = FORECAST_PATH.match(path)
+                if match is None:
+                    return None
+                payload = sample_forecast(match.group(1), seed=self.seed)
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                resource = self.resources[path] = _Resource(body)
+            return resource
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "bytes_sent": self.bytes_sent,
+                "connections": self.connections,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # ヘッダと本文を別々に書くので Nagle を切っておかないと keep-alive 時に遅延する
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        resource = server.resource(self.path)
+        if resource is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.headers.get("If-None-Match") == resource.etag:
+            with server.lock:
+                server.requests += 1
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", resource.etag)
+            self.send_header("Last-Modified", resource.last_modified)
+            self.end_headers()
+            return
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        body = resource.gzipped if use_gzip else resource.body
+        with server.lock:
+            server.requests += 1
+            server.bytes_sent += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", resource.etag)
+        self.send_header("Last-Modified", resource.last_modified)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# スタブサーバを別スレッドで起動し、終了時に停止する
+@contextmanager
+def run_stub_server(latency=0.0):
+    server = StubJmaServer(latency=latency)
+    thread = threading.Thread(target=server.serve_forever, name="stub-jma", daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
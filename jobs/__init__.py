@@ -0,0 +1 @@
+# 求人情報 (job_listings.db) を扱うモジュール群
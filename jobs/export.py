@@ -0,0 +1,135 @@
+import argparse
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from jobs import storage
+
+# job_listings を列指向のファイル (Arrow IPC / Parquet) に書き出す (分析用。要 pyarrow)
+#
+#   python -m jobs.export                    # job_listings_arrow/ に前回から増えた行を書き足す
+#   python -m jobs.export --format parquet
+#
+# 書き出し先はディレクトリで、1 回の書き出しごとに part-<最初の id>-<最後の id>.<形式> を 1 つ作る
+# 次の書き出しは、既にある part の最後の id より大きい行だけを読む (id は AUTOINCREMENT なので増える一方)
+# 同じ文字列が繰り返し出てくる office_name / office_place / employment_type は辞書符号化する
+# 書き出した後の job_listings の更新・削除は反映しない (反映するには書き出し先を消して書き出し直す)
+#
+# load() は Arrow IPC の part をメモリマップで開くので、列のデータはコピーされず、読んだページだけが
+# メモリに載る。Parquet の part は展開が必要なので読み込み時にメモリへ読み出す
+
+EXPORT_DIR = "job_listings_arrow"
+
+# 辞書符号化する列
+DICTIONARY_COLUMNS = ("office_name", "office_place", "employment_type")
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("work_name", pa.string()),
+    ("wages", pa.float64()),
+    ("office_name", pa.dictionary(pa.int32(), pa.string())),
+    ("office_place", pa.dictionary(pa.int32(), pa.string())),
+    ("employment_type", pa.dictionary(pa.int32(), pa.string())),
+])
+
+# 形式ごとの拡張子
+EXTENSIONS = {"arrow": ".arrow", "parquet": ".parquet"}
+
+# SQLite から一度に読む行数
+BATCH_SIZE = 100_000
+
+PART = re.compile(r"part-(\d+)-(\d+)\.(arrow|parquet)$")
+
+
+# ディレクトリ内の part を id の順に返す [(最初の id, 最後の id, パス), ...]
+def parts(directory=None):
+    directory = directory or EXPORT_DIR
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        match = PART.match(name)
+        if match:
+            found.append((int(match.group(1)), int(match.group(2)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def _batches(conn, after_id):
+    columns = ", ".join(name for name in SCHEMA.names)
+    cursor = conn.execute(f"SELECT {columns} FROM job_listings WHERE id > ? ORDER BY id", (after_id,))
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            return
+        values = list(zip(*rows))
+        arrays = []
+        for i, field in enumerate(SCHEMA):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values[i], pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values[i], field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+# 前回の書き出しから増えた行を新しい part に書き出し、(part のパス, 行数) を返す (増えていなければ (None, 0))
+def export(directory=None, format="arrow", db_name=None, conn=None):
+    if format not in EXTENSIONS:
+        raise ValueError(f"未対応の形式です: {format!r} (対応: {', '.join(EXTENSIONS)})")
+    directory = directory or EXPORT_DIR
+    conn = conn if conn is not None else storage.get_connection(db_name)
+    existing = parts(directory)
+    after_id = existing[-1][1] if existing else 0
+
+    batches = list(_batches(conn, after_id))
+    if not batches:
+        return None, 0
+    # part 全体で辞書を 1 つにそろえる (Arrow IPC のファイル形式は途中で辞書を差し替えられない)
+    table = pa.Table.from_batches(batches, schema=SCHEMA).unify_dictionaries()
+    first_id = table.column("id")[0].as_py()
+    last_id = table.column("id")[-1].as_py()
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{first_id:010d}-{last_id:010d}{EXTENSIONS[format]}")
+    # 書きかけの part が残らないように、一時ファイルに書いてから名前を変える
+    temporary = path + ".tmp"
+    if format == "arrow":
+        with ipc.new_file(temporary, SCHEMA) as writer:
+            writer.write_table(table, max_chunksize=BATCH_SIZE)
+    else:
+        pq.write_table(table, temporary, use_dictionary=list(DICTIONARY_COLUMNS), compression="zstd")
+    os.replace(temporary, path)
+    return path, table.num_rows
+
+
+def _read(path):
+    if path.endswith(EXTENSIONS["arrow"]):
+        return ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return pq.read_table(path, memory_map=True, read_dictionary=list(DICTIONARY_COLUMNS))
+
+
+# 書き出したすべての part を 1 つの表として読む (Arrow IPC の part はメモリマップ)
+def load(directory=None):
+    tables = [_read(path) for _, _, path in parts(directory)]
+    if not tables:
+        return SCHEMA.empty_table()
+    return pa.concat_tables(tables)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="job_listings を Arrow / Parquet に書き出す")
+    parser.add_argument("--dir", default=None, help=f"書き出し先 (省略時は {EXPORT_DIR})")
+    parser.add_argument("--format", choices=EXTENSIONS, default="arrow")
+    parser.add_argument("--db", default=None, help="SQLite ファイル (省略時は job_listings.db)")
+    args = parser.parse_args()
+
+    path, rows = export(args.dir, args.format, db_name=args.db)
+    print(f"{path}: {rows:,} 行" if path else "新しい行はありません")
+    for first, last, part in parts(args.dir):
+        print(f"  {part}\t(id {first} - {last})")
+
+
+if __name__ == "__main__":
+    main()
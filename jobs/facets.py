@@ -0,0 +1,116 @@
+import argparse
+from collections import namedtuple
+
+from jobs import storage
+
+# 都道府県・雇用形態ごとの求人の集計 (件数と賃金の件数・最小・最大・中央値)
+# 集計は job_facets テーブルに持ち、job_listings への追加のたびにトリガーで更新される (jobs.storage)
+# 中央値と、削除・更新があった組は refresh() で計算し直す。facets() は先に refresh() を呼ぶので、
+# 求人を追加した後でも job_listings を全件読み直さずに最新の集計が得られる
+#
+#   python -m jobs.facets
+#   python -m jobs.facets --prefecture 東京都 --employment-type 正社員
+
+PREFECTURES = (
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県",
+    "茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県",
+    "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県", "岐阜県", "静岡県", "愛知県",
+    "三重県", "滋賀県", "京都府", "大阪府", "兵庫県", "奈良県", "和歌山県",
+    "鳥取県", "島根県", "岡山県", "広島県", "山口県",
+    "徳島県", "香川県", "愛媛県", "高知県",
+    "福岡県", "佐賀県", "長崎県", "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+)
+
+# job_facets の place (office_place の先頭 3 文字) から都道府県名へ ("神奈川" → "神奈川県")
+PREFECTURE_NAMES = {name[:3]: name for name in PREFECTURES}
+
+Facet = namedtuple("Facet", "prefecture employment_type listings wage_count wage_min wage_max wage_median")
+
+_PLACE = storage.FACET_PLACE.format(row="")
+_TYPE = storage.FACET_TYPE.format(row="")
+
+# 1 つの組の集計 (job_listings_facet 索引の範囲だけを読む)
+_GROUP_STATS = f'''
+SELECT count(*), count(wages), min(wages), max(wages) FROM job_listings
+WHERE {_PLACE} = ? AND {_TYPE} = ?'''
+
+# 賃金の小さいほうから offset 番目 (0 始まり) から count 件
+_GROUP_WAGES = f'''
+SELECT wages FROM job_listings
+WHERE {_PLACE} = ? AND {_TYPE} = ? AND wages IS NOT NULL
+ORDER BY wages LIMIT ? OFFSET ?'''
+
+
+def prefecture_name(place):
+    return PREFECTURE_NAMES.get(place, place)
+
+
+# 都道府県名を job_facets の place にする ("神奈川県" → "神奈川")
+def place_of(prefecture):
+    return prefecture[:3]
+
+
+def _median(conn, place, employment_type, wage_count):
+    if wage_count == 0:
+        return None
+    # 件数が偶数なら真ん中の 2 件の平均
+    wages = [row[0] for row in conn.execute(
+        _GROUP_WAGES, (place, employment_type, 2 - wage_count % 2, (wage_count - 1) // 2)
+    )]
+    return sum(wages) / len(wages)
+
+
+# dirty の組の中央値 (削除・更新があった組はすべての値) を計算し直し、計算した組の数を返す
+def refresh(db_name=None, conn=None):
+    conn = conn if conn is not None else storage.get_connection(db_name)
+    with conn:
+        dirty = conn.execute("SELECT place, employment_type FROM job_facets WHERE dirty").fetchall()
+        for place, employment_type in dirty:
+            listings, wage_count, wage_min, wage_max = conn.execute(_GROUP_STATS, (place, employment_type)).fetchone()
+            if listings == 0:
+                conn.execute("DELETE FROM job_facets WHERE place = ? AND employment_type = ?", (place, employment_type))
+                continue
+            conn.execute(
+                "UPDATE job_facets SET listings = ?, wage_count = ?, wage_min = ?, wage_max = ?, wage_median = ?, "
+                "dirty = 0 WHERE place = ? AND employment_type = ?",
+                (listings, wage_count, wage_min, wage_max, _median(conn, place, employment_type, wage_count),
+                 place, employment_type),
+            )
+    return len(dirty)
+
+
+# 都道府県・雇用形態ごとの集計を返す (prefecture / employment_type を指定するとその組だけ)
+def facets(prefecture=None, employment_type=None, db_name=None, conn=None):
+    conn = conn if conn is not None else storage.get_connection(db_name)
+    refresh(conn=conn)
+    conditions, params = [], []
+    if prefecture is not None:
+        conditions.append("place = ?")
+        params.append(place_of(prefecture))
+    if employment_type is not None:
+        conditions.append("employment_type = ?")
+        params.append(employment_type.strip(" 　"))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = conn.execute(
+        "SELECT place, employment_type, listings, wage_count, wage_min, wage_max, wage_median "
+        f"FROM job_facets {where} ORDER BY place, employment_type",
+        params,
+    )
+    return [Facet(prefecture_name(place), *rest) for place, *rest in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="都道府県・雇用形態ごとの求人の集計")
+    parser.add_argument("--prefecture", default=None)
+    parser.add_argument("--employment-type", default=None)
+    parser.add_argument("--db", default=None, help="SQLite ファイル (省略時は job_listings.db)")
+    args = parser.parse_args()
+
+    storage.init_db(args.db)
+    for facet in facets(args.prefecture, args.employment_type, db_name=args.db):
+        wages = "\t".join("" if v is None else f"{v:,.0f}" for v in (facet.wage_min, facet.wage_median, facet.wage_max))
+        print(f"{facet.prefecture}\t{facet.employment_type}\t{facet.listings}\t{facet.wage_count}\t{wages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import re
+from collections import namedtuple
+
+from jobs import storage
+
+# 求人の全文検索 (work_name と office_name)
+# 空白 (全角を含む) で区切った語をすべて含む求人を、関連度の高い順にページ単位で返す
+#
+#   python -m jobs.search 自衛官募集
+#   python -m jobs.search "介護 正社員" --page 2 --per-page 50
+#
+# 索引は trigram (3 文字単位) なので、3 文字以上の語は索引で引く。2 文字以下の語は索引では引けないため、
+# 索引で絞り込んだ結果 (語がすべて 2 文字以下なら全件) を LIKE で絞り込む
+
+# 索引で引ける語の長さ
+MIN_TERM_LENGTH = 3
+
+# 関連度 (bm25) の列ごとの重み (work_name, office_name)。職種名に含まれるほうを上位にする
+WEIGHTS = (2.0, 1.0)
+
+# 当たる件数がこれより多いときは関連度を計算せず id 順に返す
+# (「株式会社」のような語では関連度にほとんど差がなく、全件の関連度を計算して並べる時間のほうが大きい)
+RANKED_LIMIT = 10_000
+
+Listing = namedtuple("Listing", ("id",) + storage.LISTING_COLUMNS)
+
+# 検索結果の 1 ページ (total は条件に合う件数の合計)
+SearchPage = namedtuple("SearchPage", "total page per_page listings")
+
+_COLUMNS = ", ".join(f"j.{column}" for column in Listing._fields)
+
+_BM25 = f"bm25(job_listings_fts, {', '.join(map(str, WEIGHTS))})"
+
+
+def split_terms(query):
+    return [term for term in re.split(r"\s+", query) if term]
+
+
+# 語を FTS5 の語句 ("...") にする
+def _phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+# 語を部分一致の LIKE パターンにする (% と _ はそのままの文字として扱う)
+def _like_pattern(term):
+    return "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+
+
+# 検索の FROM / WHERE / ORDER BY とパラメータを組み立てる
+def _query(terms):
+    indexed = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+    short = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+    conditions, params = [], []
+    if indexed:
+        source = "job_listings_fts f JOIN job_listings j ON j.id = f.rowid"
+        conditions.append("job_listings_fts MATCH ?")
+        params.append(" AND ".join(_phrase(term) for term in indexed))
+        order = f"{_BM25}, j.id"
+    else:
+        source = "job_listings j"
+        order = "j.id"
+    for term in short:
+        conditions.append("(j.work_name LIKE ? ESCAPE '\\' OR j.office_name LIKE ? ESCAPE '\\')")
+        params += [_like_pattern(term)] * 2
+    return source, " AND ".join(conditions), order, params
+
+
+# 語がすべて索引で引けるときは、索引だけで件数を数えて 1 ページ分の id を選び、その行だけを job_listings から読む
+# (「株式会社」のように多くの求人に当たる語でも、当たった行を全部読まずに済む)
+_INDEXED_COUNT = "SELECT count(*) FROM job_listings_fts WHERE job_listings_fts MATCH ?"
+_INDEXED_PAGE = '''
+SELECT {columns} FROM (
+    SELECT rowid AS id, {score} AS score FROM job_listings_fts
+    WHERE job_listings_fts MATCH ? ORDER BY score, rowid LIMIT ? OFFSET ?
+) r JOIN job_listings j ON j.id = r.id
+ORDER BY r.score, r.id'''
+
+
+# query に合う求人の page ページ目 (1 始まり) を返す
+def search(query, page=1, per_page=20, db_name=None, conn=None):
+    terms = split_terms(query)
+    page = max(page, 1)
+    if not terms:
+        return SearchPage(0, page, per_page, [])
+    conn = conn if conn is not None else storage.get_connection(db_name)
+    source, where, order, params = _query(terms)
+    offset = (page - 1) * per_page
+    if all(len(term) >= MIN_TERM_LENGTH for term in terms):
+        total = conn.execute(_INDEXED_COUNT, params).fetchone()[0]
+        score = _BM25 if total <= RANKED_LIMIT else "0"
+        rows = conn.execute(_INDEXED_PAGE.format(columns=_COLUMNS, score=score), params + [per_page, offset])
+    else:
+        total = conn.execute(f"SELECT count(*) FROM {source} WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM {source} WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [per_page, offset],
+        )
+    return SearchPage(total, page, per_page, [Listing(*row) for row in rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="求人の全文検索")
+    parser.add_argument("query")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--db", default=None, help="SQLite ファイル (省略時は job_listings.db)")
+    args = parser.parse_args()
+
+    storage.init_db(args.db)
+    result = search(args.query, args.page, args.per_page, db_name=args.db)
+    pages = (result.total + result.per_page - 1) // result.per_page
+    print(f"{result.total} 件 ({result.page} / {max(pages, 1)} ページ)")
+    for listing in result.listings:
+        wages = "" if listing.wages is None else f"{listing.wages:,.0f} 円"
+        print("\t".join((str(listing.id), listing.work_name or "", listing.office_name or "",
+                         listing.office_place or "", (listing.employment_type or "").strip(), wages)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import sqlite3
+import threading
+
+# 求人情報の SQLite データベース
+DB_NAME = "job_listings.db"
+
+# 接続ごとに設定する PRAGMA (jma_common.storage と同じ)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # 約 16MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# PRAGMA user_version に記録するスキーマのバージョン
+# 0: job_listings テーブルだけ
+# 1: 全文検索の索引 (job_listings_fts) と同期用のトリガー
+# 2: 都道府県・雇用形態ごとの集計 (job_facets) と集計用の索引
+SCHEMA_VERSION = 2
+
+# job_listings の列 (id 以外)
+LISTING_COLUMNS = ("work_name", "wages", "office_name", "office_place", "employment_type")
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS job_listings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    work_name TEXT,
+    wages REAL,
+    office_name TEXT,
+    office_place TEXT,
+    employment_type TEXT
+);
+'''
+
+# 全文検索の索引 (バージョン 1)
+# 日本語は単語の区切りがないので、3 文字ずつに区切る trigram で work_name と office_name を索引にする
+# 本文は job_listings から読む (external content) ので、索引に文字列を二重に持たない
+# job_listings の追加・更新・削除はトリガーで索引に反映する
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS job_listings_fts USING fts5(
+    work_name, office_name,
+    content='job_listings', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS job_listings_fts_insert AFTER INSERT ON job_listings BEGIN
+    INSERT INTO job_listings_fts (rowid, work_name, office_name) VALUES (new.id, new.work_name, new.office_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS job_listings_fts_delete AFTER DELETE ON job_listings BEGIN
+    INSERT INTO job_listings_fts (job_listings_fts, rowid, work_name, office_name)
+    VALUES ('delete', old.id, old.work_name, old.office_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS job_listings_fts_update AFTER UPDATE OF work_name, office_name ON job_listings BEGIN
+    INSERT INTO job_listings_fts (job_listings_fts, rowid, work_name, office_name)
+    VALUES ('delete', old.id, old.work_name, old.office_name);
+    INSERT INTO job_listings_fts (rowid, work_name, office_name) VALUES (new.id, new.work_name, new.office_name);
+END;
+'''
+
+# 集計の分類 (バージョン 2)
+# office_place は "神奈川" "和歌山" のように先頭 3 文字に切り詰められているので、先頭 3 文字を都道府県の
+# キーにする (47 都道府県は先頭 3 文字で区別できる)。employment_type は末尾の空白を落とす
+FACET_PLACE = "substr(coalesce({row}office_place, ''), 1, 3)"
+FACET_TYPE = "trim(coalesce({row}employment_type, ''), ' 　')"
+
+# job_facets: (都道府県, 雇用形態) ごとの件数・賃金の件数・最小・最大・中央値
+# 件数・最小・最大は job_listings への追加のたびにトリガーで更新する。中央値は追加の時点では分からないので
+# dirty を立てておき、jobs.facets.refresh() が dirty の組だけを集計用の索引から計算し直す
+# 削除・更新では最小・最大も分からなくなるので、その組は refresh() ですべて計算し直す
+# job_listings_facet は (都道府県, 雇用形態, 賃金) 順の索引で、1 つの組の集計は索引の範囲を読むだけで済む
+FACET_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS job_facets (
+    place TEXT NOT NULL,
+    employment_type TEXT NOT NULL,
+    listings INTEGER NOT NULL,
+    wage_count INTEGER NOT NULL,
+    wage_min REAL,
+    wage_max REAL,
+    wage_median REAL,
+    dirty INTEGER NOT NULL,
+    PRIMARY KEY (place, employment_type)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_facets_dirty ON job_facets (dirty) WHERE dirty;
+
+CREATE INDEX IF NOT EXISTS job_listings_facet ON job_listings (
+    {FACET_PLACE.format(row="")}, {FACET_TYPE.format(row="")}, wages
+);
+
+CREATE TRIGGER IF NOT EXISTS job_facets_insert AFTER INSERT ON job_listings BEGIN
+    INSERT INTO job_facets (place, employment_type, listings, wage_count, wage_min, wage_max, dirty)
+    VALUES ({FACET_PLACE.format(row="new.")}, {FACET_TYPE.format(row="new.")},
+            1, new.wages IS NOT NULL, new.wages, new.wages, new.wages IS NOT NULL)
+    ON CONFLICT (place, employment_type) DO UPDATE SET
+        listings = listings + 1,
+        wage_count = wage_count + excluded.wage_count,
+        wage_min = CASE WHEN wage_min IS NULL OR excluded.wage_min < wage_min THEN excluded.wage_min ELSE wage_min END,
+        wage_max = CASE WHEN wage_max IS NULL OR excluded.wage_max > wage_max THEN excluded.wage_max ELSE wage_max END,
+        dirty = dirty OR excluded.dirty;
+END;
+
+CREATE TRIGGER IF NOT EXISTS job_facets_delete AFTER DELETE ON job_listings BEGIN
+    UPDATE job_facets SET dirty = 1
+    WHERE place = {FACET_PLACE.format(row="old.")} AND employment_type = {FACET_TYPE.format(row="old.")};
+END;
+
+CREATE TRIGGER IF NOT EXISTS job_facets_update AFTER UPDATE OF office_place, employment_type, wages ON job_listings BEGIN
+    UPDATE job_facets SET dirty = 1
+    WHERE place = {FACET_PLACE.format(row="old.")} AND employment_type = {FACET_TYPE.format(row="old.")};
+    INSERT INTO job_facets (place, employment_type, listings, wage_count, dirty)
+    VALUES ({FACET_PLACE.format(row="new.")}, {FACET_TYPE.format(row="new.")}, 0, 0, 1)
+    ON CONFLICT (place, employment_type) DO UPDATE SET dirty = 1;
+END;
+
+INSERT INTO job_facets (place, employment_type, listings, wage_count, dirty)
+SELECT DISTINCT {FACET_PLACE.format(row="")}, {FACET_TYPE.format(row="")}, 0, 0, 1 FROM job_listings
+WHERE true ON CONFLICT (place, employment_type) DO NOTHING;
+'''
+
+# スレッドごとに 1 本ずつ保持する接続 ({DBファイル名: 接続})
+_local = threading.local()
+
+
+# このスレッド用の接続を返す (初回だけ開いて PRAGMA を設定する)
+def get_connection(db_name=None):
+    db_name = db_name or DB_NAME
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_name)
+    if conn is None:
+        conn = sqlite3.connect(db_name)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        connections[db_name] = conn
+    return conn
+
+
+# このスレッドの接続を閉じる
+def close_connections():
+    connections = getattr(_local, "connections", None) or {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
+
+
+# スキーマを作成し、古いバージョンの DB には足りない索引を追加する
+def init_db(db_name=None):
+    conn = get_connection(db_name)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    script = SCHEMA
+    if version < 1:
+        # 既存の行から全文検索の索引を作る
+        script += FTS_SCHEMA + "INSERT INTO job_listings_fts (job_listings_fts) VALUES ('rebuild');"
+    if version < 2:
+        # 既存の組はすべて dirty として登録し、最初の jobs.facets.refresh() で集計する
+        script += FACET_SCHEMA
+    conn.executescript("BEGIN;" + script + "COMMIT;")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+# 求人を追加する。rows は LISTING_COLUMNS の順のタプルか、同じキーの辞書
+# 全文検索の索引と集計 (job_facets) はトリガーで同時に更新される
+def insert_listings(rows, db_name=None, conn=None):
+    conn = conn if conn is not None else get_connection(db_name)
+    values = [
+        tuple(row.get(column) for column in LISTING_COLUMNS) if isinstance(row, dict) else tuple(row)
+        for row in rows
+    ]
+    with conn:
+        conn.executemany(
+            f"INSERT INTO job_listings ({', '.join(LISTING_COLUMNS)}) VALUES ({', '.join('?' * len(LISTING_COLUMNS))})",
+            values,
+        )
+    return len(values)
@@ -0,0 +1,51 @@
+# 式入力モード (calculator/calc_expression.py) のテスト
+#
+#   python -m unittest discover tests
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "calculator"))
+
+from calc_expression import MAX_DEPTH, ExpressionEngine, ExpressionError, compile_expression, evaluate
+
+
+class EvaluateTest(unittest.TestCase):
+    def test_precedence(self):
+        self.assertEqual(evaluate("2+3*4"), 14)
+        self.assertEqual(evaluate("10-2-3"), 5)
+        self.assertEqual(evaluate("8/2/2"), 2)
+        self.assertEqual(evaluate("2^3^2"), 512)
+        self.assertEqual(evaluate("-2^2"), -4)
+        self.assertEqual(evaluate("(1+2)(3+4)"), 21)
+
+    # float にすると inf になる桁数の数値は式の誤り
+    def test_huge_literal(self):
+        with self.assertRaises(ExpressionError):
+            compile_expression("9" * 400)
+        self.assertEqual(evaluate("9" * 400 + "*0"), "Error")
+
+    # 入れ子が深すぎる式は RecursionError ではなく式の誤り
+    def test_deep_nesting(self):
+        self.assertEqual(evaluate("(" * MAX_DEPTH + "1" + ")" * MAX_DEPTH), 1)
+        with self.assertRaises(ExpressionError):
+            compile_expression("(" * (MAX_DEPTH + 1) + "1")
+        self.assertEqual(evaluate("(" * 300 + "1" + ")" * 300), "Error")
+        self.assertEqual(evaluate("-" * 300 + "1"), "Error")
+        self.assertEqual(evaluate("2^" * 300 + "1"), "Error")
+
+    # 長い式でも入れ子にならない演算の並びは計算できる
+    def test_long_chain(self):
+        self.assertEqual(evaluate("+".join(["1"] * 5000)), 5000)
+
+
+class ExpressionEngineTest(unittest.TestCase):
+    def test_press_equals_shows_error(self):
+        for keys in (["9"] * 400 + ["*", "0"], ["("] * 300 + ["1"] + [")"] * 300):
+            engine = ExpressionEngine()
+            self.assertEqual(engine.feed(keys + ["="]), "Error")
+            self.assertEqual(engine.feed(["1", "+", "2", "="]), "3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+# 天気予報アプリの 1 セッション分の状態 (jma_common/session.py) のテスト
+#
+#   python -m unittest discover tests
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jma_common.area_index import get_area_index
+from jma_common.session import ForecastSession
+from jma_common.stub_server import sample_forecast
+
+
+class ForecastSessionTest(unittest.TestCase):
+    # 同じタスクで select を続けて await しても、2 回目が 1 回目 (= 自分自身) を取り消さない
+    def test_two_selects_in_one_task(self):
+        fetched = []
+
+        def fetch(area_code):
+            fetched.append(area_code)
+            return sample_forecast(area_code)
+
+        session = ForecastSession(update=lambda: None, fetch=fetch, store=None)
+        office = get_area_index().get("offices", "130000")
+
+        async def run():
+            await session.select(office)
+            await session.select(office)
+
+        asyncio.run(run())
+        self.assertEqual(fetched, ["130000", "130000"])
+        self.assertTrue(session.forecast_view.lines)
+        self.assertFalse(session.loading.visible)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# 天気予報 DB (jma_common/storage.py) の旧形式からの移行のテスト
+#
+#   python -m unittest discover tests
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jma_common import storage
+
+# baseline の weather_forecast.db と同じ旧形式の forecasts テーブル
+LEGACY_FORECASTS = """
+CREATE TABLE forecasts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    area_id INTEGER,
+    report_datetime TEXT,
+    forecast_time TEXT,
+    weather TEXT,
+    wind TEXT
+)
+"""
+
+REPORTED = "2024-12-17T17:00:00+09:00"
+
+
+class LegacyMigrationTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "legacy.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute(LEGACY_FORECASTS)
+        # 011000 (宗谷地方) は細分区域が 1 つ、130000 (東京都) は 130010〜130040 の 4 つ
+        conn.executemany(
+            "INSERT INTO forecasts (area_id, report_datetime, forecast_time, weather, wind) VALUES (?, ?, ?, ?, ?)",
+            [
+                (11000, REPORTED, "2024-12-18T00:00:00+09:00", "くもり", "北の風"),
+                (130000, REPORTED, "2024-12-18T00:00:00+09:00", "晴れ", "北の風"),
+                (130000, REPORTED, "2024-12-18T00:00:00+09:00", "雨", "南の風"),
+                (130000, REPORTED, "2024-12-19T00:00:00+09:00", "くもり", "東の風"),
+            ],
+        )
+        conn.commit()
+        conn.close()
+        self.addCleanup(storage.close_connections)
+
+    # 細分区域が複数ある気象台の行は推測せずに写さず、その行数を返す
+    def test_ambiguous_sub_areas_are_counted(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = storage.init_db(self.path)
+        self.assertEqual(result, storage.LegacyMigration(migrated=1, skipped=3))
+        self.assertIn("3 行は細分区域が決まらない", output.getvalue())
+
+        conn = storage.get_connection(self.path)
+        areas = [row[0] for row in conn.execute("SELECT DISTINCT area_code FROM weather_series")]
+        self.assertEqual(areas, ["011000"])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM forecasts_legacy").fetchone()[0], 4)
+        # 移行済みなら何もしない
+        self.assertIsNone(storage.init_db(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()